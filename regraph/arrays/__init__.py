@@ -0,0 +1,3 @@
+"""Array-backed graphs for regraph."""
+
+from regraph.arrays.graphs import ArrayGraph
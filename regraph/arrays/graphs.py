@@ -0,0 +1,1036 @@
+"""Array-backed graphs for regraph.
+
+`ArrayGraph` is an in-process directed graph whose nodes are interned to
+integer indices. Its edges are stored in compressed sparse row (CSR)
+arrays (sorted targets per source node and, for predecessor queries,
+an index of the edges sorted by their targets), the modifications of
+the edges since the last compaction are kept in a small overlay of
+dictionaries and in a mask of removed edges. Node and edge attributes
+are kept in interned columnar tables
+(`regraph.networkx.attribute_store.AttributeStore`), the edges without
+attributes do not allocate any row.
+
+The graph implements the interface used by `regraph.primitives` for
+graphs that are not NetworkX graphs (the same interface as the one of
+`regraph.neo4j.Neo4jGraph`), as well as the read-only views (`adj`,
+`pred`, `node`) used by the matching engine of
+`regraph.networkx.matching`. Therefore, the primitives,
+`find_matching` and `Rule.apply_to` (in-place) can be used with
+array-backed graphs without the per-node and per-edge dictionaries of
+NetworkX.
+
+Note that attribute dictionaries returned by the graph are copies:
+attributes are modified with the methods of the graph (or with the
+primitives).
+"""
+import copy
+
+import networkx as nx
+import numpy as np
+
+from regraph.utils import (normalize_attrs,
+                           merge_attributes,
+                           valid_attributes,
+                           generate_new_id,
+                           copy_attrs)
+from regraph.exceptions import ReGraphError, GraphError
+from regraph.networkx.attribute_store import AttributeStore
+from regraph.networkx.category_utils import (pullback_complement_delta,
+                                             pushout_delta,
+                                             _internal_validation)
+from regraph.networkx.matching import iter_backtracking_matchings
+from regraph.networkx.node_ids import NodeIdAllocator
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+# Minimal number of modified edges triggering the compaction
+COMPACTION_THRESHOLD = 1024
+# Ratio of modified edges (w.r.t. the edges of the CSR arrays)
+# triggering the compaction
+COMPACTION_RATIO = 0.5
+
+# Row of the edges without attributes
+_NO_ATTRS = -1
+# Type of node indices and attribute rows in the arrays
+_INDEX_DTYPE = np.int32
+
+
+def _csr_offsets(indices, size):
+    """Compute offsets of the rows of sorted indices."""
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=size), out=offsets[1:])
+    return offsets
+
+
+class ArrayGraph(object):
+    """Directed graph stored in arrays.
+
+    Attributes
+    ----------
+    _ids : list
+        Node ids indexed by node indices (None for free indices)
+    _index : dict
+        Dictionary whose keys are node ids and whose values are
+        their indices
+    _node_attrs : AttributeStore
+        Attributes of the nodes (rows are node indices)
+    _edge_attrs : AttributeStore
+        Attributes of the edges
+    _n_edges : int
+        Number of edges
+    _n_base : int
+        Number of node indices covered by the CSR arrays
+    _offsets : np.ndarray
+        Offsets of the edges of every source node in the CSR arrays
+    _sources : np.ndarray
+        Sources of the edges of the CSR arrays
+    _targets : np.ndarray
+        Targets of the edges of the CSR arrays (sorted per source)
+    _edge_rows : np.ndarray
+        Attribute rows of the edges of the CSR arrays (-1 if the edge
+        has no attributes)
+    _alive : np.ndarray
+        Mask of the edges of the CSR arrays that are not removed
+    _in_offsets : np.ndarray
+        Offsets of the edges of every target node in `_in_edges`
+    _in_edges : np.ndarray
+        Positions of the edges of the CSR arrays sorted by targets
+    _n_dead : int
+        Number of removed edges of the CSR arrays
+    _succ_overlay : dict
+        Edges added since the last compaction, dictionary whose keys
+        are indices of sources and whose values are dictionaries
+        mapping indices of targets to attribute rows
+    _pred_overlay : dict
+        The same edges indexed by targets
+    _n_overlay : int
+        Number of edges in the overlay
+    _node_id_allocator : NodeIdAllocator
+        Allocator of the ids of clones and merged nodes
+    """
+
+    def __init__(self):
+        """Initialize an empty graph."""
+        self._ids = []
+        self._index = dict()
+        self._node_id_allocator = NodeIdAllocator()
+        self._node_attrs = AttributeStore()
+        self._edge_attrs = AttributeStore()
+        self._n_edges = 0
+        empty = np.zeros(0, dtype=_INDEX_DTYPE)
+        self._build(empty, empty, empty)
+
+    @classmethod
+    def from_arrays(cls, nodes, sources, targets):
+        """Create a graph (without attributes) from arrays of edges.
+
+        Parameters
+        ----------
+        nodes : iterable
+            Node ids
+        sources : array_like
+            Positions in `nodes` of the sources of the edges
+        targets : array_like
+            Positions in `nodes` of the targets of the edges
+
+        Raises
+        ------
+        GraphError
+            If node ids are not unique or the positions of the
+            edges are out of range.
+        """
+        graph = cls()
+        graph._ids = list(nodes)
+        graph._index = dict((n, i) for i, n in enumerate(graph._ids))
+        if len(graph._index) != len(graph._ids):
+            raise GraphError("Node ids are not unique!")
+        graph._node_attrs.allocate_rows(len(graph._ids))
+
+        size = len(graph._ids)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if len(sources) != len(targets):
+            raise GraphError("Arrays of sources and targets differ in size!")
+        if len(sources) > 0:
+            if min(sources.min(), targets.min()) < 0 or\
+                    max(sources.max(), targets.max()) >= size:
+                raise GraphError("Edges refer to nodes that do not exist!")
+            # Remove duplicate edges
+            pairs = np.unique(sources * size + targets)
+            sources, targets = pairs // size, pairs % size
+        graph._n_edges = len(sources)
+        graph._build(
+            sources, targets, np.full(len(sources), _NO_ATTRS))
+        return graph
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """Create a graph from a `networkx.DiGraph` object.
+
+        Raises
+        ------
+        ReGraphError
+            If the graph is not directed.
+        """
+        if not graph.is_directed():
+            raise ReGraphError("Array-backed graphs are directed!")
+        array_graph = cls()
+        for node, attrs in graph.nodes(data=True):
+            array_graph.add_node(node, attrs)
+        sources = []
+        targets = []
+        rows = []
+        index = array_graph._index
+        for s, t, attrs in graph.edges(data=True):
+            sources.append(index[s])
+            targets.append(index[t])
+            rows.append(array_graph._new_edge_row(attrs))
+        array_graph._n_edges = len(sources)
+        array_graph._build(
+            np.array(sources, dtype=np.int64),
+            np.array(targets, dtype=np.int64),
+            np.array(rows, dtype=np.int64))
+        return array_graph
+
+    def to_networkx(self):
+        """Create a `networkx.DiGraph` object from the graph."""
+        graph = nx.DiGraph()
+        for node in self.nodes():
+            graph.add_node(node, **self.get_node_attrs(node))
+        for s, t in self.edges():
+            graph.add_edge(s, t, **self.get_edge_attrs(s, t))
+        return graph
+
+    def copy(self):
+        """Copy the graph."""
+        return copy.deepcopy(self)
+
+    def _build(self, sources, targets, rows):
+        """Build the CSR arrays from edges (the overlay is cleared)."""
+        size = len(self._ids)
+        order = np.lexsort((targets, sources))
+        self._sources = sources[order].astype(_INDEX_DTYPE)
+        self._targets = targets[order].astype(_INDEX_DTYPE)
+        self._edge_rows = rows[order].astype(_INDEX_DTYPE)
+        self._alive = np.ones(len(order), dtype=bool)
+        self._offsets = _csr_offsets(self._sources, size)
+        self._in_edges = np.lexsort((self._sources, self._targets))
+        self._in_offsets = _csr_offsets(self._targets, size)
+        self._n_base = size
+        self._n_dead = 0
+        self._succ_overlay = dict()
+        self._pred_overlay = dict()
+        self._n_overlay = 0
+
+    def compact(self):
+        """Merge the modifications of the edges into the CSR arrays."""
+        live = np.flatnonzero(self._alive)
+        sources = [self._sources[live].astype(np.int64)]
+        targets = [self._targets[live].astype(np.int64)]
+        rows = [self._edge_rows[live].astype(np.int64)]
+        for i, successors in self._succ_overlay.items():
+            sources.append(np.full(len(successors), i, dtype=np.int64))
+            targets.append(np.fromiter(
+                successors.keys(), dtype=np.int64, count=len(successors)))
+            rows.append(np.fromiter(
+                successors.values(), dtype=np.int64, count=len(successors)))
+        self._build(
+            np.concatenate(sources), np.concatenate(targets),
+            np.concatenate(rows))
+
+    def _maybe_compact(self):
+        """Compact the graph if the modifications of the edges are large."""
+        modified = self._n_overlay + self._n_dead
+        if modified > max(COMPACTION_THRESHOLD,
+                          COMPACTION_RATIO * len(self._targets)):
+            self.compact()
+
+    # Low-level access to the arrays (by node indices)
+
+    def _node_index(self, node):
+        """Get the index of a node."""
+        try:
+            return self._index[node]
+        except (KeyError, TypeError):
+            raise GraphError("Node '%s' does not exist!" % str(node))
+
+    def _new_node(self, node):
+        """Allocate an index for a new node."""
+        i = self._node_attrs.allocate_row()
+        if i == len(self._ids):
+            self._ids.append(node)
+        else:
+            self._ids[i] = node
+        self._index[node] = i
+        return i
+
+    def _base_position(self, i, j):
+        """Find the position of the edge in the CSR arrays (-1 if none)."""
+        if i >= self._n_base:
+            return -1
+        lo = self._offsets[i]
+        hi = self._offsets[i + 1]
+        if lo == hi:
+            return -1
+        k = lo + np.searchsorted(self._targets[lo:hi], j)
+        if k < hi and self._targets[k] == j and self._alive[k]:
+            return k
+        return -1
+
+    def _edge_row(self, i, j):
+        """Get the attribute row of an edge (None if there is no edge)."""
+        successors = self._succ_overlay.get(i)
+        if successors is not None and j in successors:
+            return successors[j]
+        k = self._base_position(i, j)
+        if k < 0:
+            return None
+        return int(self._edge_rows[k])
+
+    def _set_edge_row(self, i, j, row):
+        """Set the attribute row of an existing edge."""
+        successors = self._succ_overlay.get(i)
+        if successors is not None and j in successors:
+            successors[j] = row
+            self._pred_overlay[j][i] = row
+        else:
+            self._edge_rows[self._base_position(i, j)] = row
+
+    def _successors(self, i):
+        """Get a dictionary of successors of a node with edge rows."""
+        result = dict()
+        if i < self._n_base:
+            lo = self._offsets[i]
+            hi = self._offsets[i + 1]
+            alive = self._alive[lo:hi]
+            result.update(zip(
+                self._targets[lo:hi][alive].tolist(),
+                self._edge_rows[lo:hi][alive].tolist()))
+        successors = self._succ_overlay.get(i)
+        if successors is not None:
+            result.update(successors)
+        return result
+
+    def _predecessors(self, i):
+        """Get a dictionary of predecessors of a node with edge rows."""
+        result = dict()
+        if i < self._n_base:
+            positions = self._in_edges[
+                self._in_offsets[i]:self._in_offsets[i + 1]]
+            positions = positions[self._alive[positions]]
+            result.update(zip(
+                self._sources[positions].tolist(),
+                self._edge_rows[positions].tolist()))
+        predecessors = self._pred_overlay.get(i)
+        if predecessors is not None:
+            result.update(predecessors)
+        return result
+
+    def _add_edge(self, i, j, row):
+        """Add an edge to the overlay."""
+        self._succ_overlay.setdefault(i, dict())[j] = row
+        self._pred_overlay.setdefault(j, dict())[i] = row
+        self._n_overlay += 1
+        self._n_edges += 1
+
+    def _remove_edge(self, i, j):
+        """Remove an edge (from the overlay or the CSR arrays)."""
+        successors = self._succ_overlay.get(i)
+        if successors is not None and j in successors:
+            row = successors.pop(j)
+            if len(successors) == 0:
+                del self._succ_overlay[i]
+            predecessors = self._pred_overlay[j]
+            del predecessors[i]
+            if len(predecessors) == 0:
+                del self._pred_overlay[j]
+            self._n_overlay -= 1
+        else:
+            k = self._base_position(i, j)
+            if k < 0:
+                raise GraphError(
+                    "Edge '%s->%s' does not exist!" %
+                    (str(self._ids[i]), str(self._ids[j])))
+            row = int(self._edge_rows[k])
+            self._alive[k] = False
+            self._n_dead += 1
+        if row != _NO_ATTRS:
+            self._edge_attrs.release_row(row)
+        self._n_edges -= 1
+
+    def _new_edge_row(self, attrs):
+        """Allocate an attribute row for edge attributes (if any)."""
+        new_attrs = copy_attrs(attrs) if attrs is not None else dict()
+        normalize_attrs(new_attrs)
+        if len(new_attrs) == 0:
+            return _NO_ATTRS
+        row = self._edge_attrs.allocate_row()
+        for key, value in new_attrs.items():
+            self._edge_attrs.set(row, key, value)
+        return row
+
+    def _copy_edge_row(self, row):
+        """Allocate an attribute row with the attributes of another row."""
+        if row == _NO_ATTRS:
+            return _NO_ATTRS
+        new_row = self._edge_attrs.allocate_row()
+        for key, value in self._edge_attrs.items(row).items():
+            self._edge_attrs.set(new_row, key, value)
+        return new_row
+
+    def _row_attrs(self, row):
+        """Get the dictionary of the attributes of an edge row."""
+        if row == _NO_ATTRS:
+            return dict()
+        return self._edge_attrs.items(row)
+
+    def _existing_edge_row(self, s, t, allocate=False):
+        """Get the attribute row of an edge given by node ids.
+
+        If `allocate` is True, a row is allocated for the edges
+        without attributes.
+        """
+        i = self._node_index(s)
+        j = self._node_index(t)
+        row = self._edge_row(i, j)
+        if row is None:
+            raise GraphError(
+                "Edge '%s->%s' does not exist!" % (str(s), str(t)))
+        if allocate and row == _NO_ATTRS:
+            row = self._edge_attrs.allocate_row()
+            self._set_edge_row(i, j, row)
+        return row
+
+    # Interface of graphs
+
+    def __len__(self):
+        """Return the number of nodes."""
+        return len(self._index)
+
+    def __contains__(self, node):
+        """Test if the node is in the graph."""
+        return node in self.nodes()
+
+    def is_directed(self):
+        """Return True (array-backed graphs are directed)."""
+        return True
+
+    def number_of_nodes(self):
+        """Return the number of nodes."""
+        return len(self._index)
+
+    def number_of_edges(self):
+        """Return the number of edges."""
+        return self._n_edges
+
+    def nodes(self):
+        """Return a view of the nodes of the graph."""
+        return _NodeView(self)
+
+    def edges(self):
+        """Return a view of the edges of the graph."""
+        return _EdgeView(self)
+
+    @property
+    def adj(self):
+        """View of the successors of the nodes with edge attributes."""
+        return _AdjacencyView(self, True)
+
+    @property
+    def pred(self):
+        """View of the predecessors of the nodes with edge attributes."""
+        return _AdjacencyView(self, False)
+
+    @property
+    def node(self):
+        """View of the attributes of the nodes."""
+        return _NodeAttrsView(self)
+
+    def has_node(self, node):
+        """Test if the node is in the graph."""
+        return node in self.nodes()
+
+    def has_edge(self, s, t):
+        """Test if an edge 's'->'t' exists."""
+        i = self._index.get(s)
+        j = self._index.get(t)
+        if i is None or j is None:
+            return False
+        return self._edge_row(i, j) is not None
+
+    def exists_edge(self, s, t):
+        """Test if an edge 's'->'t' exists."""
+        return self.has_edge(s, t)
+
+    def degree(self, node):
+        """Return the degree (number of incident edges) of the node."""
+        i = self._node_index(node)
+        return len(self._successors(i)) + len(self._predecessors(i))
+
+    def successors(self, node):
+        """Return the list of successors of the node."""
+        ids = self._ids
+        return [ids[j] for j in self._successors(self._node_index(node))]
+
+    def predecessors(self, node):
+        """Return the list of predecessors of the node."""
+        ids = self._ids
+        return [ids[j] for j in self._predecessors(self._node_index(node))]
+
+    def add_node(self, node, attrs=None):
+        """Add a node to the graph.
+
+        Raises
+        ------
+        GraphError
+            If the node already exists.
+        """
+        if node is None:
+            raise GraphError("None cannot be a node!")
+        if node in self._index:
+            raise GraphError("Node '%s' already exists!" % str(node))
+        i = self._new_node(node)
+        if attrs is not None:
+            new_attrs = copy_attrs(attrs)
+            normalize_attrs(new_attrs)
+            for key, value in new_attrs.items():
+                self._node_attrs.set(i, key, value)
+        return node
+
+    def add_nodes_from(self, nodes):
+        """Add nodes (optionally, with their attributes) to the graph."""
+        for n in nodes:
+            if type(n) != str:
+                try:
+                    node, attrs = n
+                    self.add_node(node, attrs)
+                except (TypeError, ValueError):
+                    self.add_node(n)
+            else:
+                self.add_node(n)
+
+    def add_edge(self, s, t, attrs=None):
+        """Add an edge to the graph.
+
+        Raises
+        ------
+        GraphError
+            If either one of the nodes does not exist or the edge
+            already exists.
+        """
+        i = self._node_index(s)
+        j = self._node_index(t)
+        if self._edge_row(i, j) is not None:
+            raise GraphError(
+                "Edge '{}'->'{}' already exists!".format(s, t))
+        self._add_edge(i, j, self._new_edge_row(attrs))
+        self._maybe_compact()
+
+    def add_edges_from(self, edges):
+        """Add edges (optionally, with their attributes) to the graph."""
+        for e in edges:
+            if len(e) == 2:
+                self.add_edge(e[0], e[1])
+            elif len(e) == 3:
+                self.add_edge(e[0], e[1], e[2])
+            else:
+                raise ReGraphError(
+                    "Was expecting 2 or 3 elements per tuple, got %s." %
+                    str(len(e)))
+
+    def remove_node(self, node):
+        """Remove a node (and its incident edges) from the graph."""
+        i = self._node_index(node)
+        for j in list(self._successors(i)):
+            self._remove_edge(i, j)
+        for j in list(self._predecessors(i)):
+            self._remove_edge(j, i)
+        self._node_attrs.release_row(i)
+        self._ids[i] = None
+        del self._index[node]
+        self._maybe_compact()
+
+    def remove_edge(self, s, t):
+        """Remove an edge from the graph."""
+        self._remove_edge(self._node_index(s), self._node_index(t))
+        self._maybe_compact()
+
+    def remove_edges_from(self, edges):
+        """Remove edges from the graph."""
+        for s, t in edges:
+            self._remove_edge(self._node_index(s), self._node_index(t))
+        self._maybe_compact()
+
+    def get_node_attrs(self, node):
+        """Return the attributes of the node."""
+        return self._node_attrs.items(self._node_index(node))
+
+    def get_node(self, node):
+        """Call 'get_node_attrs'."""
+        return self.get_node_attrs(node)
+
+    def add_node_attrs(self, node, attrs):
+        """Add attributes to the node."""
+        i = self._node_index(node)
+        new_attrs = copy_attrs(attrs)
+        normalize_attrs(new_attrs)
+        _add_attrs(self._node_attrs, i, new_attrs)
+
+    def set_node_attrs(self, node, attrs, update=False):
+        """Set node attributes.
+
+        node :
+            Id of the node whose attrs should be set
+        attrs : dict
+            Dictionary containing attrs
+        update : optional
+            If is set to False, updates only the attributes
+            whose keys are in 'attrs', all the attributes not
+            mentioned in 'attrs' stay the same. Otherwise,
+            overwrites all the attributes (default: False)
+        """
+        i = self._node_index(node)
+        new_attrs = copy_attrs(attrs)
+        normalize_attrs(new_attrs)
+        if update:
+            self._node_attrs.clear_row(i)
+        for key, value in new_attrs.items():
+            self._node_attrs.set(i, key, value)
+
+    def remove_node_attrs(self, node, attrs):
+        """Remove attributes from the node."""
+        i = self._node_index(node)
+        new_attrs = copy_attrs(attrs)
+        normalize_attrs(new_attrs)
+        _remove_attrs(self._node_attrs, i, new_attrs)
+
+    def get_edge_attrs(self, s, t):
+        """Return the attributes of the edge."""
+        return self._row_attrs(self._existing_edge_row(s, t))
+
+    def get_edge(self, s, t):
+        """Call 'get_edge_attrs'."""
+        return self.get_edge_attrs(s, t)
+
+    def add_edge_attrs(self, s, t, attrs):
+        """Add attributes to the edge."""
+        new_attrs = copy_attrs(attrs)
+        normalize_attrs(new_attrs)
+        row = self._existing_edge_row(s, t, allocate=len(new_attrs) > 0)
+        if len(new_attrs) > 0:
+            _add_attrs(self._edge_attrs, row, new_attrs)
+
+    def set_edge_attrs(self, s, t, attrs, update=False):
+        """Set edge attributes.
+
+        s :
+            Id of the source node of the edge
+        t :
+            Id of the target node of the edge
+        attrs : dict
+            Dictionary containing attrs
+        update : optional
+            If is set to False, updates only the attributes
+            whose keys are in 'attrs', all the attributes not
+            mentioned in 'attrs' stay the same. Otherwise,
+            overwrites all the attributes (default: False)
+        """
+        new_attrs = copy_attrs(attrs)
+        normalize_attrs(new_attrs)
+        row = self._existing_edge_row(s, t, allocate=len(new_attrs) > 0)
+        if row == _NO_ATTRS:
+            return
+        if update:
+            self._edge_attrs.clear_row(row)
+        for key, value in new_attrs.items():
+            self._edge_attrs.set(row, key, value)
+
+    def remove_edge_attrs(self, s, t, attrs):
+        """Remove attributes from the edge."""
+        row = self._existing_edge_row(s, t)
+        if row != _NO_ATTRS:
+            new_attrs = copy_attrs(attrs)
+            normalize_attrs(new_attrs)
+            _remove_attrs(self._edge_attrs, row, new_attrs)
+
+    def relabel_node(self, node, new_id):
+        """Change the id of the node."""
+        if new_id == node:
+            return
+        if new_id in self._index:
+            raise GraphError("Node '%s' already exists!" % str(new_id))
+        i = self._node_index(node)
+        self._ids[i] = new_id
+        del self._index[node]
+        self._index[new_id] = i
+
+    def clone_node(self, node, name=None):
+        """Clone a node of the graph.
+
+        The clone has the attributes of the node and is connected
+        to all the predecessors and successors of the node (as well
+        as to itself, if the node has a self-loop).
+
+        Returns
+        -------
+        name : hashable
+            Id of the clone (generated if `name` is not specified)
+
+        Raises
+        ------
+        GraphError
+            If the node does not exist or a node with the id `name`
+            already exists.
+        """
+        i = self._node_index(node)
+        if name is None:
+            name = self._node_id_allocator.new_id(
+                self._index, str(node), "{}{}")
+        elif name in self._index:
+            raise GraphError("Node '%s' already exists!" % str(name))
+
+        predecessors = self._predecessors(i)
+        successors = self._successors(i)
+        c = self._new_node(name)
+        for key, value in self._node_attrs.items(i).items():
+            self._node_attrs.set(c, key, value)
+        for j, row in predecessors.items():
+            self._add_edge(j, c, self._copy_edge_row(row))
+        for j, row in successors.items():
+            self._add_edge(c, j, self._copy_edge_row(row))
+        if i in successors:
+            # The clone of a self-loop connects the clone to itself too
+            self._add_edge(c, c, self._copy_edge_row(successors[i]))
+        self._maybe_compact()
+        return name
+
+    def merge_nodes(self, nodes, name=None, method="union",
+                    edge_method="union"):
+        """Merge nodes of the graph.
+
+        Parameters
+        ----------
+        nodes : iterable
+            Collection of node id's to merge.
+        name : hashable, optional
+            Id of the new node (generated if not specified)
+        method : optional
+            Method of node attributes merge, `"union"` (default) or
+            `"intersection"`
+        edge_method : optional
+            Method of edge attributes merge, `"union"` (default) or
+            `"intersection"`
+
+        Returns
+        -------
+        name : hashable
+            Id of the new node
+        """
+        nodes = list(nodes)
+        if len(nodes) == 0:
+            raise ReGraphError("Cannot merge an empty set of nodes!")
+        if name is None:
+            name = "_".join(sorted([str(n) for n in nodes]))
+            if name in self._index and name not in nodes:
+                name = generate_new_id(
+                    self._index, name, self._node_id_allocator)
+        elif name in self._index and name not in nodes:
+            raise GraphError(
+                "New name for merged node is not valid: "
+                "node with name '%s' already exists!" % name)
+        indices = [self._node_index(n) for n in nodes]
+        merged = set(indices)
+
+        if method == "union":
+            attrs = dict()
+        elif method == "intersection":
+            attrs = self._node_attrs.items(indices[0])
+        else:
+            raise ReGraphError(
+                "Merging method '%s' is not defined!" % method)
+        loop_attrs = None
+        successors = dict()
+        predecessors = dict()
+        for i in indices:
+            attrs = merge_attributes(attrs, self._node_attrs.items(i), method)
+            for j, row in self._successors(i).items():
+                edge_attrs = self._row_attrs(row)
+                if j in merged:
+                    if loop_attrs is None:
+                        loop_attrs = edge_attrs
+                    else:
+                        loop_attrs = merge_attributes(
+                            loop_attrs, edge_attrs, edge_method)
+                elif j in successors:
+                    successors[j] = merge_attributes(
+                        successors[j], edge_attrs, edge_method)
+                else:
+                    successors[j] = edge_attrs
+            for j, row in self._predecessors(i).items():
+                if j in merged:
+                    continue
+                edge_attrs = self._row_attrs(row)
+                if j in predecessors:
+                    predecessors[j] = merge_attributes(
+                        predecessors[j], edge_attrs, edge_method)
+                else:
+                    predecessors[j] = edge_attrs
+
+        for node in nodes:
+            self.remove_node(node)
+        self.add_node(name, attrs)
+        k = self._index[name]
+        for j, edge_attrs in successors.items():
+            self._add_edge(k, j, self._new_edge_row(edge_attrs))
+        for j, edge_attrs in predecessors.items():
+            self._add_edge(j, k, self._new_edge_row(edge_attrs))
+        if loop_attrs is not None:
+            self._add_edge(k, k, self._new_edge_row(loop_attrs))
+        self._maybe_compact()
+        return name
+
+    def _degrees(self):
+        """Compute the arrays of out- and in-degrees of the nodes."""
+        size = len(self._ids)
+        out_degrees = np.bincount(
+            self._sources[self._alive], minlength=size)
+        in_degrees = np.bincount(
+            self._targets[self._alive], minlength=size)
+        for i, successors in self._succ_overlay.items():
+            out_degrees[i] += len(successors)
+        for j, predecessors in self._pred_overlay.items():
+            in_degrees[j] += len(predecessors)
+        return out_degrees, in_degrees
+
+    def _loops(self):
+        """Compute the mask of the nodes with self-loops."""
+        loops = np.zeros(len(self._ids), dtype=bool)
+        loops[self._sources[
+            self._alive & (self._sources == self._targets)]] = True
+        for i, successors in self._succ_overlay.items():
+            if i in successors:
+                loops[i] = True
+        return loops
+
+    def find_matching(self, pattern, nodes=None):
+        """Find matchings of a pattern in the graph.
+
+        The candidates for the pattern nodes are selected with
+        vectorized scans of the arrays: the attributes are tested
+        once per distinct value of the columns of the node
+        attributes, the degrees are compared for all the nodes
+        at once.
+        """
+        out_degrees, in_degrees = self._degrees()
+        live = np.fromiter(
+            (n is not None for n in self._ids), dtype=bool,
+            count=len(self._ids))
+        loops = None
+        candidates = dict()
+        for pattern_node, attrs in pattern.nodes(data=True):
+            selected = live &\
+                (out_degrees >= len(pattern.adj[pattern_node])) &\
+                (in_degrees >= len(pattern.pred[pattern_node]))
+            if len(attrs) > 0:
+                normalized_attrs = copy_attrs(attrs)
+                normalize_attrs(normalized_attrs)
+                selected &= self._node_attrs.including(
+                    normalized_attrs)[:len(self._ids)]
+            node_candidates = [
+                self._ids[i] for i in np.flatnonzero(selected)]
+            if pattern_node in pattern.adj[pattern_node]:
+                if loops is None:
+                    loops = self._loops()
+                loop_attrs = pattern.adj[pattern_node][pattern_node]
+                node_candidates = [
+                    n for n in node_candidates
+                    if loops[self._index[n]] and valid_attributes(
+                        loop_attrs, self.get_edge_attrs(n, n))
+                ]
+            candidates[pattern_node] = node_candidates
+        return list(iter_backtracking_matchings(
+            self, pattern, nodes, candidates=candidates, checked=True))
+
+    def rewrite(self, rule, instance):
+        """Perform SqPO rewriting of the graph with a rule (in-place).
+
+        Returns
+        -------
+        rhs_g : dict
+            Matching of the rhs of the rule in the result
+        """
+        _, p_g, _ = pullback_complement_delta(
+            rule.p, rule.lhs, self, rule.p_lhs, instance)
+        _, _, rhs_g = pushout_delta(
+            rule.p, self, rule.rhs, p_g, rule.p_rhs,
+            validation=_internal_validation())
+        return rhs_g
+
+
+def _add_attrs(store, row, attrs):
+    """Add (normalized) attributes to a row of the store."""
+    for key, value in attrs.items():
+        if store.has(row, key):
+            store.set(row, key, store.get(row, key).union(value))
+        else:
+            store.set(row, key, value)
+
+
+def _remove_attrs(store, row, attrs):
+    """Remove (normalized) attributes from a row of the store."""
+    for key, value in attrs.items():
+        if store.has(row, key):
+            new_set = store.get(row, key).difference(value)
+            if not new_set:
+                store.remove(row, key)
+            else:
+                store.set(row, key, new_set)
+
+
+class _NodeView(object):
+    """View of the nodes of an array-backed graph."""
+
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __contains__(self, node):
+        try:
+            return node in self._graph._index
+        except TypeError:
+            return False
+
+    def __iter__(self):
+        return (n for n in self._graph._ids if n is not None)
+
+    def __len__(self):
+        return len(self._graph._index)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class _EdgeView(object):
+    """View of the edges of an array-backed graph."""
+
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __contains__(self, edge):
+        try:
+            s, t = edge
+            return self._graph.has_edge(s, t)
+        except (TypeError, ValueError):
+            return False
+
+    def __iter__(self):
+        graph = self._graph
+        ids = graph._ids
+        for i, node in enumerate(ids):
+            if node is not None:
+                for j in graph._successors(i):
+                    yield (node, ids[j])
+
+    def __len__(self):
+        return self._graph._n_edges
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class _AdjacencyView(Mapping):
+    """View of the successors (or predecessors) of the nodes."""
+
+    __slots__ = ("_graph", "_outgoing")
+
+    def __init__(self, graph, outgoing):
+        self._graph = graph
+        self._outgoing = outgoing
+
+    def __getitem__(self, node):
+        return _NeighborsView(
+            self._graph, self._graph._index[node], self._outgoing)
+
+    def __contains__(self, node):
+        return node in self._graph.nodes()
+
+    def __iter__(self):
+        return iter(self._graph.nodes())
+
+    def __len__(self):
+        return len(self._graph._index)
+
+
+class _NeighborsView(Mapping):
+    """View of the neighbors of a node with the edge attributes."""
+
+    __slots__ = ("_graph", "_i", "_outgoing", "_rows")
+
+    def __init__(self, graph, i, outgoing):
+        self._graph = graph
+        self._i = i
+        self._outgoing = outgoing
+        self._rows = None
+
+    def _neighbor_rows(self):
+        if self._rows is None:
+            if self._outgoing:
+                self._rows = self._graph._successors(self._i)
+            else:
+                self._rows = self._graph._predecessors(self._i)
+        return self._rows
+
+    def _row(self, node):
+        j = self._graph._index.get(node)
+        if j is None:
+            return None
+        if self._outgoing:
+            return self._graph._edge_row(self._i, j)
+        return self._graph._edge_row(j, self._i)
+
+    def __getitem__(self, node):
+        row = self._row(node)
+        if row is None:
+            raise KeyError(node)
+        return self._graph._row_attrs(row)
+
+    def __contains__(self, node):
+        try:
+            return self._row(node) is not None
+        except TypeError:
+            return False
+
+    def __iter__(self):
+        ids = self._graph._ids
+        return (ids[j] for j in self._neighbor_rows())
+
+    def __len__(self):
+        return len(self._neighbor_rows())
+
+
+class _NodeAttrsView(Mapping):
+    """View of the attributes of the nodes."""
+
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, node):
+        return self._graph._node_attrs.items(self._graph._index[node])
+
+    def __contains__(self, node):
+        return node in self._graph.nodes()
+
+    def __iter__(self):
+        return iter(self._graph.nodes())
+
+    def __len__(self):
+        return len(self._graph._index)
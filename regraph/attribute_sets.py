@@ -7,13 +7,14 @@ Implements the following data structures:
 * `FiniteSet` -- wrapper for Python finite sets, inherits `AttributeSet`;
 * `RegexSet` -- a class for possibly infinite sets of strings given by
   regular expressions. It uses the `greenery <https://github.com/qntm/greenery>`_
-  library for finding inclusion and intersection of regular expressions,
-  its method `match` can be used to test if a given string is in
+  library for finding inclusion and intersection of regular expressions
+  (the automata of the patterns and the results of the inclusion tests
+  are cached process-wide, see `REGEX_CACHE_SIZE`), its method `match` can be used to test if a given string is in
   a set of strings defined by regular expressions;
 * `IntegerSet` -- a class for possibly infinite sets of integers
   defined by a set of disjoint intervals, inherits `AttributeSet`,
-  provides the method `contains` for testing if a given integer is in
-  the set of integers.
+  provides the methods `contains` and `contains_many` for testing if
+  given integers are in the set of integers.
 
 TODO:
 
@@ -28,8 +29,12 @@ import re
 import numpy as np
 import math
 import sys
+import warnings
+import weakref
 
-from greenery.lego import parse
+from functools import lru_cache
+
+from greenery.lego import parse, from_fsm
 
 from regraph.exceptions import AttributeSetError
 
@@ -50,6 +55,34 @@ def _hashify(d):
     return tuple(result)
 
 
+# Maximum number of regex automata kept in the cache
+REGEX_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def _regex_fsm(pattern):
+    """Parse a regex pattern and build its minimal automaton.
+
+    The automata are cached by pattern (they are never modified,
+    as all the operations on them produce new automata).
+    """
+    return parse(pattern).to_fsm().reduce()
+
+
+@lru_cache(maxsize=4 * REGEX_CACHE_SIZE)
+def _regex_issubset(pattern, other_pattern):
+    """Test inclusion of the languages of two regex patterns (memoized)."""
+    if pattern == other_pattern:
+        return True
+    return _regex_fsm(pattern).issubset(_regex_fsm(other_pattern))
+
+
+def clear_regex_cache():
+    """Clear the caches of regex automata and inclusion tests."""
+    _regex_fsm.cache_clear()
+    _regex_issubset.cache_clear()
+
+
 def _regex_to_string(a):
     if isinstance(a, str):
         return a
@@ -149,34 +182,80 @@ class AttributeSet(object):
 class FiniteSet(AttributeSet):
     """Wrapper for finite sets as attribute sets.
 
+    Finite sets are immutable and hash-consed: creating a finite set
+    with the same elements as an existing one returns the existing
+    object, so that identical attribute values are shared between
+    nodes and edges (and their copies).
+
     Attributes
     ----------
-    fset : set
+    fset : frozenset
         Python finite set that is being wrapped by the object
 
     """
 
-    def __init__(self, fset=None):
-        """Initialize finite set object."""
+    # Existing finite sets indexed by their elements
+    _instances = weakref.WeakValueDictionary()
+
+    def __new__(cls, fset=None):
+        """Find or create a finite set object."""
+        if isinstance(fset, FiniteSet):
+            return fset
         if fset is None or fset == {None}:
-            self.fset = set()
+            elements = frozenset()
+        elif type(fset) == set or type(fset) == frozenset:
+            elements = frozenset(fset)
+        elif type(fset) == list:
+            elements = frozenset(fset)
+        elif type(fset) == dict:
+            elements = frozenset(_hashify(fset))
         else:
-            if type(fset) == set:
-                self.fset = copy.deepcopy(fset)
-            elif type(fset) == list:
-                self.fset = set(fset)
-            elif type(fset) == dict:
-                self.fset = set(_hashify(fset))
-            else:
-                self.fset = {fset}
+            elements = frozenset([fset])
+        # Types of the elements distinguish equal values of
+        # different types (for example, `1` and `True`, or the
+        # sets `{1.0, 2}` and `{1, 2.0}`)
+        key = frozenset((el, type(el)) for el in elements)
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = super().__new__(cls)
+            instance.fset = elements
+            instance._hash = hash(elements)
+            cls._instances[key] = instance
+        return instance
+
+    def __init__(self, fset=None):
+        """Initialize finite set object (see `FiniteSet.__new__`)."""
+        pass
+
+    def __reduce__(self):
+        """Reduce a finite set for pickling (unpickled sets are interned)."""
+        return (type(self), (set(self.fset),))
+
+    def __copy__(self):
+        """Copy finite set (immutable objects are not copied)."""
+        return self
+
+    def __deepcopy__(self, memo):
+        """Deep copy finite set (immutable objects are not copied)."""
+        return self
+
+    def __hash__(self):
+        """Hash of finite set."""
+        return self._hash
+
+    def __eq__(self, other):
+        """Test equality with another set."""
+        if isinstance(other, FiniteSet):
+            return self is other or self.fset == other.fset
+        return super().__eq__(other)
 
     def __str__(self):
         """String represenation of FiniteSet."""
-        return str(self.fset)
+        return str(set(self.fset))
 
     def __repr__(self):
         """Repr represenation of FiniteSet."""
-        return str(self.fset)
+        return str(set(self.fset))
 
     def __iter__(self):
         """Iterator over FiniteSet."""
@@ -203,11 +282,11 @@ class FiniteSet(AttributeSet):
         elif isinstance(other, FiniteSet):
             return self.fset.issubset(other.fset)
         elif isinstance(other, RegexSet):
-            for element in self.fset:
-                if element is not None:
-                    if not other.match(str(element)):
-                        return False
+            return other.match_many(
+                str(element) for element in self.fset
+                if element is not None)
         elif isinstance(other, IntegerSet):
+            elements = []
             for element in self.fset:
                 if element is not None:
                     if type(element) != int:
@@ -219,8 +298,8 @@ class FiniteSet(AttributeSet):
                                 "integer (%s)" %
                                 (str(element), str(type(element)))
                             )
-                    if not other.contains(element):
-                        return False
+                    elements.append(element)
+            return bool(np.all(other.contains_many(elements)))
         elif isinstance(other, EmptySet):
             return False
         elif isinstance(other, UniversalSet):
@@ -372,13 +451,35 @@ class FiniteSet(AttributeSet):
         json_data["data"] = list(self.fset)
         return json_data
 
-    def update(self, element):
-        """Update finite set."""
-        self.fset.update(element)
+    def update(self, elements):
+        """Get the finite set extended with the elements.
+
+        Finite sets are immutable, the set is not modified in-place
+        (deprecated, use `union`).
+
+        Returns
+        -------
+        FiniteSet
+        """
+        warnings.warn(
+            "Finite sets are immutable, `update` returns a new set "
+            "(use `union` instead)", DeprecationWarning, stacklevel=2)
+        return FiniteSet(self.fset.union(elements))
 
     def add(self, element):
-        """Add an element."""
-        self.fset.add(element)
+        """Get the finite set extended with the element.
+
+        Finite sets are immutable, the set is not modified in-place
+        (deprecated, use `union`).
+
+        Returns
+        -------
+        FiniteSet
+        """
+        warnings.warn(
+            "Finite sets are immutable, `add` returns a new set "
+            "(use `union` instead)", DeprecationWarning, stacklevel=2)
+        return FiniteSet(self.fset.union([element]))
 
 
 class RegexSet(AttributeSet):
@@ -392,6 +493,8 @@ class RegexSet(AttributeSet):
     ----------
     pattern : str
         Regular expression pattern
+    _regex : re.Pattern
+        Compiled pattern (compiled on the first test of membership)
     """
 
     def __init__(self, regexp):
@@ -413,6 +516,7 @@ class RegexSet(AttributeSet):
                 self.pattern = regexp
         else:
             self.pattern = None
+        self._regex = None
 
     def __str__(self):
         """String representation of RegexSet obj."""
@@ -446,23 +550,21 @@ class RegexSet(AttributeSet):
         if self.pattern is None:
             return True
         else:
-            self_exp = parse(self.pattern)
-
             def included(a):
                 if isinstance(a, str):
-                    other_exp = parse(a)
+                    other_pattern = a
                 elif isinstance(a, re._pattern_type):
-                    other_exp = parse(a.pattern)
+                    other_pattern = a.pattern
                 elif isinstance(a, RegexSet):
                     if a.pattern:
-                        other_exp = parse(a.pattern)
+                        other_pattern = a.pattern
                     else:
                         return False
                 else:
                     raise AttributeSetError(
                         "Regexp object should be of type `str` or `re._pattern_type`!"
                     )
-                return (self_exp & other_exp.everythingbut()).empty()
+                return _regex_issubset(self.pattern, other_pattern)
 
             if isinstance(other, set):
                 res = True
@@ -587,15 +689,13 @@ class RegexSet(AttributeSet):
                 else:
                     return other_obj
 
-        self_exp = parse(self.pattern)
-
-        other_exp = []
+        other_patterns = []
         if isinstance(other, set):
             for exp in other:
                 exp_str = _regex_to_string(exp)
                 if exp_str is None:
                     return RegexSet.empty()
-                other_exp.append(parse(exp_str))
+                other_patterns.append(exp_str)
         elif isinstance(other, UniversalSet):
             return copy.deepcopy(self)
         elif isinstance(other, EmptySet):
@@ -604,13 +704,16 @@ class RegexSet(AttributeSet):
             other_str = _regex_to_string(other)
             if other_str is None:
                 return RegexSet.empty()
-            other_exp.append(parse(other_str))
+            other_patterns.append(other_str)
 
-        intersect_exp = self_exp
-        for exp in other_exp:
-            intersect_exp = intersect_exp.intersection(exp)
+        if len(other_patterns) == 0:
+            return RegexSet(str(parse(self.pattern)))
 
-        return RegexSet(str(intersect_exp))
+        intersect_fsm = _regex_fsm(self.pattern)
+        for pattern in other_patterns:
+            intersect_fsm = intersect_fsm & _regex_fsm(pattern)
+
+        return RegexSet(str(from_fsm(intersect_fsm)))
 
     def difference(self, other):
         """Find the difference of two regexps.
@@ -643,24 +746,28 @@ class RegexSet(AttributeSet):
         if self.pattern is None:
             return RegexSet.empty()
 
-        other_exp = []
+        other_patterns = []
 
         if isinstance(other, set):
             for exp in other:
                 exp_str = _regex_to_string(exp)
                 if exp_str is not None:
-                    other_exp.append(parse(exp_str))
+                    other_patterns.append(exp_str)
         else:
             other_str = _regex_to_string(other)
             if other_str is not None:
-                other_exp.append(parse(other_str))
+                other_patterns.append(other_str)
             else:
                 return self.copy()
-        complement_exp = parse(self.pattern)
-        for exp in other_exp:
-            complement_exp = complement_exp.difference(exp)
 
-        return RegexSet(str(complement_exp.reduce()))
+        if len(other_patterns) == 0:
+            return RegexSet(str(parse(self.pattern).reduce()))
+
+        complement_fsm = _regex_fsm(self.pattern)
+        for pattern in other_patterns:
+            complement_fsm = complement_fsm - _regex_fsm(pattern)
+
+        return RegexSet(str(from_fsm(complement_fsm).reduce()))
 
     @classmethod
     def from_finite_set(cls, fset):
@@ -690,13 +797,44 @@ class RegexSet(AttributeSet):
         """Test if an object is an empty RegexSet."""
         return self.pattern is None
 
+    def _compiled(self):
+        """Get the compiled pattern (compile it, if necessary)."""
+        regex = getattr(self, "_regex", None)
+        if regex is None or regex.pattern != self.pattern:
+            regex = re.compile(self.pattern)
+            self._regex = regex
+        return regex
+
     def match(self, string):
         """Check if a string is in RegexSet."""
         if self.pattern is not None:
-            return re.compile(self.pattern).fullmatch(string) is not None
+            return self._compiled().fullmatch(string) is not None
         else:
             return False
 
+    def match_many(self, strings):
+        """Check if all the strings from a collection are in RegexSet.
+
+        Parameters
+        ----------
+        strings : iterable
+            Collection of strings to test
+
+        Returns
+        -------
+        `True` if every string is matched by the pattern (the whole
+        string has to be matched), `False` otherwise
+        """
+        if self.pattern is None:
+            for _ in strings:
+                return False
+            return True
+        fullmatch = self._compiled().fullmatch
+        for string in strings:
+            if fullmatch(string) is None:
+                return False
+        return True
+
     def to_json(self):
         """JSON represenation of RegexSet."""
         json_data = {}
@@ -705,13 +843,187 @@ class RegexSet(AttributeSet):
         return json_data
 
 
+# Bounds of int64 standing for the infinite ends of integer intervals
+_MINUS_INF = np.iinfo(np.int64).min
+_PLUS_INF = np.iinfo(np.int64).max
+
+
+def _to_number(value):
+    """Convert an end of an integer interval to Python int (or infinity)."""
+    if value == math.inf or value == -math.inf:
+        return float(value)
+    return int(value)
+
+
+def _to_bound(value):
+    """Convert an end of an integer interval to int64.
+
+    Integers out of the range of int64 are clamped to the infinite
+    ends (which preserves the membership tests in the sets whose
+    finite ends are in the range).
+    """
+    value = _to_number(value)
+    if value >= _PLUS_INF:
+        return _PLUS_INF
+    if value <= _MINUS_INF:
+        return _MINUS_INF
+    return value
+
+
+def _from_bound(value):
+    """Convert an end of an integer interval to Python number."""
+    if isinstance(value, np.integer):
+        if value == _PLUS_INF:
+            return math.inf
+        if value == _MINUS_INF:
+            return -math.inf
+    elif isinstance(value, float):
+        return value
+    return int(value)
+
+
+def _bounds_array(values):
+    """Create an array of ends of integer intervals.
+
+    Ends are stored as int64, unless some finite ends are out of the
+    range of int64, in which case they are stored as Python numbers
+    (in an array of objects, where `-math.inf` and `math.inf` stand
+    for the infinite ends).
+    """
+    values = [_to_number(v) for v in values]
+    if all(isinstance(v, float) or _MINUS_INF < v < _PLUS_INF
+           for v in values):
+        return np.array([_to_bound(v) for v in values], dtype=np.int64)
+    return np.array(values, dtype=object)
+
+
+def _as_objects(values):
+    """Convert an array of ends of integer intervals to Python numbers."""
+    if values.dtype == object:
+        return values
+    return np.array([_from_bound(v) for v in values], dtype=object)
+
+
+def _common_bounds(*arrays):
+    """Convert arrays of ends of integer intervals to the same type."""
+    if any(a.dtype == object for a in arrays):
+        return [_as_objects(a) for a in arrays]
+    return arrays
+
+
+def _query_array(values, dtype):
+    """Create an array of integers to search in the arrays of ends."""
+    if dtype == object:
+        return np.array([_to_number(v) for v in values], dtype=object)
+    return np.array([_to_bound(v) for v in values], dtype=np.int64)
+
+
+def _normalize_intervals(starts, ends):
+    """Sort and merge overlapping or adjacent intervals.
+
+    Parameters
+    ----------
+    starts : np.ndarray
+        Array of starts of intervals (int64)
+    ends : np.ndarray
+        Array of ends of intervals (int64)
+
+    Returns
+    -------
+    (starts, ends) : tuple of np.ndarray
+        Starts and ends of sorted disjoint non-adjacent intervals
+    """
+    if len(starts) == 0:
+        return starts, ends
+    # Stable sort merges already sorted runs in linear time
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    ends = ends[order]
+    reach = np.maximum.accumulate(ends)
+    # An interval starts a new group if it neither overlaps nor
+    # is adjacent to the preceding intervals (`starts - 1` does
+    # not overflow where the first condition holds)
+    new_group = np.empty(len(starts), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = (starts[1:] > reach[:-1]) &\
+        (starts[1:] - 1 != reach[:-1])
+    first = np.flatnonzero(new_group)
+    last = np.append(first[1:] - 1, len(starts) - 1)
+    return starts[first], reach[last]
+
+
+def _intersect_intervals(starts1, ends1, starts2, ends2):
+    """Intersect two sorted lists of disjoint intervals."""
+    if len(starts1) == 0 or len(starts2) == 0:
+        return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    starts1, ends1, starts2, ends2 = _common_bounds(
+        starts1, ends1, starts2, ends2)
+    # Range of intervals of the second list overlapping with
+    # every interval of the first list
+    lower = np.searchsorted(ends2, starts1, side="left")
+    upper = np.searchsorted(starts2, ends1, side="right")
+    counts = np.maximum(upper - lower, 0)
+    indices1 = np.repeat(np.arange(len(starts1)), counts)
+    offsets = np.arange(counts.sum()) -\
+        np.repeat(np.cumsum(counts) - counts, counts)
+    indices2 = np.repeat(lower, counts) + offsets
+    return (
+        np.maximum(starts1[indices1], starts2[indices2]),
+        np.minimum(ends1[indices1], ends2[indices2])
+    )
+
+
+def _complement_intervals(starts, ends):
+    """Find the complement of a sorted list of disjoint intervals."""
+    if len(starts) == 0:
+        return (
+            np.array([_MINUS_INF], dtype=np.int64),
+            np.array([_PLUS_INF], dtype=np.int64))
+    if starts.dtype == object:
+        minus_inf, plus_inf = -math.inf, math.inf
+    else:
+        minus_inf, plus_inf = _MINUS_INF, _PLUS_INF
+    new_starts = [ends[:-1] + 1]
+    new_ends = [starts[1:] - 1]
+    if starts[0] > minus_inf:
+        new_starts.insert(0, np.array([minus_inf], dtype=starts.dtype))
+        new_ends.insert(0, starts[:1] - 1)
+    if ends[-1] < plus_inf:
+        new_starts.append(ends[-1:] + 1)
+        new_ends.append(np.array([plus_inf], dtype=starts.dtype))
+    return np.concatenate(new_starts), np.concatenate(new_ends)
+
+
+def _integer_elements(elements):
+    """Convert elements of a finite set to integers."""
+    int_elements = []
+    for element in elements:
+        try:
+            int_elements.append(int(element))
+        except:
+            raise AttributeSetError(
+                "Set '{}' contains non-integer element '{}'".format(
+                    str(elements), element))
+    return int_elements
+
+
 class IntegerSet(AttributeSet):
     """Set of integers defined by a list of disjoint intervals.
 
+    The intervals are stored as two sorted arrays of their starts and
+    ends (of the type `numpy.int64`, where the minimal and the maximal
+    values stand for the infinities), all the set operations are
+    performed by merging the sorted arrays. Sets with finite ends out
+    of the range of int64 store their ends as Python numbers (arrays
+    of objects, where `-math.inf` and `math.inf` stand for the
+    infinities).
+
     Attributes
     ----------
-    intervals : list
-        List of sorted intervals defining an integer set.
+    _starts : np.ndarray
+        Sorted array of starts of the disjoint intervals
+    _ends : np.ndarray
+        Array of ends of the disjoint intervals
     """
 
     def __init__(self, interval_list):
@@ -726,58 +1038,42 @@ class IntegerSet(AttributeSet):
         for interval in interval_list:
             try:
                 start, end = interval
-                if start > end:
-                    raise AttributeSetError(
-                        "Invalid integer interval: [%s, %s]" %
-                        (str(start), str(end))
-                    )
-                else:
-                    try:
-                        start = int(start)
-                    except OverflowError:
-                        pass
-                    starts.append(start)
-                    try:
-                        end = int(end)
-                    except OverflowError:
-                        pass
-                    ends.append(end)
             except (TypeError, ValueError):
-                try:
-                    interval = int(interval)
-                except OverflowError:
-                    pass
-                starts.append(interval)
-                ends.append(interval)
-
-        new_intervals = list()
-        sorted_starts_ind = np.argsort(starts)
-        visited = set()
-        for i, index in enumerate(sorted_starts_ind):
-            if index not in visited:
-                visited.add(index)
-                current_end = ends[index]
-                for j in range(i + 1, len(sorted_starts_ind)):
-                    if starts[sorted_starts_ind[j]] - 1 > ends[index]:
-                        break
-                    else:
-                        visited.add(sorted_starts_ind[j])
-                        current_end = max(
-                            current_end, ends[sorted_starts_ind[j]]
-                        )
-                # in case new interval overlaps
-                # with newly constructed interval
-                if len(new_intervals) > 0 and\
-                   starts[index] <= new_intervals[-1][1] + 1:
-                    new_intervals[-1] = (
-                        new_intervals[-1][0],
-                        max(current_end, new_intervals[-1][1])
-                    )
-                else:
-                    new_intervals.append((starts[index], current_end))
-        self.intervals = new_intervals
+                start, end = interval, interval
+            if start > end:
+                raise AttributeSetError(
+                    "Invalid integer interval: [%s, %s]" %
+                    (str(start), str(end))
+                )
+            starts.append(start)
+            ends.append(end)
+        bounds = _bounds_array(starts + ends)
+        self._starts, self._ends = _normalize_intervals(
+            bounds[:len(starts)], bounds[len(starts):])
         return
 
+    @classmethod
+    def _from_arrays(cls, starts, ends):
+        """Create an integer set from normalized arrays of intervals."""
+        integer_set = cls.__new__(cls)
+        integer_set._starts = starts
+        integer_set._ends = ends
+        return integer_set
+
+    @classmethod
+    def _from_elements(cls, elements):
+        """Create an integer set from a collection of integers."""
+        values = np.unique(_bounds_array(elements))
+        return cls._from_arrays(*_normalize_intervals(values, values))
+
+    @property
+    def intervals(self):
+        """List of sorted intervals defining the integer set."""
+        return [
+            (_from_bound(start), _from_bound(end))
+            for start, end in zip(self._starts, self._ends)
+        ]
+
     def __str__(self):
         """String representation of IntegerSet obj."""
         interval_strs = []
@@ -798,47 +1094,42 @@ class IntegerSet(AttributeSet):
 
     def issubset(self, other):
         """Test set inclusion for intervals of ints."""
-        for start, end in self.intervals:
-            found = False
-            for other_start, other_end in other.intervals:
-                if start >= other_start and end <= other_end:
-                    found = True
-                    break
-            if not found:
-                return False
-        return True
+        if isinstance(other, UniversalSet):
+            return True
+        elif isinstance(other, EmptySet):
+            return self.is_empty()
+        elif not isinstance(other, IntegerSet):
+            raise AttributeSetError(
+                "Cannot test inclusion of an integer set in '%s'!" %
+                str(other))
+        if len(self._starts) == 0:
+            return True
+        if len(other._starts) == 0:
+            return False
+        starts, ends, other_starts, other_ends = _common_bounds(
+            self._starts, self._ends, other._starts, other._ends)
+        # Every interval has to be included in the last interval of
+        # the other set starting before it
+        indices = np.searchsorted(
+            other_starts, starts, side="right") - 1
+        if indices[0] < 0:
+            return False
+        return bool(np.all(other_ends[indices] >= ends))
 
     def union(self, other):
         """Union of two integer sets."""
         if isinstance(other, IntegerSet):
-            return IntegerSet(self.intervals + other.intervals)
-
+            starts, ends, other_starts, other_ends = _common_bounds(
+                self._starts, self._ends, other._starts, other._ends)
+            return IntegerSet._from_arrays(*_normalize_intervals(
+                np.concatenate([starts, other_starts]),
+                np.concatenate([ends, other_ends])))
         elif isinstance(other, set):
-            other_intervals = []
-            for element in other:
-                try:
-                    int_element = int(element)
-                except:
-                    raise AttributeSetError(
-                        "Set '{}' contains non-integer element '{}'".format(
-                            str(other), element))
-                if not self.contains(int_element):
-                    other_intervals.append((int_element, int_element))
-            return IntegerSet(self.intervals + other_intervals)
-
+            return self.union(IntegerSet._from_elements(
+                _integer_elements(other)))
         elif isinstance(other, FiniteSet):
-            other_intervals = []
-            for element in other.fset:
-                try:
-                    int_element = int(element)
-                except:
-                    raise AttributeSetError(
-                        "Set '{}' contains non-integer element '{}'".format(
-                            str(other), element))
-                if not self.contains(int_element):
-                    other_intervals.append((int_element, int_element))
-            return IntegerSet(self.intervals + other_intervals)
-
+            return self.union(IntegerSet._from_elements(
+                _integer_elements(other.fset)))
         elif isinstance(other, UniversalSet):
             return UniversalSet()
         elif isinstance(other, EmptySet):
@@ -850,45 +1141,19 @@ class IntegerSet(AttributeSet):
 
     def intersection(self, other):
         """Intersection of two integer sets."""
-        def interval_intersect(interval1, interval2):
-            start1, end1 = interval1
-            start2, end2 = interval2
-            common_start = max(start1, start2)
-            common_end = min(end1, end2)
-            if common_start <= common_end:
-                return (common_start, common_end)
-            return None
-
-        new_intervals = []
         if isinstance(other, IntegerSet):
-            for interval1 in self.intervals:
-                for interval2 in other.intervals:
-                    common = interval_intersect(interval1, interval2)
-                    if common:
-                        new_intervals.append(common)
-            return IntegerSet(new_intervals)
-        elif isinstance(other, set):
-            try:
-                for element in other:
-                    int_element = int(element)
-                    if self.contains(int_element):
-                        new_intervals.append((int_element, int_element))
-                return IntegerSet(new_intervals)
-            except:
-                raise AttributeSetError(
-                    "Set '%s' contains non-integer elements!" % str(other)
-                )
-        elif isinstance(other, FiniteSet):
-            try:
-                for element in other.fset:
-                    int_element = int(element)
-                    if self.contains(int_element):
-                        new_intervals.append((int_element, int_element))
-                return IntegerSet(new_intervals)
-            except:
-                raise AttributeSetError(
-                    "Set '%s' contains non-integer elements!" % str(other)
-                )
+            return IntegerSet._from_arrays(*_intersect_intervals(
+                self._starts, self._ends, other._starts, other._ends))
+        elif isinstance(other, set) or isinstance(other, FiniteSet):
+            if isinstance(other, FiniteSet):
+                elements = _integer_elements(other.fset)
+            else:
+                elements = _integer_elements(other)
+            elements = [
+                el for el, found in zip(elements, self.contains_many(elements))
+                if found
+            ]
+            return IntegerSet._from_elements(elements)
         elif isinstance(other, UniversalSet):
             return copy.deepcopy(self)
         elif isinstance(other, EmptySet):
@@ -900,45 +1165,22 @@ class IntegerSet(AttributeSet):
 
     def difference(self, other):
         """Difference of self with the other."""
-        def is_subinterval(a, b):
-            start_a, end_a = a
-            start_b, end_b = b
-            if start_a >= start_b and end_a <= end_b:
-                return True
-            return False
-
-        def create_cuts(small, large):
-            small_start, small_end = small
-            large_start, large_end = large
-            cuts = []
-            if small_start > large_start:
-                cuts.append((large_start, small_start - 1))
-            if small_end < large_end:
-                cuts.append((small_end + 1, large_end))
-            return cuts
-
-        new_intervals = []
-        intersect = self.intersection(other)
-        for interval1 in self.intervals:
-            cuts = [interval1]
-            for interval2 in intersect.intervals:
-                for i, cut in enumerate(cuts):
-                    if is_subinterval(interval2, cut):
-                        new_cuts = create_cuts(interval2, cut)
-                        cuts[i] = new_cuts
-                new_cuts = []
-                for subcuts in cuts:
-                    if isinstance(subcuts, list):
-                        for cut in subcuts:
-                            new_cuts.append(cut)
-                    else:
-                        new_cuts.append(subcuts)
-                cuts = new_cuts
-            if len(cuts) == 0:
-                new_intervals.append(interval1)
-            else:
-                new_intervals += cuts
-        return IntegerSet(new_intervals)
+        if isinstance(other, EmptySet):
+            return copy.deepcopy(self)
+        elif isinstance(other, UniversalSet):
+            return IntegerSet.empty()
+        elif isinstance(other, set):
+            other = IntegerSet._from_elements(_integer_elements(other))
+        elif isinstance(other, FiniteSet):
+            other = IntegerSet._from_elements(_integer_elements(other.fset))
+        elif not isinstance(other, IntegerSet):
+            raise AttributeSetError(
+                "Cannot subtract '%s' from an integer set!" % str(other)
+            )
+        complement_starts, complement_ends = _complement_intervals(
+            other._starts, other._ends)
+        return IntegerSet._from_arrays(*_intersect_intervals(
+            self._starts, self._ends, complement_starts, complement_ends))
 
     @classmethod
     def universal(cls):
@@ -952,11 +1194,13 @@ class IntegerSet(AttributeSet):
 
     def is_universal(self):
         """Test universality."""
-        return self == IntegerSet.universal()
+        return len(self._starts) == 1 and\
+            _from_bound(self._starts[0]) == -math.inf and\
+            _from_bound(self._ends[0]) == math.inf
 
     def is_empty(self):
         """Test if empty."""
-        return (len(self.intervals) == 0) or (self == IntegerSet.empty())
+        return len(self._starts) == 0
 
     @classmethod
     def from_finite_set(cls, s):
@@ -972,12 +1216,32 @@ class IntegerSet(AttributeSet):
 
     def contains(self, num):
         """Test if provided integer is in integer set."""
-        found = False
-        for start, end in self.intervals:
-            if num >= start and num <= end:
-                found = True
-                break
-        return found
+        if len(self._starts) == 0:
+            return False
+        value = _query_array([num], self._starts.dtype)[0]
+        index = np.searchsorted(self._starts, value, side="right") - 1
+        return bool(index >= 0 and self._ends[index] >= value)
+
+    def contains_many(self, nums):
+        """Test if provided integers are in integer set.
+
+        Parameters
+        ----------
+        nums : iterable
+            Collection of integers
+
+        Returns
+        -------
+        found : np.ndarray
+            Boolean array whose elements indicate if the respective
+            integers are in the set
+        """
+        values = _query_array(list(nums), self._starts.dtype)
+        if len(self._starts) == 0:
+            return np.zeros(len(values), dtype=bool)
+        indices = np.searchsorted(self._starts, values, side="right") - 1
+        return (indices >= 0) &\
+            (self._ends[np.maximum(indices, 0)] >= values)
 
     def to_json(self):
         """JSON represenation of IntegerSet."""
@@ -993,7 +1257,7 @@ class IntegerSet(AttributeSet):
                 new_end = "inf"
             else:
                 new_end = end
-        json_data["data"].append([new_start, new_end])
+            json_data["data"].append([new_start, new_end])
 
         return json_data
 
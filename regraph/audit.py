@@ -1,12 +1,17 @@
 """Collection of utils for audit trails."""
 from abc import ABC, abstractmethod
 
+import copy
 import datetime
+import json
 import uuid
 import warnings
 
+from collections import OrderedDict
+
 import networkx as nx
 
+from regraph.commit_log import CommitLog
 from regraph.exceptions import RevisionError, RevisionWarning
 from regraph.rules import (compose_rules, Rule,
                            _create_merging_rule,
@@ -15,11 +20,20 @@ from regraph.rules import (compose_rules, Rule,
                            invert_rule_hierarchy)
 from regraph.primitives import (relabel_nodes,
                                 graph_to_json,
-                                networkx_from_json)
+                                networkx_from_json,
+                                copy_graph,
+                                add_nodes_from,
+                                add_edges_from,
+                                remove_node)
 from regraph.utils import keys_by_value
 from regraph.networkx.hierarchy import NetworkXHierarchy
 
 
+# Maximum number of memoized compositions of deltas along the
+# paths of the revision graph (per versioned object)
+DELTA_CACHE_SIZE = 128
+
+
 def _generate_new_commit_meta_data():
     time = datetime.datetime.now()
     commit_id = str(uuid.uuid4())
@@ -34,9 +48,37 @@ class Versioning(ABC):
     _current_branch
         Name of the current branch
     _deltas : dict
-        Dictionary with delta's to all other branches
+        Cache of the deltas from the current state to the heads of
+        the other branches (deltas are computed from the revision
+        graph on demand, the cache is cleared when the current
+        state changes)
     _heads : dict
     _revision_graph : networkx.DiGraph
+    _snapshots : dict
+        Dictionary whose keys are commits and whose values are
+        snapshots of the versioned object at these commits
+    _snapshot_interval : int
+        Number of commits after which a snapshot is taken
+    _snapshot_size : int
+        Size (in KB of JSON) of the deltas committed after which
+        a snapshot is taken
+    _since_snapshot : dict
+        Dictionary whose keys are branches and whose values are
+        pairs (number of commits, size of deltas in bytes) since
+        the last snapshot of the branch
+    _commit_log : regraph.commit_log.CommitLog
+        Log to which the commits are appended (None if the
+        history is not persisted)
+    _squashed : dict
+        Dictionary whose keys are squashed commits and whose values
+        are the commits they were squashed into
+    _compaction_threshold : int
+        Number of squashable commits in the linear chain ending at
+        the head after which the chain is squashed
+    _delta_cache : collections.OrderedDict
+        Bounded (LRU) cache of the compositions of deltas, keys are
+        pairs (from_commit, to_commit) of the ends of the composed
+        paths (see `DELTA_CACHE_SIZE` and `delta_cache_info`)
 
     Methods
     -------
@@ -46,6 +88,11 @@ class Versioning(ABC):
     branch(new_branch)
     switch_branch(branch)
     merge(branch1, branch2)
+    snapshot()
+    save_log(path)
+    squash(from_commit, to_commit)
+    compact()
+    delta_cache_info()
 
     _compose_deltas
     _invert_delta
@@ -55,8 +102,25 @@ class Versioning(ABC):
     """
 
     def __init__(self, init_branch="master", current_branch=None,
-                 deltas=None, heads=None, revision_graph=None):
-        """Initialize revision object."""
+                 deltas=None, heads=None, revision_graph=None,
+                 snapshot_interval=None, snapshot_size=None,
+                 compaction_threshold=None):
+        """Initialize revision object.
+
+        Parameters
+        ----------
+        snapshot_interval : int, optional
+            Take a snapshot of the versioned object every
+            `snapshot_interval` commits of a branch
+        snapshot_size : int, optional
+            Take a snapshot of the versioned object every time the
+            deltas committed to a branch since the last snapshot
+            exceed `snapshot_size` KB (of JSON)
+        compaction_threshold : int, optional
+            Squash the linear chain of commits ending at the head
+            of a branch every time it contains `compaction_threshold`
+            squashable commits (see `set_compaction_policy`)
+        """
         if current_branch is None:
             self._current_branch = init_branch
         else:
@@ -83,6 +147,15 @@ class Versioning(ABC):
             self._heads = heads
             self._revision_graph = revision_graph
 
+        self._snapshots = dict()
+        self._since_snapshot = dict()
+        self.set_snapshot_policy(snapshot_interval, snapshot_size)
+        self._commit_log = None
+        self._squashed = dict()
+        self.set_compaction_policy(compaction_threshold)
+        self._delta_cache = OrderedDict()
+        self._delta_cache_stats = {"hits": 0, "misses": 0}
+
     @abstractmethod
     def _compose_deltas(self, delta1, delta2):
         """Abstract method for composing deltas."""
@@ -105,20 +178,490 @@ class Versioning(ABC):
         """Abstract method for creating an identity-delta."""
         pass
 
-    def _compose_delta_path(self, path):
-        if len(path) > 1:
-            result_delta = self._revision_graph.adj[
-                path[0]][path[1]]["delta"]
-            previous_commit = path[1]
-            for current_commit in path[2:]:
-                result_delta = self._compose_deltas(
-                    result_delta,
-                    self._revision_graph.adj[
-                        previous_commit][current_commit]["delta"])
-                previous_commit = current_commit
-            return result_delta
+    @abstractmethod
+    def _take_snapshot(self):
+        """Abstract method for copying the versioned object.
+
+        Returns None if the versioned object cannot be copied.
+        """
+        pass
+
+    @abstractmethod
+    def _restore_snapshot(self, snapshot):
+        """Abstract method for restoring the versioned object."""
+        pass
+
+    def set_snapshot_policy(self, interval=None, size=None):
+        """Set when the snapshots of the versioned object are taken.
+
+        Snapshots are full copies of the versioned object stored at
+        some commits, `rollback` restores the nearest snapshot and
+        replays the deltas from it when this is shorter than
+        composing the deltas from the head of the branch. Snapshots
+        are kept in memory only (they are not serialized by
+        `to_json`).
+
+        Parameters
+        ----------
+        interval : int, optional
+            Take a snapshot every `interval` commits of a branch
+        size : int, optional
+            Take a snapshot every time the deltas committed to a
+            branch since the last snapshot exceed `size` KB (of JSON)
+        """
+        self._snapshot_interval = interval
+        self._snapshot_size = size
+
+    def snapshot(self):
+        """Take a snapshot of the versioned object at the current head."""
+        snapshot = self._take_snapshot()
+        if snapshot is not None:
+            self._snapshots[self._heads[self._current_branch]] = snapshot
+        self._since_snapshot[self._current_branch] = (0, 0)
+
+    def _update_snapshots(self, delta):
+        """Take a snapshot after a commit if required by the policy."""
+        if self._snapshot_interval is None and self._snapshot_size is None:
+            return
+        commits, size = self._since_snapshot.get(
+            self._current_branch, (0, 0))
+        commits += 1
+        if self._snapshot_size is not None:
+            size += len(json.dumps(self._delta_to_json(delta), default=str))
+        if (self._snapshot_interval is not None and
+                commits >= self._snapshot_interval) or\
+           (self._snapshot_size is not None and
+                size >= self._snapshot_size * 1024):
+            self.snapshot()
         else:
+            self._since_snapshot[self._current_branch] = (commits, size)
+
+    def _nearest_snapshot_path(self, commit, max_length):
+        """Find the shortest path from a snapshot to the commit.
+
+        Returns None if there is no such path of length at most
+        `max_length`.
+        """
+        if len(self._snapshots) == 0:
+            return None
+        visited = {commit: None}
+        layer = [commit]
+        for _ in range(max_length + 1):
+            next_layer = []
+            for c in layer:
+                if c in self._snapshots:
+                    path = [c]
+                    while visited[path[-1]] is not None:
+                        path.append(visited[path[-1]])
+                    return path
+                for p in self._revision_graph.predecessors(c):
+                    if p not in visited:
+                        visited[p] = c
+                        next_layer.append(p)
+            layer = next_layer
+        return None
+
+    def _replay_from_snapshot(self, commit, max_length):
+        """Restore the versioned object at the commit from a snapshot.
+
+        Returns True if the object was restored (from a snapshot
+        followed by at most `max_length` deltas), False otherwise.
+        """
+        path = self._nearest_snapshot_path(commit, max_length)
+        if path is None:
+            return False
+        self._restore_snapshot(self._snapshots[path[0]])
+        for s, t in zip(path[:-1], path[1:]):
+            self._apply_delta(self._edge_delta(s, t))
+        return True
+
+    def _edge_delta(self, source, target):
+        """Get the delta of an edge of the revision graph.
+
+        Deltas of the histories opened from a commit log are read
+        from the log when they are accessed for the first time.
+        """
+        edge = self._revision_graph.adj[source][target]
+        if "delta" not in edge:
+            edge["delta"] = self._delta_from_json(
+                self._commit_log.read_delta(edge["offset"], edge["length"]))
+        return edge["delta"]
+
+    def _add_revision_commit(self, commit_id, branch, time, message):
+        """Add a commit to the revision graph (and to the log)."""
+        self._revision_graph.add_node(
+            commit_id, branch=branch, time=time, message=message)
+        if self._commit_log is not None:
+            self._commit_log.append_commit(commit_id, branch, time, message)
+
+    def _add_revision_edge(self, source, target, delta):
+        """Add an edge to the revision graph (and to the log)."""
+        self._revision_graph.add_edge(source, target, delta=delta)
+        if self._commit_log is not None:
+            offset, length = self._commit_log.append_delta(
+                source, target, self._delta_to_json(delta))
+            self._revision_graph.adj[source][target].update(
+                offset=offset, length=length)
+
+    def _log_heads(self):
+        """Append the state of the heads to the log."""
+        if self._commit_log is not None:
+            self._commit_log.append_heads(self._heads, self._current_branch)
+
+    def save_log(self, path, sync=True):
+        """Write the history to a new commit log and attach the log.
+
+        The following commits (as well as the changes of the heads)
+        are appended to the log.
+
+        Parameters
+        ----------
+        path : str
+            Path of the log (files `<path>.log` and `<path>.idx`
+            are created)
+        sync : bool, optional
+            Synchronize the files with the disk after every record
+
+        Raises
+        ------
+        RevisionError
+            If the log already exists.
+        """
+        self._commit_log = CommitLog.create(path, sync)
+        for n in nx.topological_sort(self._revision_graph):
+            attrs = self._revision_graph.node[n]
+            self._commit_log.append_commit(
+                n, attrs["branch"], attrs["time"], attrs["message"])
+            for p in self._revision_graph.predecessors(n):
+                offset, length = self._commit_log.append_delta(
+                    p, n, self._delta_to_json(self._edge_delta(p, n)))
+                self._revision_graph.adj[p][n].update(
+                    offset=offset, length=length)
+        for target in set(self._squashed.values()):
+            self._commit_log.append_squash(
+                keys_by_value(self._squashed, target), target)
+        self._log_heads()
+
+    def _load_log(self, path, sync=True):
+        """Load the history from a commit log (deltas are read lazily)."""
+        self._commit_log = CommitLog(path, sync)
+        self._revision_graph, self._heads, self._current_branch,\
+            self._squashed = self._commit_log.load_index()
+        self._mark_squashed()
+        self._deltas = dict()
+        self._delta_cache.clear()
+
+    def _branching_paths(self, commit1, commit2):
+        """Find paths to two commits from their nearest common ancestor.
+
+        The ancestors of the two commits are explored in alternation,
+        so only the commits up to the common ancestor (and their
+        predecessors) are visited.
+
+        Returns
+        -------
+        path1 : list
+            Path from the common ancestor to `commit1`
+        path2 : list
+            Path from the common ancestor to `commit2`
+        """
+        visited = [{commit1: None}, {commit2: None}]
+        layers = [[commit1], [commit2]]
+        common = commit1 if commit1 == commit2 else None
+        side = 0
+        while common is None:
+            if len(layers[0]) == 0 and len(layers[1]) == 0:
+                raise RevisionError(
+                    "Commits '{}' and '{}' have no common ancestor".format(
+                        commit1, commit2))
+            next_layer = []
+            for c in layers[side]:
+                for p in self._revision_graph.predecessors(c):
+                    if p not in visited[side]:
+                        visited[side][p] = c
+                        next_layer.append(p)
+                        if common is None and p in visited[1 - side]:
+                            common = p
+            layers[side] = next_layer
+            side = 1 - side
+
+        paths = []
+        for parents in visited:
+            path = [common]
+            while parents[path[-1]] is not None:
+                path.append(parents[path[-1]])
+            paths.append(path)
+        return paths[0], paths[1]
+
+    def _delta_between(self, path1, path2):
+        """Compose the delta from the end of `path1` to the end of `path2`.
+
+        Both paths start from the same commit.
+        """
+        delta = self._compose_deltas(
+            self._invert_delta(self._compose_delta_path(path1)),
+            self._compose_delta_path(path2))
+        # Compositions with identities return the deltas stored in
+        # the revision graph, which must not be refined in-place
+        delta = copy.deepcopy(delta)
+        self._refine_delta(delta)
+        return delta
+
+    def _branch_delta(self, branch):
+        """Get the delta from the current state to the head of a branch."""
+        if branch not in self._deltas:
+            path_to_current, path_to_branch = self._branching_paths(
+                self._heads[self._current_branch], self._heads[branch])
+            self._deltas[branch] = self._delta_between(
+                path_to_current, path_to_branch)
+        return self._deltas[branch]
+
+    def _compose_delta_path(self, path):
+        """Compose the deltas along a path of the revision graph.
+
+        Compositions are memoized by the ends of the path, the
+        composition along the longest memoized prefix of the path
+        is reused. The returned delta may be shared with the cache
+        (and with the revision graph) and must not be modified.
+        """
+        if len(path) < 2:
             return self._create_identity_delta()
+        if len(path) == 2:
+            return self._edge_delta(path[0], path[1])
+
+        cache = self._delta_cache
+        key = (path[0], path[-1])
+        if key in cache:
+            self._delta_cache_stats["hits"] += 1
+            cache.move_to_end(key)
+            return cache[key]
+        self._delta_cache_stats["misses"] += 1
+
+        start = 1
+        result_delta = self._edge_delta(path[0], path[1])
+        for i in range(len(path) - 2, 1, -1):
+            if (path[0], path[i]) in cache:
+                start = i
+                result_delta = cache[(path[0], path[i])]
+                cache.move_to_end((path[0], path[i]))
+                break
+        for previous_commit, current_commit in zip(
+                path[start:-1], path[start + 1:]):
+            result_delta = self._compose_deltas(
+                result_delta,
+                self._edge_delta(previous_commit, current_commit))
+
+        cache[key] = result_delta
+        if len(cache) > DELTA_CACHE_SIZE:
+            cache.popitem(last=False)
+        return result_delta
+
+    def _invalidate_delta_cache(self, commits):
+        """Remove the compositions of the paths ending at the commits."""
+        commits = set(commits)
+        for key in list(self._delta_cache.keys()):
+            if key[0] in commits or key[1] in commits:
+                del self._delta_cache[key]
+
+    def delta_cache_info(self):
+        """Get the statistics of the cache of composed deltas.
+
+        Returns
+        -------
+        info : dict
+            Dictionary with the number of hits and misses of the cache,
+            its current size and its maximum size
+        """
+        info = dict(self._delta_cache_stats)
+        info["size"] = len(self._delta_cache)
+        info["maxsize"] = DELTA_CACHE_SIZE
+        return info
+
+    def set_compaction_policy(self, threshold=None):
+        """Set when the history is compacted automatically.
+
+        After every commit, the linear chain of commits ending at the
+        new head is inspected (at most `threshold` + 1 commits are
+        visited) and, if it contains `threshold` squashable commits,
+        these commits are squashed (see `squash`). Therefore, every
+        commit costs O(`threshold`) steps of the traversal and,
+        once in `threshold` commits, O(`threshold`) compositions of
+        deltas. The commits produced by the squashes are kept by the
+        following compactions, so the history keeps one commit (and
+        one delta) out of `threshold` + 1 commits of a chain and the
+        paths of the revision graph become `threshold` + 1 times
+        shorter, while the states of the versioned object at the
+        kept commits remain recoverable.
+
+        Parameters
+        ----------
+        threshold : int, optional
+            Number of squashable commits after which a chain is
+            squashed (None disables the automatic compaction)
+        """
+        if threshold is not None and threshold < 1:
+            raise RevisionError(
+                "Compaction threshold should be a positive integer, "
+                "'{}' given".format(threshold))
+        self._compaction_threshold = threshold
+
+    def _resolve_commit(self, commit):
+        """Get the commit of the revision graph addressed by the id.
+
+        The ids of squashed commits address the commits into which
+        they were squashed.
+        """
+        return self._squashed.get(commit, commit)
+
+    def _squashable(self, commit):
+        """Test if the commit can be removed by squashing."""
+        return (
+            self._revision_graph.in_degree(commit) == 1 and
+            self._revision_graph.out_degree(commit) == 1 and
+            commit not in self._heads.values() and
+            commit not in self._snapshots
+        )
+
+    def _linear_chain(self, commit, max_length=None):
+        """Find the linear chain of commits ending at the commit.
+
+        Returns the path from the first commit of the chain to `commit`
+        whose inner commits are squashable and were not produced by
+        previous squashes (the path is cut at `max_length` edges).
+        """
+        path = [commit]
+        while max_length is None or len(path) <= max_length:
+            predecessors = list(self._revision_graph.predecessors(path[-1]))
+            if len(predecessors) != 1:
+                break
+            path.append(predecessors[0])
+            if not self._squashable(predecessors[0]) or\
+                    self._revision_graph.node[predecessors[0]].get(
+                        "squashed", False):
+                break
+        path.reverse()
+        return path
+
+    def _squash_path(self, path):
+        """Replace the deltas along a path with their composition.
+
+        Returns the list of the squashed commits (nothing is squashed
+        if the ends of the path are already adjacent).
+        """
+        source, target = path[0], path[-1]
+        squashed = path[1:-1]
+        if len(squashed) == 0 or\
+                self._revision_graph.has_edge(source, target):
+            return []
+        delta = self._compose_delta_path(path)
+
+        for c, t in self._squashed.items():
+            if t in squashed:
+                self._squashed[c] = target
+        for c in squashed:
+            self._squashed[c] = target
+            self._revision_graph.remove_node(c)
+        self._invalidate_delta_cache(squashed)
+        self._revision_graph.node[target]["squashed"] = True
+        if self._commit_log is not None:
+            self._commit_log.append_squash(squashed, target)
+        self._add_revision_edge(source, target, delta)
+        return squashed
+
+    def _mark_squashed(self):
+        """Mark the commits into which other commits were squashed."""
+        for target in set(self._squashed.values()):
+            self._revision_graph.node[target]["squashed"] = True
+
+    def squash(self, from_commit, to_commit):
+        """Squash the commits between two commits of a linear chain.
+
+        The commits strictly between `from_commit` and `to_commit` are
+        removed from the revision graph and the deltas along the chain
+        are replaced with their composition. The ids of the squashed
+        commits remain addressable (e.g. by `rollback`), they address
+        `to_commit` (the state of the versioned object at the squashed
+        commits is no longer recoverable).
+
+        Parameters
+        ----------
+        from_commit : str
+            First commit of the chain (kept)
+        to_commit : str
+            Last commit of the chain (kept)
+
+        Returns
+        -------
+        squashed : list
+            List of the squashed commits
+
+        Raises
+        ------
+        RevisionError
+            If the commits between `from_commit` and `to_commit` do not
+            form a linear chain of commits that are neither heads,
+            snapshots nor branching or merge commits.
+        """
+        from_commit = self._resolve_commit(from_commit)
+        to_commit = self._resolve_commit(to_commit)
+        for c in [from_commit, to_commit]:
+            if c not in self._revision_graph.nodes():
+                raise RevisionError(
+                    "Commit '{}' does not exist in the revision graph".format(
+                        c))
+
+        path = [to_commit]
+        while path[-1] != from_commit:
+            predecessors = list(self._revision_graph.predecessors(path[-1]))
+            if len(predecessors) != 1 or (
+                    len(path) > 1 and not self._squashable(path[-1])):
+                raise RevisionError(
+                    "Commits from '{}' to '{}' do not form a linear "
+                    "chain".format(from_commit, to_commit))
+            path.append(predecessors[0])
+        path.reverse()
+
+        squashed = self._squash_path(path)
+        self._log_heads()
+        return squashed
+
+    def compact(self):
+        """Squash all the linear chains of the revision graph.
+
+        Every path between two commits that cannot be squashed
+        (heads, branching and merge commits, snapshots and the
+        initial commit) is replaced with a single edge.
+
+        Returns
+        -------
+        squashed : list
+            List of the squashed commits
+        """
+        chains = []
+        for commit in self._revision_graph.nodes():
+            if not self._squashable(commit):
+                for s in self._revision_graph.successors(commit):
+                    path = [commit, s]
+                    while self._squashable(path[-1]):
+                        path.append(
+                            next(self._revision_graph.successors(path[-1])))
+                    chains.append(path)
+        squashed = []
+        for path in chains:
+            squashed += self._squash_path(path)
+        if len(squashed) > 0:
+            self._log_heads()
+        return squashed
+
+    def _compact_head(self):
+        """Squash the chain ending at the head if required by the policy."""
+        if self._compaction_threshold is None:
+            return
+        path = self._linear_chain(
+            self._heads[self._current_branch],
+            self._compaction_threshold + 1)
+        if len(path) - 2 >= self._compaction_threshold:
+            self._squash_path(path)
 
     def branches(self):
         """Return list of branches."""
@@ -145,19 +688,16 @@ class Versioning(ABC):
 
         # Update heads and revision graph
         self._heads[self._current_branch] = commit_id
-        self._revision_graph.add_node(
-            commit_id,
-            branch=self._current_branch,
-            time=time,
-            message=message if message is not None else "")
-        self._revision_graph.add_edge(
-            previous_commit, commit_id, delta=delta)
-
-        # Update deltas
-        for branch, branch_delta in self._deltas.items():
-            self._deltas[branch] = self._compose_deltas(
-                self._invert_delta(delta), branch_delta)
-            self._refine_delta(self._deltas[branch])
+        self._add_revision_commit(
+            commit_id, self._current_branch, time,
+            message if message is not None else "")
+        self._add_revision_edge(previous_commit, commit_id, delta)
+        self._log_heads()
+        self._update_snapshots(delta)
+        self._compact_head()
+
+        # Deltas to the other branches are recomputed when needed
+        self._deltas = dict()
 
         return commit_id
 
@@ -168,24 +708,31 @@ class Versioning(ABC):
                 "Branch '{}' does not exist".format(branch))
         if branch == self._current_branch:
             warnings.warn("Already in branch '{}'".format(branch), RevisionWarning)
+            return
 
-        # Set as the current branch
         previous_branch = self._current_branch
+        delta = self._deltas.get(branch)
+        if delta is None:
+            path_to_current, path_to_branch = self._branching_paths(
+                self._heads[previous_branch], self._heads[branch])
+            # Restore the object from the nearest snapshot if it
+            # requires fewer deltas than the path between the heads
+            if self._replay_from_snapshot(
+                    self._heads[branch],
+                    len(path_to_current) + len(path_to_branch) - 2):
+                self._current_branch = branch
+                self._deltas = dict()
+                self._log_heads()
+                return
+            delta = self._delta_between(path_to_current, path_to_branch)
+
+        # Set as the current branch
         self._current_branch = branch
 
         # Apply delta to the versioned object
-        delta = self._deltas[branch]
         self._apply_delta(delta)
-        self._deltas[previous_branch] = self._invert_delta(delta)
-
-        # Recompute deltas
-        for name, another_delta in self._deltas.items():
-            if name != previous_branch:
-                self._deltas[name] = self._compose_deltas(
-                    self._deltas[previous_branch],
-                    another_delta
-                )
-        del self._deltas[self._current_branch]
+        self._deltas = {previous_branch: self._invert_delta(delta)}
+        self._log_heads()
 
     def branch(self, new_branch, message=None):
         """Create a new branch with identity commit."""
@@ -203,15 +750,15 @@ class Versioning(ABC):
 
         identity_delta = self._create_identity_delta()
 
-        # Add a new delta
-        self._deltas[previous_branch] = identity_delta
-
         # Create a new identity commit
         commit_id = self.commit(
             identity_delta,
             message=message,
             previous_commit=previous_commit)
         self._heads[self._current_branch] = commit_id
+
+        # The state of the previous branch is the same
+        self._deltas[previous_branch] = self._create_identity_delta()
         return commit_id
 
     def merge_with(self, branch, message=None):
@@ -224,22 +771,29 @@ class Versioning(ABC):
             message = "Merged branch '{}' into '{}'".format(
                 branch, self._current_branch)
 
-        delta = self._deltas[branch]
+        delta = self._branch_delta(branch)
         delta_to_current, delta_to_branch = self._merge_into_current_branch(
             delta)
 
         commit_id = self.commit(delta_to_current, message=message)
 
-        self._revision_graph.add_edge(
-            self._heads[branch], commit_id,
-            delta=delta_to_branch)
+        self._add_revision_edge(
+            self._heads[branch], commit_id, delta_to_branch)
 
         del self._heads[branch]
-        del self._deltas[branch]
+        self._log_heads()
         return commit_id
 
     def rollback(self, rollback_commit, message=None):
         """Rollback the current branch to a specific commit."""
+        if rollback_commit in self._squashed:
+            warnings.warn(
+                "Commit '{}' was squashed into '{}', rolling back "
+                "to '{}'".format(
+                    rollback_commit, self._squashed[rollback_commit],
+                    self._squashed[rollback_commit]),
+                RevisionWarning)
+            rollback_commit = self._squashed[rollback_commit]
         if rollback_commit not in self._revision_graph.nodes():
             raise RevisionError(
                 "Commit '{}' does not exist in the revision graph".format(
@@ -258,12 +812,16 @@ class Versioning(ABC):
         if message is None:
             message = "Rollback to commit '{}'".format(rollback_commit)
 
-        # Generate a big rollback commit
-        rollback_delta = self._invert_delta(
-            self._compose_delta_path(shortest_path))
+        # Restore the object from the nearest snapshot if it
+        # requires fewer deltas than the path from the head
+        if not self._replay_from_snapshot(
+                rollback_commit, len(shortest_path) - 1):
+            # Generate a big rollback commit
+            rollback_delta = self._invert_delta(
+                self._compose_delta_path(shortest_path))
 
-        # Apply the rollback commit
-        self._apply_delta(rollback_delta)
+            # Apply the rollback commit
+            self._apply_delta(rollback_delta)
 
         # Compute all paths from every head to the commit
         head_paths = {}
@@ -278,7 +836,8 @@ class Versioning(ABC):
             [n for pp in head_paths.values() for p in pp for n in p if n != rollback_commit])
         for n in self._revision_graph.nodes():
             for s in self._revision_graph.successors(n):
-                if n not in removed_commits and s in removed_commits:
+                if n not in removed_commits and n != rollback_commit and\
+                        s in removed_commits:
                     new_heads[self._revision_graph.node[n]["branch"]] = (n, s)
 
         # Recompute deltas
@@ -286,103 +845,31 @@ class Versioning(ABC):
         self._current_branch = new_current_branch
         self._heads[self._current_branch] = rollback_commit
 
-        # Find a branching point from the rollback commit
-        rollback_bfs_from_commit = nx.bfs_tree(
-            self._revision_graph, rollback_commit, reverse=True)
-
-        rollback_branching_point = None
-        for n in rollback_bfs_from_commit.nodes():
-            if self._revision_graph.node[n]["branch"] !=\
-                    self._current_branch:
-                rollback_branching_point = n
-                break
-
-        # Update deltas of the preserved heads
-        for head, commit in self._heads.items():
-            if head != self._current_branch:
-                # Find a branching point from the head
-                head_bfs_from_commit = nx.bfs_tree(
-                    self._revision_graph, commit, reverse=True)
-
-                head_branching_point = None
-                for n in head_bfs_from_commit.nodes():
-                    if self._revision_graph.node[n]["branch"] != head:
-                        head_branching_point = n
-                        break
-
-                if rollback_branching_point:
-                    # Rollback in a branched part of the revision graph
-                    try:
-                        # Rollback happened before head
-                        branching_to_head = nx.shortest_path(
-                            self._revision_graph, rollback_branching_point, commit)
-                        branching_to_rollback = nx.shortest_path(
-                            self._revision_graph, rollback_branching_point, rollback_commit)
-                        self._deltas[head] = self._compose_deltas(
-                            self._invert_delta(self._compose_delta_path(branching_to_rollback)),
-                            self._compose_delta_path(branching_to_head)
-                        )
-                    except nx.NetworkXNoPath:
-                        if head_branching_point:
-                            try:
-                                # Rollback happened after head
-                                branching_to_rollback = nx.shortest_path(
-                                    self._revision_graph,
-                                    head_branching_point, rollback_commit)
-                                branching_to_head = nx.shortest_path(
-                                    self._revision_graph,
-                                    head_branching_point, commit)
-                                self._deltas[head] = self._compose_deltas(
-                                    self._invert_delta(self._compose_delta_path(
-                                        branching_to_rollback)),
-                                    self._compose_delta_path(branching_to_head)
-                                )
-                            except:
-                                # Rollback and head are disjoint,
-                                # so no delta to compute (no undirected path)
-                                pass
-                else:
-                    # Rollback in an unbranched part of the revision graph
-                    # So head can be only in a branched part and only before
-                    # the rollback commit (otherwise removed)
-                    if head_branching_point:
-                        branching_to_head = nx.shortest_path(
-                            self._revision_graph, head_branching_point, commit)
-                        branching_to_rollback = nx.shortest_path(
-                            self._revision_graph,
-                            head_branching_point, rollback_commit)
-                        self._deltas[head] = self._compose_deltas(
-                            self._invert_delta(
-                                self._compose_delta_path(branching_to_rollback)),
-                            self._compose_delta_path(branching_to_head)
-                        )
-
-                if head in self._deltas:
-                    self._refine_delta(self._deltas[head])
-
-        # Compute deltas of the new heads
-        for branch, (head_commit, merge_commit)in new_heads.items():
-            path_to_merge = nx.shortest_path(
-                self._revision_graph, rollback_commit, merge_commit)
-            delta_to_merge = self._compose_delta_path(path_to_merge)
-            head_to_merge = self._revision_graph.adj[
-                head_commit][merge_commit]["delta"]
-            self._deltas[branch] = self._compose_deltas(
-                delta_to_merge,
-                self._invert_delta(head_to_merge))
-            self._refine_delta(self._deltas[branch])
+        # Set the new heads (deltas to the other branches are
+        # recomputed from the revision graph when needed)
+        for branch, (head_commit, _) in new_heads.items():
             self._heads[branch] = head_commit
             print("Created the new head for '{}'".format(branch))
+        self._deltas = dict()
 
         # All paths to the heads originating from the commit to
         # which we rollaback are removed
         for c in removed_commits:
             if c != rollback_commit:
                 self._revision_graph.remove_node(c)
+                self._snapshots.pop(c, None)
+                if self._commit_log is not None:
+                    self._commit_log.append_removal(c)
                 if c in self._heads.values():
                     for h in keys_by_value(self._heads, c):
                         print("Removed a head for '{}'".format(h))
                         del self._heads[h]
+        self._squashed = {
+            c: target for c, target in self._squashed.items()
+            if target not in removed_commits
+        }
+        self._invalidate_delta_cache(removed_commits)
+        self._log_heads()
 
     def _revision_graph_to_json(self):
         data = {
@@ -400,8 +887,7 @@ class Versioning(ABC):
             data["edges"].append({
                 "from": s,
                 "to": t,
-                "delta": self._delta_to_json(
-                    self._revision_graph.adj[s][t]["delta"])
+                "delta": self._delta_to_json(self._edge_delta(s, t))
             })
         return data
 
@@ -441,6 +927,7 @@ class Versioning(ABC):
         data["heads"] = {}
         data["heads"] = self._heads
         data["revision_graph"] = self._revision_graph_to_json()
+        data["squashed"] = self._squashed
         return data
 
     def from_json(self, json_data):
@@ -452,18 +939,26 @@ class Versioning(ABC):
         self._heads = json_data["heads"]
         self._revision_graph = self._revision_graph_from_json(
             json_data["revision_graph"])
+        self._squashed = json_data.get("squashed", dict())
+        self._mark_squashed()
+        self._delta_cache.clear()
 
 
 class VersionedGraph(Versioning):
     """Class for versioned hierarchies."""
 
     def __init__(self, graph, init_branch="master", current_branch=None,
-                 deltas=None, heads=None, revision_graph=None):
+                 deltas=None, heads=None, revision_graph=None,
+                 snapshot_interval=None, snapshot_size=None,
+                 compaction_threshold=None):
         """Initialize versioned graph object."""
         self.graph = graph
         super().__init__(init_branch=init_branch, current_branch=current_branch,
                          deltas=deltas, heads=heads,
-                         revision_graph=revision_graph)
+                         revision_graph=revision_graph,
+                         snapshot_interval=snapshot_interval,
+                         snapshot_size=snapshot_size,
+                         compaction_threshold=compaction_threshold)
 
     def _refine_delta(self, delta):
         lhs = delta["rule"].refine(self.graph, delta["lhs_instance"])
@@ -509,6 +1004,17 @@ class VersionedGraph(Versioning):
         }
         return identity_delta
 
+    def _take_snapshot(self):
+        """Copy the current graph version."""
+        return copy_graph(self.graph)
+
+    def _restore_snapshot(self, snapshot):
+        """Replace the current graph version by a snapshot."""
+        for node in list(self.graph.nodes()):
+            remove_node(self.graph, node)
+        add_nodes_from(self.graph, snapshot.nodes(data=True))
+        add_edges_from(self.graph, snapshot.edges(data=True))
+
     def _apply_delta(self, delta, relabel=True):
         """Apply delta to the current graph version."""
         _, rhs_instance = delta["rule"].apply_to(
@@ -588,17 +1094,34 @@ class VersionedGraph(Versioning):
         super(VersionedGraph, cls).from_json(obj, json_data)
         return obj
 
+    @classmethod
+    def from_log(cls, graph, path, sync=True):
+        """Open versioning object from a commit log.
+
+        The graph is expected to be the version at the head of the
+        current branch of the log, the following commits are appended
+        to the log.
+        """
+        obj = cls(graph)
+        obj._load_log(path, sync)
+        return obj
+
 
 class VersionedHierarchy(Versioning):
     """Class for versioned hierarchies."""
 
     def __init__(self, hierarchy, init_branch="master", current_branch=None,
-                 deltas=None, heads=None, revision_graph=None):
+                 deltas=None, heads=None, revision_graph=None,
+                 snapshot_interval=None, snapshot_size=None,
+                 compaction_threshold=None):
         """Initialize versioned hierarchy object."""
         self.hierarchy = hierarchy
         super().__init__(init_branch=init_branch, current_branch=current_branch,
                          deltas=deltas, heads=heads,
-                         revision_graph=revision_graph)
+                         revision_graph=revision_graph,
+                         snapshot_interval=snapshot_interval,
+                         snapshot_size=snapshot_size,
+                         compaction_threshold=compaction_threshold)
 
     def _refine_delta(self, delta):
         lhs_instances = self.hierarchy.refine_rule_hierarchy(
@@ -618,7 +1141,6 @@ class VersionedHierarchy(Versioning):
                         rule.p_lhs[keys_by_value(rule.p_rhs, n)[0]]]
             delta["rhs_instances"][graph] = rhs_instance
 
-    @staticmethod
     def _compose_deltas(self, delta1, delta2):
         """Computing composition of two deltas."""
         rule, lhs, rhs = compose_rule_hierarchies(
@@ -658,6 +1180,15 @@ class VersionedHierarchy(Versioning):
         }
         return identity_delta
 
+    def _take_snapshot(self):
+        """Copy the current hierarchy version (NetworkX hierarchies only)."""
+        if isinstance(self.hierarchy, NetworkXHierarchy):
+            return NetworkXHierarchy.copy(self.hierarchy)
+
+    def _restore_snapshot(self, snapshot):
+        """Replace the current hierarchy version by a snapshot."""
+        self.hierarchy._restore(snapshot)
+
     def _apply_delta(self, delta, relabel=True):
         """Apply delta to the current hierarchy version."""
         if isinstance(self.hierarchy, NetworkXHierarchy):
@@ -776,3 +1307,15 @@ class VersionedHierarchy(Versioning):
         obj = cls(hierarchy)
         super(VersionedHierarchy, cls).from_json(obj, json_data)
         return obj
+
+    @classmethod
+    def from_log(cls, hierarchy, path, sync=True):
+        """Open versioning object from a commit log.
+
+        The hierarchy is expected to be the version at the head of
+        the current branch of the log, the following commits are
+        appended to the log.
+        """
+        obj = cls(hierarchy)
+        obj._load_log(path, sync)
+        return obj
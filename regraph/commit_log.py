@@ -0,0 +1,205 @@
+"""Append-only on-disk log of the commits of versioned objects.
+
+A log consists of two files:
+
+- `<path>.log` containing the payloads of the deltas of the revision
+  graph, one JSON record per line;
+- `<path>.idx` containing the index of the log, one JSON record per
+  line: commits (with their metadata), edges of the revision graph
+  (with the offsets of their deltas in `<path>.log`), removals and
+  squashes of commits and states of the heads.
+
+Both files are only appended to, so persisting a commit costs
+O(size of the delta) and does not depend on the length of the
+history. Opening a log reads the index only, the deltas are read
+on demand (see `regraph.audit.Versioning.from_log`).
+"""
+import json
+import os
+
+import networkx as nx
+
+from regraph.exceptions import RevisionError
+
+
+class CommitLog(object):
+    """Append-only log of the commits of a versioned object.
+
+    Attributes
+    ----------
+    path : str
+        Path of the log without the extensions
+    sync : bool
+        Flag indicating if the files are synchronized with the disk
+        (`os.fsync`) after every record
+    """
+
+    def __init__(self, path, sync=True):
+        """Initialize a log (the files are created if necessary)."""
+        self.path = path
+        self.sync = sync
+        for filename in [self._log_file(), self._index_file()]:
+            if not os.path.isfile(filename):
+                open(filename, "a").close()
+
+    @classmethod
+    def create(cls, path, sync=True):
+        """Create a new (empty) log.
+
+        Raises
+        ------
+        RevisionError
+            If the log already exists.
+        """
+        if os.path.isfile(path + ".log") or os.path.isfile(path + ".idx"):
+            raise RevisionError(
+                "Commit log '{}' already exists".format(path))
+        return cls(path, sync)
+
+    def _log_file(self):
+        return self.path + ".log"
+
+    def _index_file(self):
+        return self.path + ".idx"
+
+    def _append(self, filename, line):
+        """Append a line to a file and return its offset."""
+        data = (line + "\n").encode("utf-8")
+        with open(filename, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(data)
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+        return offset, len(data)
+
+    def _append_index(self, record):
+        self._append(self._index_file(), json.dumps(record, default=str))
+
+    def append_commit(self, commit_id, branch, time, message):
+        """Append a commit (without its incoming deltas)."""
+        self._append_index({
+            "type": "commit",
+            "id": commit_id,
+            "branch": branch,
+            "time": time,
+            "message": message
+        })
+
+    def append_delta(self, source, target, delta_json):
+        """Append the delta of an edge of the revision graph.
+
+        Returns
+        -------
+        offset : int
+            Offset of the delta in the log file
+        length : int
+            Length of the record of the delta in bytes
+        """
+        offset, length = self._append(
+            self._log_file(), json.dumps(delta_json, default=str))
+        self._append_index({
+            "type": "delta",
+            "from": source,
+            "to": target,
+            "offset": offset,
+            "length": length
+        })
+        return offset, length
+
+    def append_removal(self, commit_id):
+        """Append a removal of a commit (and of its incident edges)."""
+        self._append_index({"type": "remove", "id": commit_id})
+
+    def append_squash(self, commit_ids, target):
+        """Append a squash of commits into the target commit.
+
+        The squashed commits (and their incident edges) are removed,
+        the delta replacing them is appended separately.
+        """
+        self._append_index({
+            "type": "squash",
+            "ids": commit_ids,
+            "into": target
+        })
+
+    def append_heads(self, heads, current_branch):
+        """Append the state of the heads."""
+        self._append_index({
+            "type": "heads",
+            "heads": heads,
+            "current_branch": current_branch
+        })
+
+    def read_delta(self, offset, length):
+        """Read the JSON representation of a delta."""
+        with open(self._log_file(), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        return json.loads(data.decode("utf-8"))
+
+    def load_index(self):
+        """Load the revision graph (without deltas), the heads and squashes.
+
+        Edges of the revision graph have the attributes `offset`
+        and `length` of their deltas in the log file. An incomplete
+        last record (interrupted write) is ignored.
+
+        Returns
+        -------
+        revision_graph : nx.DiGraph
+        heads : dict
+        current_branch : str
+        squashed : dict
+            Dictionary whose keys are squashed commits and whose
+            values are the commits they were squashed into
+        """
+        revision_graph = nx.DiGraph()
+        heads = None
+        current_branch = None
+        squashed = dict()
+        with open(self._index_file(), "r") as f:
+            lines = f.readlines()
+        for i, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if i == len(lines) - 1:
+                    break
+                raise RevisionError(
+                    "Commit log '{}' is corrupted (line {})".format(
+                        self.path, i + 1))
+            if record["type"] == "commit":
+                revision_graph.add_node(
+                    record["id"],
+                    branch=record["branch"],
+                    time=record["time"],
+                    message=record["message"])
+            elif record["type"] == "delta":
+                revision_graph.add_edge(
+                    record["from"], record["to"],
+                    offset=record["offset"],
+                    length=record["length"])
+            elif record["type"] == "remove":
+                if record["id"] in revision_graph.nodes():
+                    revision_graph.remove_node(record["id"])
+            elif record["type"] == "squash":
+                ids = set(record["ids"])
+                for c, target in squashed.items():
+                    if target in ids:
+                        squashed[c] = record["into"]
+                for c in record["ids"]:
+                    squashed[c] = record["into"]
+                    if c in revision_graph.nodes():
+                        revision_graph.remove_node(c)
+            elif record["type"] == "heads":
+                heads = record["heads"]
+                current_branch = record["current_branch"]
+        if heads is None:
+            raise RevisionError(
+                "Commit log '{}' does not contain heads".format(self.path))
+        squashed = {
+            c: target for c, target in squashed.items()
+            if target in revision_graph.nodes()
+        }
+        return revision_graph, heads, current_branch, squashed
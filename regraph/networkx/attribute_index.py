@@ -0,0 +1,190 @@
+"""Inverted index of node attributes of NetworkX graphs.
+
+An index can be attached to a `networkx.(Di)Graph` object with
+`regraph.primitives.add_attribute_index`, after which it is kept up to
+date by the node manipulation functions of `regraph.primitives`
+(`add_node`, `remove_node`, `add_node_attrs`, `update_node_attrs`,
+`remove_node_attrs`, `clone_node`, `merge_nodes`, ...).
+Modifications of the graph bypassing `regraph.primitives` are not
+reflected in the index (it can be rebuilt with `AttributeIndex.rebuild`).
+
+The index is used by the matching engine to select candidate nodes for
+pattern nodes: the posting lists of the elements of `FiniteSet` values
+of the pattern attributes are intersected instead of testing attribute
+inclusion for every node of the graph.
+"""
+from regraph.attribute_sets import FiniteSet
+
+
+class AttributeIndex(object):
+    """Inverted index of node attributes.
+
+    Attributes
+    ----------
+    _postings : dict
+        Dictionary whose keys are attribute keys and whose values are
+        dictionaries mapping elements of `FiniteSet` values to the nodes
+        (stored as keys of dictionaries, used as ordered sets) whose value
+        of the attribute contains the element
+    _fallbacks : dict
+        Dictionary whose keys are attribute keys and whose values are the
+        nodes whose value of the attribute is not a `FiniteSet`
+        (`RegexSet`, `IntegerSet`, `UniversalSet`, ...), such nodes
+        are candidates for any value of the attribute
+    _keys : dict
+        Dictionary whose keys are attribute keys and whose values are the
+        nodes having the attribute
+    _nodes : dict
+        Dictionary whose keys are indexed nodes and whose values are the
+        indexed entries of the nodes
+    """
+
+    def __init__(self, graph=None):
+        """Initialize an index (optionally, of the nodes of a graph)."""
+        self._postings = dict()
+        self._fallbacks = dict()
+        self._keys = dict()
+        self._nodes = dict()
+        if graph is not None:
+            self.rebuild(graph)
+
+    def __len__(self):
+        """Return the number of indexed nodes."""
+        return len(self._nodes)
+
+    def __contains__(self, node_id):
+        """Test if the node is indexed."""
+        return node_id in self._nodes
+
+    def in_sync(self, graph):
+        """Test if the indexed nodes are the nodes of the graph.
+
+        Detects the nodes added or removed bypassing the primitives
+        (modifications of the attributes of existing nodes bypassing
+        the primitives are not detected).
+        """
+        return self._nodes.keys() == graph._node.keys()
+
+    def copy(self):
+        """Copy the index."""
+        new_index = AttributeIndex()
+        new_index._postings = dict(
+            (key, dict(
+                (element, dict(nodes))
+                for element, nodes in postings.items()))
+            for key, postings in self._postings.items())
+        new_index._fallbacks = dict(
+            (key, dict(nodes)) for key, nodes in self._fallbacks.items())
+        new_index._keys = dict(
+            (key, dict(nodes)) for key, nodes in self._keys.items())
+        new_index._nodes = dict(self._nodes)
+        return new_index
+
+    def rebuild(self, graph):
+        """Rebuild the index from the nodes of the graph."""
+        self._postings = dict()
+        self._fallbacks = dict()
+        self._keys = dict()
+        self._nodes = dict()
+        for node_id, attrs in graph.nodes(data=True):
+            self.add_node(node_id, attrs)
+
+    def add_node(self, node_id, attrs):
+        """Add a node with its attributes to the index."""
+        if node_id in self._nodes:
+            self.remove_node(node_id)
+        entries = dict()
+        for key, value in attrs.items():
+            self._keys.setdefault(key, dict())[node_id] = None
+            if isinstance(value, FiniteSet):
+                postings = self._postings.setdefault(key, dict())
+                for element in value.fset:
+                    postings.setdefault(element, dict())[node_id] = None
+                entries[key] = list(value.fset)
+            else:
+                self._fallbacks.setdefault(key, dict())[node_id] = None
+                entries[key] = None
+        self._nodes[node_id] = entries
+
+    def remove_node(self, node_id):
+        """Remove a node from the index."""
+        entries = self._nodes.pop(node_id, None)
+        if entries is None:
+            return
+        for key, elements in entries.items():
+            _discard(self._keys, key, node_id)
+            if elements is None:
+                _discard(self._fallbacks, key, node_id)
+            else:
+                postings = self._postings.get(key, dict())
+                for element in elements:
+                    _discard(postings, element, node_id)
+                if key in self._postings and len(postings) == 0:
+                    del self._postings[key]
+
+    def update_node(self, node_id, attrs=None):
+        """Update indexed attributes of a node.
+
+        If `attrs` is None, the node is removed from the index.
+        """
+        if attrs is None:
+            self.remove_node(node_id)
+        else:
+            self.add_node(node_id, attrs)
+
+    def candidates(self, attrs):
+        """Find candidate nodes whose attributes may include `attrs`.
+
+        Returns
+        -------
+        candidates : dict or None
+            Ordered set (dictionary with None values) of the nodes
+            that can have the attributes including `attrs`, the
+            attribute inclusion for these nodes still has to be
+            tested. None is returned if the index provides no
+            restriction on the nodes.
+        """
+        node_sets = []
+        for key, value in attrs.items():
+            if not isinstance(value, FiniteSet) or len(value.fset) == 0:
+                # Non-finite or empty values (or values that are not
+                # normalized) impose no restriction
+                continue
+            postings = self._postings.get(key, dict())
+            node_sets.append(self._fallbacks.get(key, dict()))
+            finite_nodes = None
+            for element in value.fset:
+                element_nodes = postings.get(element, dict())
+                if finite_nodes is None:
+                    finite_nodes = element_nodes
+                elif len(element_nodes) < len(finite_nodes):
+                    finite_nodes = dict(
+                        (n, None) for n in element_nodes
+                        if n in finite_nodes)
+                else:
+                    finite_nodes = dict(
+                        (n, None) for n in finite_nodes
+                        if n in element_nodes)
+            if len(node_sets[-1]) > 0:
+                key_nodes = dict(finite_nodes)
+                key_nodes.update(node_sets[-1])
+                node_sets[-1] = key_nodes
+            else:
+                node_sets[-1] = finite_nodes
+
+        if len(node_sets) == 0:
+            return None
+        node_sets.sort(key=len)
+        result = node_sets[0]
+        for node_set in node_sets[1:]:
+            result = dict((n, None) for n in result if n in node_set)
+        return dict(result)
+
+
+def _discard(index, key, node_id):
+    """Remove a node from the entry of the index and clean empty entries."""
+    nodes = index.get(key)
+    if nodes is not None:
+        nodes.pop(node_id, None)
+        if len(nodes) == 0:
+            del index[key]
@@ -0,0 +1,358 @@
+"""Columnar storage of attributes of NetworkX graphs.
+
+By default, every node and edge of a `networkx.(Di)Graph` object
+carries its own dictionary of attributes. A columnar store can be
+attached to a graph with `regraph.primitives.add_attribute_store`,
+after which the attributes of the nodes and edges of the graph are
+kept in columns (one per attribute key) of ids of values in a table of
+distinct values, while the nodes and the edges only carry lightweight
+rows (`AttributeRow` objects) indexing these columns.
+
+Rows implement the interface of dictionaries, therefore, the graph and
+its attributes are manipulated as usual (with `regraph.primitives` or
+directly). As attribute values are not modified in-place and identical
+finite sets are the same objects (see `regraph.attribute_sets`),
+elements with identical attribute values share the entries of the
+value table.
+
+The columns allow attribute-filtered scans to test a condition once
+per distinct value of an attribute instead of once per element
+(see `AttributeStore.select` and `AttributeStore.including`).
+"""
+import copy
+
+import numpy as np
+
+from regraph.utils import value_issubset
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+
+# Value id marking the absence of an attribute
+_MISSING = -1
+
+
+class AttributeStore(object):
+    """Columnar store of attributes of graph elements.
+
+    Attributes
+    ----------
+    _values : list
+        Table of distinct attribute values (None for free entries)
+    _value_ids : dict
+        Dictionary whose keys are ids of values and whose values
+        are their ids in the value table
+    _counts : list
+        Number of references to the entries of the value table
+    _free_values : list
+        Free entries of the value table
+    _columns : dict
+        Dictionary whose keys are attribute keys and whose values are
+        arrays of ids of values (indexed by rows, -1 if the row does
+        not have the attribute)
+    _size : int
+        Number of allocated rows
+    _capacity : int
+        Length of the columns
+    _free_rows : list
+        Released rows
+    """
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self._values = []
+        self._value_ids = dict()
+        self._counts = []
+        self._free_values = []
+        self._columns = dict()
+        self._size = 0
+        self._capacity = 0
+        self._free_rows = []
+
+    def __len__(self):
+        """Return the number of rows in use."""
+        return self._size - len(self._free_rows)
+
+    def __getstate__(self):
+        """Get the state of the store (for copying and pickling)."""
+        state = dict(self.__dict__)
+        # Value ids are indexed by object ids, rebuilt in `__setstate__`
+        del state["_value_ids"]
+        return state
+
+    def __setstate__(self, state):
+        """Set the state of the store."""
+        self.__dict__.update(state)
+        self._value_ids = dict(
+            (id(value), value_id)
+            for value_id, value in enumerate(self._values)
+            if self._counts[value_id] > 0)
+
+    def new_row(self):
+        """Allocate a row and return its (empty) `AttributeRow`."""
+        return AttributeRow(self, self.allocate_row())
+
+    def allocate_row(self):
+        """Allocate an (empty) row and return its number."""
+        if len(self._free_rows) > 0:
+            return self._free_rows.pop()
+        return int(self.allocate_rows(1)[0])
+
+    def allocate_rows(self, count):
+        """Allocate a block of consecutive (empty) rows.
+
+        Returns
+        -------
+        rows : np.ndarray
+            Numbers of the allocated rows
+        """
+        rows = np.arange(self._size, self._size + count)
+        self._size += count
+        if self._size > self._capacity:
+            extension = max(16, self._capacity, self._size - self._capacity)
+            for key, column in self._columns.items():
+                self._columns[key] = np.concatenate([
+                    column, np.full(extension, _MISSING, dtype=np.int32)
+                ])
+            self._capacity += extension
+        return rows
+
+    def clear_row(self, row):
+        """Remove all the attributes of a row."""
+        for column in self._columns.values():
+            if column[row] != _MISSING:
+                self._decref(column[row])
+                column[row] = _MISSING
+
+    def release_row(self, row):
+        """Remove the attributes of a row and free the row."""
+        self.clear_row(row)
+        self._free_rows.append(row)
+
+    def _intern(self, value):
+        """Get the id of the value in the table (add it, if necessary)."""
+        value_id = self._value_ids.get(id(value))
+        if value_id is None:
+            if len(self._free_values) > 0:
+                value_id = self._free_values.pop()
+                self._values[value_id] = value
+                self._counts[value_id] = 0
+            else:
+                value_id = len(self._values)
+                self._values.append(value)
+                self._counts.append(0)
+            self._value_ids[id(value)] = value_id
+        self._counts[value_id] += 1
+        return value_id
+
+    def _decref(self, value_id):
+        """Remove a reference to the value (free unused values)."""
+        self._counts[value_id] -= 1
+        if self._counts[value_id] == 0:
+            del self._value_ids[id(self._values[value_id])]
+            self._values[value_id] = None
+            self._free_values.append(value_id)
+
+    def _column(self, key):
+        """Get the column of the attribute (create it, if necessary)."""
+        column = self._columns.get(key)
+        if column is None:
+            column = np.full(self._capacity, _MISSING, dtype=np.int32)
+            self._columns[key] = column
+        return column
+
+    def get(self, row, key):
+        """Get the value of the attribute of a row.
+
+        Raises
+        ------
+        KeyError
+            If the row does not have the attribute.
+        """
+        column = self._columns.get(key)
+        if column is None or column[row] == _MISSING:
+            raise KeyError(key)
+        return self._values[column[row]]
+
+    def has(self, row, key):
+        """Test if the row has the attribute."""
+        column = self._columns.get(key)
+        return column is not None and column[row] != _MISSING
+
+    def set(self, row, key, value):
+        """Set the value of the attribute of a row."""
+        value_id = self._intern(value)
+        column = self._column(key)
+        if column[row] != _MISSING:
+            self._decref(column[row])
+        column[row] = value_id
+
+    def remove(self, row, key):
+        """Remove the attribute of a row.
+
+        Raises
+        ------
+        KeyError
+            If the row does not have the attribute.
+        """
+        column = self._columns.get(key)
+        if column is None or column[row] == _MISSING:
+            raise KeyError(key)
+        self._decref(column[row])
+        column[row] = _MISSING
+
+    def keys(self, row):
+        """Get the list of the attribute keys of a row."""
+        return [
+            key for key, column in self._columns.items()
+            if column[row] != _MISSING
+        ]
+
+    def items(self, row):
+        """Get the dictionary of the attributes of a row."""
+        return dict(
+            (key, self._values[column[row]])
+            for key, column in self._columns.items()
+            if column[row] != _MISSING)
+
+    def values(self):
+        """Get the list of the distinct values in the store."""
+        return [
+            value for value_id, value in enumerate(self._values)
+            if self._counts[value_id] > 0
+        ]
+
+    def select(self, key, condition):
+        """Select the rows whose attribute satisfies a condition.
+
+        The condition is tested once per distinct value of the
+        attribute.
+
+        Parameters
+        ----------
+        key : hashable
+            Attribute key
+        condition : callable
+            Condition on the attribute values
+
+        Returns
+        -------
+        mask : np.ndarray
+            Boolean array indexed by rows, the rows not having the
+            attribute are not selected
+        """
+        column = self._columns.get(key)
+        if column is None:
+            return np.zeros(self._size, dtype=bool)
+        column = column[:self._size]
+        value_ids = np.unique(column[column != _MISSING])
+        selected = [
+            value_id for value_id in value_ids
+            if condition(self._values[value_id])
+        ]
+        return np.isin(column, selected)
+
+    def including(self, attrs):
+        """Select the rows whose attributes include the given ones.
+
+        Returns
+        -------
+        mask : np.ndarray
+            Boolean array indexed by rows
+        """
+        mask = np.ones(self._size, dtype=bool)
+        for key, value in attrs.items():
+            mask &= self.select(
+                key, lambda other: value_issubset(value, other))
+        return mask
+
+
+class AttributeRow(MutableMapping):
+    """Dictionary-like view of the attributes of a graph element.
+
+    Attributes
+    ----------
+    _store : AttributeStore
+        Store of the attributes
+    _row : int
+        Row of the element in the store
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        """Initialize a view of a row of the store."""
+        self._store = store
+        self._row = row
+
+    @property
+    def row(self):
+        """Row of the element in the store."""
+        return self._row
+
+    def __del__(self):
+        """Release the row of the store."""
+        try:
+            self._store.release_row(self._row)
+        except (AttributeError, TypeError):
+            # The store is already destroyed (at interpreter exit)
+            pass
+
+    def __getitem__(self, key):
+        """Get the value of the attribute."""
+        return self._store.get(self._row, key)
+
+    def __contains__(self, key):
+        """Test if the element has the attribute."""
+        return self._store.has(self._row, key)
+
+    def __setitem__(self, key, value):
+        """Set the value of the attribute."""
+        self._store.set(self._row, key, value)
+
+    def __delitem__(self, key):
+        """Remove the attribute."""
+        self._store.remove(self._row, key)
+
+    def __iter__(self):
+        """Iterate over the attribute keys."""
+        return iter(self._store.keys(self._row))
+
+    def __len__(self):
+        """Return the number of attributes."""
+        return len(self._store.keys(self._row))
+
+    def __repr__(self):
+        """Return the representation of the attributes."""
+        return repr(dict(self))
+
+    def copy(self):
+        """Copy the attributes to a dictionary."""
+        return dict(self)
+
+    def __copy__(self):
+        """Copy the attributes to a dictionary."""
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        """Deep copy the attributes.
+
+        If the store is copied as well (for example, as a part of a
+        graph), the copy is a row of the copy of the store, otherwise,
+        the attributes are copied to a dictionary.
+        """
+        store = memo.get(id(self._store))
+        if store is None:
+            return dict(
+                (key, copy.deepcopy(value, memo))
+                for key, value in self.items())
+        row = AttributeRow(store, self._row)
+        memo[id(self)] = row
+        return row
+
+    def __reduce__(self):
+        """Reduce the row for pickling."""
+        return (AttributeRow, (self._store, self._row))
@@ -1,4 +1,16 @@
-"""Category operations used by graph rewriting tool."""
+"""Category operations used by graph rewriting tool.
+
+The operations validate the homomorphisms they receive according to
+a validation policy: "full" (inputs and outputs are checked), "inputs"
+(only the homomorphisms passed by the caller are checked, default)
+or "off" (no checks). The policy is set for a context with
+`homomorphism_validation` (or globally with
+`set_homomorphism_validation`) and can be overridden by the parameter
+`validation` of the operations. Homomorphisms produced by regraph
+itself (e.g. the intermediate results of `Rule.apply_to` or of the
+propagation in a hierarchy) are checked only with the policy "full".
+"""
+import contextlib
 import networkx as nx
 import copy
 
@@ -11,6 +23,70 @@ from regraph.utils import (keys_by_value,
                            valid_attributes,
                            attrs_intersection)
 from regraph.exceptions import (InvalidHomomorphism, ReGraphError)
+from regraph.networkx.homomorphism import Homomorphism
+from regraph.networkx.node_ids import NodeIdAllocator
+
+
+VALIDATION_POLICIES = ("full", "inputs", "off")
+
+_validation = {"policy": "inputs"}
+
+
+def get_homomorphism_validation():
+    """Get the current homomorphism validation policy."""
+    return _validation["policy"]
+
+
+def set_homomorphism_validation(policy):
+    """Set the homomorphism validation policy.
+
+    Parameters
+    ----------
+    policy : str
+        One of "full", "inputs" or "off"
+
+    Raises
+    ------
+    ReGraphError
+        If the policy is unknown.
+    """
+    _validation["policy"] = _validation_policy(policy)
+
+
+@contextlib.contextmanager
+def homomorphism_validation(policy):
+    """Set the homomorphism validation policy inside a context.
+
+    Examples
+    --------
+    >>> with homomorphism_validation("off"):
+    ...     pushout(a, b, c, a_b, a_c)
+    """
+    old_policy = _validation["policy"]
+    set_homomorphism_validation(policy)
+    try:
+        yield
+    finally:
+        _validation["policy"] = old_policy
+
+
+def _validation_policy(validation=None):
+    """Resolve the validation policy of a call."""
+    if validation is None:
+        return _validation["policy"]
+    if validation not in VALIDATION_POLICIES:
+        raise ReGraphError(
+            "Unknown homomorphism validation policy '{}' "
+            "(available policies: {})!".format(
+                validation, ", ".join(VALIDATION_POLICIES)))
+    return validation
+
+
+def _internal_validation(validation=None):
+    """Resolve the policy for the homomorphisms produced by regraph."""
+    if _validation_policy(validation) == "full":
+        return "full"
+    return "off"
 
 
 def subgraph(graph, nodes):
@@ -21,7 +97,7 @@ def subgraph(graph, nodes):
 
     :return:
     """
-    subgraph = copy.deepcopy(graph)
+    subgraph = copy_graph(graph)
     for node in graph.nodes():
         if node not in nodes:
             remove_node(subgraph, node)
@@ -29,7 +105,13 @@ def subgraph(graph, nodes):
 
 
 def compose(d1, d2):
-    """Compose two homomorphisms given by dicts."""
+    """Compose two homomorphisms given by dicts.
+
+    If both homomorphisms are `Homomorphism` objects with
+    the same base, the result is a sparse `Homomorphism`.
+    """
+    if isinstance(d1, Homomorphism) and d1.shares_base(d2):
+        return d1.compose(d2)
     res = dict()
     for key, value in d1.items():
         if value in d2.keys():
@@ -44,7 +126,13 @@ def is_total_homomorphism(elements, mapping):
 
 def check_totality(elements, dictionary):
     """Check that a mapping is total."""
-    if set(elements) != set(dictionary.keys()):
+    if isinstance(dictionary, Homomorphism):
+        # Avoid materializing the identity part
+        total = len(elements) == len(dictionary) and\
+            all(e in dictionary for e in elements)
+    else:
+        total = set(elements) == set(dictionary.keys())
+    if not total:
         raise InvalidHomomorphism(
             "Invalid homomorphism: Mapping is not "
             "covering all the nodes of source graph! "
@@ -61,7 +149,7 @@ def check_homomorphism(source, target, dictionary, total=True):
     # check if there is mapping for all the nodes of source graph
     if total:
         check_totality(source.nodes(), dictionary)
-    if not set(dictionary.values()).issubset(target.nodes()):
+    if not all(v in target.nodes() for v in dictionary.values()):
         raise InvalidHomomorphism(
             "The image nodes {} do not exist ".format(
                 set(dictionary.values()) - set(target.nodes())) +
@@ -282,15 +370,16 @@ def is_monic(f):
         len(set(f.values()))
 
 
-def nary_pullback(b, cds, total=True):
+def nary_pullback(b, cds, total=True, validation=None):
     """Find a pullback with multiple conspans."""
+    internal = _internal_validation(validation)
     # 1. find individual pullbacks
     pullbacks = []
     for c_name, (c, d, b_d, c_d) in cds.items():
         if total:
-            pb = pullback(b, c, d, b_d, c_d)
+            pb = pullback(b, c, d, b_d, c_d, validation=validation)
         else:
-            pb = partial_pullback(b, c, d, b_d, c_d)
+            pb = partial_pullback(b, c, d, b_d, c_d, validation=validation)
         pullbacks.append((
             c_name, pb
         ))
@@ -303,10 +392,10 @@ def nary_pullback(b, cds, total=True):
             c_name2, (a2, a_b2, a_c2) = pullbacks[i]
             if total:
                 a1, a1_old_a1, a1_a2 = pullback(
-                    a1, a2, b, a_b1, a_b2)
+                    a1, a2, b, a_b1, a_b2, validation=internal)
             else:
                 a1, a1_old_a1, a1_a2 = partial_pullback(
-                    a1, a2, b, a_b1, a_b2)
+                    a1, a2, b, a_b1, a_b2, validation=internal)
             a_b1 = compose(a1_old_a1, a_b1)
             # update a_c
             for c_name, old_a_c in a_c.items():
@@ -317,99 +406,137 @@ def nary_pullback(b, cds, total=True):
         a_b = a_b1
         a = a1
 
-        check_homomorphism(a, b, a_b, total=False)
-        for c_name, a_c_guy in a_c.items():
-            check_homomorphism(a, cds[c_name][0], a_c_guy, total=False)
+        if internal == "full":
+            check_homomorphism(a, b, a_b, total=False)
+            for c_name, a_c_guy in a_c.items():
+                check_homomorphism(
+                    a, cds[c_name][0], a_c_guy, total=False)
         return (a, a_b, a_c)
 
 
-def partial_pullback(b, c, d, b_d, c_d):
+def partial_pullback(b, c, d, b_d, c_d, validation=None):
     """Find partail pullback."""
-    check_homomorphism(b, d, b_d, total=False)
-    check_homomorphism(c, d, c_d, total=False)
+    if _validation_policy(validation) != "off":
+        check_homomorphism(b, d, b_d, total=False)
+        check_homomorphism(c, d, c_d, total=False)
+    internal = _internal_validation(validation)
 
     bd_dom = subgraph(b, b_d.keys())
     cd_dom = subgraph(c, c_d.keys())
 
     bd_b = {n: n for n in bd_dom.nodes()}
     cd_c = {n: n for n in cd_dom.nodes()}
-    (tmp, tmp_bddom, tmp_cddom) = pullback(bd_dom, cd_dom, d, b_d, c_d)
+    (tmp, tmp_bddom, tmp_cddom) = pullback(
+        bd_dom, cd_dom, d, b_d, c_d, validation=internal)
     (b2, tmp_b2, b2_b) = pullback_complement(
-        tmp, bd_dom, b, tmp_bddom, bd_b)
+        tmp, bd_dom, b, tmp_bddom, bd_b, validation=internal)
     (c2, tmp_c2, c2_c) = pullback_complement(
-        tmp, cd_dom, c, tmp_cddom, cd_c)
-    (new, b2_new, c2_new) = pushout(tmp, b2, c2, tmp_b2, tmp_c2)
+        tmp, cd_dom, c, tmp_cddom, cd_c, validation=internal)
+    (new, b2_new, c2_new) = pushout(
+        tmp, b2, c2, tmp_b2, tmp_c2, validation=internal)
     hom1 = {v: b2_b[k] for (k, v) in b2_new.items()}
     hom2 = {v: c2_c[k] for (k, v) in c2_new.items()}
     return(new, hom1, hom2)
 
 
-def pullback(b, c, d, b_d, c_d, inplace=False):
+def pullback(b, c, d, b_d, c_d, inplace=False, validation=None):
     """Find the pullback from b -> d <- c.
 
     Given h1 : B -> D; h2 : C -> D returns A, rh1, rh2
     with rh1 : A -> B; rh2 : A -> C and A the pullback.
-    """
-    if inplace is True:
-        a = b
-    else:
-        a = type(b)()
 
-    # Check homomorphisms
-    check_homomorphism(b, d, b_d)
-    check_homomorphism(c, d, c_d)
+    The pullback is computed as a hash join: nodes of C are grouped
+    by their images in D and every node of B is paired with the group
+    of its image, edges of C are grouped by the images of their
+    endpoints in D and every edge of B is paired with the group
+    of its image.
+
+    The input homomorphisms are checked unless the validation policy
+    (`validation` or the policy of the context) is "off", the output
+    homomorphisms are checked only with the policy "full".
+    """
+    policy = _validation_policy(validation)
+    if policy != "off":
+        check_homomorphism(b, d, b_d)
+        check_homomorphism(c, d, c_d)
+
+    directed = b.is_directed()
+
+    # Group nodes and edges of C by their images in D
+    c_nodes_by_image = dict()
+    for n in c.nodes():
+        c_nodes_by_image.setdefault(c_d[n], []).append(n)
+    c_edges_by_image = dict()
+    for s, t in c.edges():
+        c_edges_by_image.setdefault((c_d[s], c_d[t]), []).append((s, t))
+        if not directed and s != t:
+            c_edges_by_image.setdefault(
+                (c_d[t], c_d[s]), []).append((t, s))
 
     hom1 = {}
     hom2 = {}
+    # Nodes of A indexed by pairs of nodes of B and C
+    pairs = {}
+    nodes = []
+    node_names = set()
+    allocator = NodeIdAllocator()
+    for n1 in b.nodes():
+        for n2 in c_nodes_by_image.get(b_d[n1], []):
+            new_attrs = merge_attributes(b.node[n1],
+                                         c.node[n2],
+                                         'intersection')
+            if n1 not in node_names:
+                new_name = n1
+            else:
+                new_name = allocator.new_id(node_names, str(n1), "{}{}")
+            nodes.append((new_name, new_attrs))
+            node_names.add(new_name)
+            hom1[new_name] = n1
+            hom2[new_name] = n2
+            pairs[(n1, n2)] = new_name
+
+    edges = []
+    for s1, t1 in b.edges():
+        b_edge_attrs = get_edge(b, s1, t1)
+        b_edges = [(s1, t1)]
+        if not directed and s1 != t1:
+            b_edges.append((t1, s1))
+        for s, t in b_edges:
+            for s2, t2 in c_edges_by_image.get((b_d[s], b_d[t]), []):
+                edges.append((
+                    pairs[(s, s2)], pairs[(t, t2)],
+                    merge_attributes(
+                        b_edge_attrs,
+                        get_edge(c, s2, t2),
+                        'intersection')))
 
-    f = b_d
-    g = c_d
+    if inplace is True:
+        a = b
+        a.remove_nodes_from(list(a.nodes()))
+    else:
+        a = type(b)()
 
-    for n1 in b.nodes():
-        for n2 in c.nodes():
-            if f[n1] == g[n2]:
-                new_attrs = merge_attributes(b.node[n1],
-                                             c.node[n2],
-                                             'intersection')
-                if n1 not in a.nodes():
-                    add_node(a, n1, new_attrs)
-                    hom1[n1] = n1
-                    hom2[n1] = n2
-                else:
-                    i = 1
-                    new_name = str(n1) + str(i)
-                    while new_name in a.nodes():
-                        i += 1
-                        new_name = str(n1) + str(i)
-                    # if n2 not in a.nodes():
-                    add_node(a, new_name, new_attrs)
-                    hom1[new_name] = n1
-                    hom2[new_name] = n2
-
-    for n1 in a.nodes():
-        for n2 in a.nodes():
-            if (hom1[n1], hom1[n2]) in b.edges() or \
-               ((not a.is_directed()) and (hom1[n2], hom1[n1]) in b.edges()):
-                if (hom2[n1], hom2[n2]) in c.edges() or \
-                   ((not a.is_directed) and (hom2[n2], hom2[n1]) in c.edges()):
-                    add_edge(a, n1, n2)
-                    set_edge(
-                        a,
-                        n1,
-                        n2,
-                        merge_attributes(
-                            get_edge(b, hom1[n1], hom1[n2]),
-                            get_edge(c, hom2[n1], hom2[n2]),
-                            'intersection'))
-    check_homomorphism(a, b, hom1)
-    check_homomorphism(a, c, hom2)
+    for n, attrs in nodes:
+        add_node(a, n, attrs)
+    for s, t, attrs in edges:
+        if not exists_edge(a, s, t):
+            add_edge(a, s, t)
+        set_edge(a, s, t, attrs)
+
+    if policy == "full":
+        if inplace is not True:
+            # In the inplace case `hom1` maps to the replaced content of `b`
+            check_homomorphism(a, b, hom1)
+        check_homomorphism(a, c, hom2)
     return (a, hom1, hom2)
 
 
-def partial_pushout(a, b, c, a_b, a_c):
+def partial_pushout(a, b, c, a_b, a_c, validation=None):
     """Find the partial pushout."""
-    check_homomorphism(a, b, a_b, total=False)
-    check_homomorphism(a, c, a_c, total=False)
+    if _validation_policy(validation) != "off":
+        check_homomorphism(a, b, a_b, total=False)
+        check_homomorphism(a, c, a_c, total=False)
+    internal = _internal_validation(validation)
     if a.is_directed():
         ab_dom = nx.DiGraph(a.subgraph(a_b.keys()))
         ac_dom = nx.DiGraph(a.subgraph(a_c.keys()))
@@ -420,170 +547,146 @@ def partial_pushout(a, b, c, a_b, a_c):
     ac_a = {n: n for n in ac_dom.nodes()}
     ab_a = {n: n for n in ab_dom.nodes()}
 
-    (c2, a_c2, c_c2) = pushout(ac_dom, a, c, ac_a, a_c)
-    (b2, a_b2, b_b2) = pushout(ab_dom, a, b, ab_a, a_b)
+    (c2, a_c2, c_c2) = pushout(
+        ac_dom, a, c, ac_a, a_c, validation=internal)
+    (b2, a_b2, b_b2) = pushout(
+        ab_dom, a, b, ab_a, a_b, validation=internal)
 
-    (d, b2_d, c2_d) = pushout(a, b2, c2, a_b2, a_c2)
+    (d, b2_d, c2_d) = pushout(a, b2, c2, a_b2, a_c2, validation=internal)
     b_d = compose(b_b2, b2_d)
     c_d = compose(c_c2, c2_d)
 
     return(d, b_d, c_d)
 
 
-def pushout(a, b, c, a_b, a_c, inplace=False):
-    """Find the pushour of the span b <- a -> c."""
-    def get_classes_to_merge():
-        pass
+def pushout(a, b, c, a_b, a_c, inplace=False, validation=None):
+    """Find the pushout of the span b <- a -> c.
+
+    The nodes of B to merge (images of the nodes of A glued together
+    in C) are found with a union-find over the nodes of B, every
+    class is then merged at once. The inverse of `a_c` is computed
+    only once, so the cost is linear in the sizes of A, B and C
+    (plus the work on edges).
 
-    check_homomorphism(a, b, a_b)
-    check_homomorphism(a, c, a_c)
+    The input homomorphisms are checked unless the validation policy
+    (`validation` or the policy of the context) is "off".
+    """
+    if _validation_policy(validation) != "off":
+        check_homomorphism(a, b, a_b)
+        check_homomorphism(a, c, a_c)
 
     if inplace is True:
         d = b
     else:
-        d = copy.deepcopy(b)
+        d = copy_graph(b)
+
+    # Inverse of a_c
+    c_a = dict()
+    for a_n, c_n in a_c.items():
+        c_a.setdefault(c_n, []).append(a_n)
+
+    # Union-find over the nodes of B
+    parents = dict()
+
+    def _find(n):
+        root = n
+        while parents.get(root, root) != root:
+            root = parents[root]
+        while n != root:
+            parents[n], n = root, parents[n]
+        return root
+
+    for a_keys in c_a.values():
+        root = _find(a_b[a_keys[0]])
+        for k in a_keys[1:]:
+            other_root = _find(a_b[k])
+            if other_root != root:
+                parents[root] = root
+                parents[other_root] = root
+
+    classes = dict()
+    for b_n in b.nodes():
+        if b_n in parents:
+            classes.setdefault(_find(b_n), []).append(b_n)
+
+    # Merge nodes, b_d is the identity on the nodes of b except for
+    # the merged nodes (nodes added to d are excluded from its base,
+    # in the inplace case it is the same as the base of d)
+    b_d = Homomorphism(b.nodes())
+    for nodes_to_merge in classes.values():
+        if len(nodes_to_merge) > 1:
+            new_name = merge_nodes(d, nodes_to_merge)
+            for node in nodes_to_merge:
+                b_d[node] = new_name
+            b_d.exclude([new_name])
 
-    b_d = id_of(b.nodes())
+    # Add nodes and node attrs
     c_d = dict()
-
-    # Add/merge nodes
-    merged_nodes = dict()
     for c_n in c.nodes():
-        a_keys = keys_by_value(a_c, c_n)
-        # Add nodes
+        a_keys = c_a.get(c_n, [])
         if len(a_keys) == 0:
             if c_n not in d.nodes():
                 new_name = c_n
             else:
                 new_name = unique_node_id(d, c_n)
             add_node(d, new_name, c.node[c_n])
+            b_d.exclude([new_name])
             c_d[c_n] = new_name
-        # Keep nodes
-        elif len(a_keys) == 1:
-            c_d[a_c[a_keys[0]]] = b_d[a_b[a_keys[0]]]
-        # Merge nodes
-        else:
-            nodes_to_merge = set()
-            # find the nodes that need to be merged
-            for k in a_keys:
-                nodes_to_merge.add(a_b[k])
-
-            # find if exists already some merged node to
-            # which the new node should be merged
-            groups_to_remove = set()
-            new_groups = set()
-            merge_done = False
-            for k in merged_nodes.keys():
-                if nodes_to_merge.issubset(merged_nodes[k]):
-                    merge_done = True
-                else:
-                    intersect_with_group = nodes_to_merge.intersection(
-                        merged_nodes[k])
-                    if len(intersect_with_group) > 0:
-                        new_nodes_to_merge =\
-                            nodes_to_merge.difference(merged_nodes[k])
-                        if len(new_nodes_to_merge) > 0:
-                            new_nodes_to_merge.add(k)
-                            new_name = merge_nodes(d, new_nodes_to_merge)
-                            merged_nodes[new_name] = merged_nodes[k].union(
-                                nodes_to_merge)
-                            groups_to_remove.add(k)
-                            new_groups.add(new_name)
-
-            if len(groups_to_remove) > 0:
-                new_name = merge_nodes(d, new_groups)
-                merged_nodes[new_name] = set()
-                for g in new_groups:
-                    merge_nodes[new_name] = merge_nodes[new_name].union(
-                        merged_nodes[g])
-                for group in groups_to_remove:
-                    del merged_nodes[group]
-            elif not merge_done:
-                if len(nodes_to_merge) > 1:
-                    new_name = merge_nodes(d, nodes_to_merge)
-                    merged_nodes[new_name] = nodes_to_merge
-                else:
-                    new_name = list(nodes_to_merge)[0]
-
-            c_d[c_n] = new_name
-
-            for node in nodes_to_merge:
-                b_d[node] = new_name
-
-            for k in c_d.keys():
-                for vv in keys_by_value(a_c, k):
-                    if b_d[a_b[vv]] == new_name:
-                        c_d[k] = new_name
-
-    # Add edges
-    for (n1, n2) in c.edges():
-        if b.is_directed():
-            if (c_d[n1], c_d[n2]) not in d.edges():
-                add_edge(
-                    d, c_d[n1], c_d[n2],
-                    get_edge(c, n1, n2))
         else:
-            if (c_d[n1], c_d[n2]) not in d.edges() and\
-               (c_d[n2], c_d[n1]) not in d.edges():
-                add_edge(
-                    d, c_d[n1], c_d[n2],
-                    get_edge(c, n1, n2)
-                )
-
-    # Add node attrs
-    for c_n in c.nodes():
-        a_keys = keys_by_value(a_c, c_n)
-        # Add attributes to the nodes which stayed invariant
-        if len(a_keys) == 1:
-            attrs_to_add = dict_sub(
-                c.node[c_n],
-                a.node[a_keys[0]]
-            )
-            add_node_attrs(d, c_d[c_n], attrs_to_add)
-        # Add attributes to the nodes which were merged
-        elif len(a_keys) > 1:
-            merged_attrs = {}
-            for k in a_keys:
-                merged_attrs = merge_attributes(
-                    merged_attrs,
-                    a.node[k]
-                )
-            attrs_to_add = dict_sub(c.node[c_n], merged_attrs)
-            add_node_attrs(d, c_d[c_n], attrs_to_add)
+            c_d[c_n] = b_d[a_b[a_keys[0]]]
+            # Add attributes to the nodes which stayed invariant
+            # or were merged
+            if len(a_keys) == 1:
+                a_attrs = a.node[a_keys[0]]
+            else:
+                a_attrs = {}
+                for k in a_keys:
+                    a_attrs = merge_attributes(a_attrs, a.node[k])
+            add_node_attrs(d, c_d[c_n], dict_sub(c.node[c_n], a_attrs))
 
-    # Add edge attrs
+    # Add edges and edge attrs
     for (n1, n2) in c.edges():
         d_n1 = c_d[n1]
         d_n2 = c_d[n2]
-        if d.is_directed():
-            attrs_to_add = dict_sub(
-                get_edge(c, n1, n2),
-                get_edge(d, d_n1, d_n2)
-            )
-            add_edge_attrs(
-                d, c_d[n1], c_d[n2],
-                attrs_to_add
-            )
+        if not d.has_edge(d_n1, d_n2):
+            add_edge(d, d_n1, d_n2, get_edge(c, n1, n2))
         else:
             attrs_to_add = dict_sub(
                 get_edge(c, n1, n2),
                 get_edge(d, d_n1, d_n2)
             )
-            add_edge_attrs(
-                d, c_d[n1], c_d[n2],
-                attrs_to_add
-            )
+            add_edge_attrs(d, d_n1, d_n2, attrs_to_add)
     return (d, b_d, c_d)
 
 
-def pullback_complement(a, b, d, a_b, b_d, inplace=False):
-    """Find the final pullback complement from a->b->d.
+def restore_after_pushout(g_m_g, g_m_g_prime):
+    """Restore a map from g_m after the in-place pushout on g_m.
 
-    Makes changes to d inplace.
+    If `g_m_g` is a `Homomorphism` whose base are the nodes of
+    `g_m`, the in-place pushout changes its base: the merged nodes
+    disappear from it and the nodes added by the pushout appear.
+    This function makes the images of the merged nodes explicit
+    and excludes the added nodes.
     """
+    if not isinstance(g_m_g, Homomorphism) or\
+            not isinstance(g_m_g_prime, Homomorphism):
+        return
+    for node in g_m_g_prime.explicit().keys():
+        if not g_m_g.is_explicit(node):
+            g_m_g[node] = node
+    g_m_g.exclude(g_m_g_prime.excluded())
 
-    check_homomorphism(a, b, a_b, total=True)
-    check_homomorphism(b, d, b_d, total=True)
+
+def pullback_complement(a, b, d, a_b, b_d, inplace=False, validation=None):
+    """Find the final pullback complement from a->b->d.
+
+    Makes changes to d inplace. The input homomorphisms are checked
+    unless the validation policy (`validation` or the policy of the
+    context) is "off".
+    """
+    if _validation_policy(validation) != "off":
+        check_homomorphism(a, b, a_b, total=True)
+        check_homomorphism(b, d, b_d, total=True)
 
     if not is_monic(b_d):
         raise InvalidHomomorphism(
@@ -594,10 +697,12 @@ def pullback_complement(a, b, d, a_b, b_d, inplace=False):
     if inplace is True:
         c = d
     else:
-        c = copy.deepcopy(d)
+        c = copy_graph(d)
 
     a_c = dict()
-    c_d = id_of(c.nodes())
+    # Identity on the nodes of c, except for the clones (removed
+    # nodes disappear from the base together with the nodes of c)
+    c_d = Homomorphism(c.nodes())
 
     # Remove/clone nodes
     for b_node in b.nodes():
@@ -605,7 +710,6 @@ def pullback_complement(a, b, d, a_b, b_d, inplace=False):
         # Remove nodes
         if len(a_keys) == 0:
             remove_node(c, b_d[b_node])
-            del c_d[b_d[b_node]]
         # Keep nodes
         elif len(a_keys) == 1:
             a_c[a_keys[0]] = b_d[b_node]
@@ -615,7 +719,6 @@ def pullback_complement(a, b, d, a_b, b_d, inplace=False):
             for k in a_keys:
                 if i == 1:
                     a_c[k] = b_d[b_node]
-                    c_d[b_d[b_node]] = b_d[b_node]
                 else:
                     new_name = clone_node(c, b_d[b_node])
                     a_c[k] = new_name
@@ -660,9 +763,187 @@ def pullback_complement(a, b, d, a_b, b_d, inplace=False):
     return (c, a_c, c_d)
 
 
-def pullback_pushout(b, c, d, b_d, c_d, pullback_filter=None):
+def pullback_complement_delta(a, b, d, a_b, b_d, validation=None):
+    """Find the final pullback complement from a->b->d in-place.
+
+    Transforms `d` into the pullback complement `c`, the work
+    done is proportional to the sizes of `a`, `b` and the
+    edges incident to the image of `b` in `d` (nodes of `d`
+    outside of this image are never visited).
+
+    Returns
+    -------
+    c : nx.(Di)Graph
+        Pullback complement (the transformed object `d`)
+    a_c : dict
+        Homomorphism from `a` to `c`
+    c_d : dict
+        Sparse homomorphism from `c` to `d`, only the clones
+        are mapped, the rest of the nodes of `c` are mapped
+        identically
+    """
+    if _validation_policy(validation) != "off":
+        check_homomorphism(a, b, a_b, total=True)
+        check_homomorphism(b, d, b_d, total=True)
+
+    if not is_monic(b_d):
+        raise InvalidHomomorphism(
+            "Second homomorphism is not monic, "
+            "cannot find final pullback complement!"
+        )
+
+    c = d
+    b_a = dict()
+    for a_node, b_node in a_b.items():
+        b_a.setdefault(b_node, []).append(a_node)
+
+    a_c = dict()
+    c_d = dict()
+
+    # Remove/clone nodes
+    for b_node in b.nodes():
+        a_keys = b_a.get(b_node, [])
+        if len(a_keys) == 0:
+            remove_node(c, b_d[b_node])
+        else:
+            a_c[a_keys[0]] = b_d[b_node]
+            for k in a_keys[1:]:
+                new_name = clone_node(c, b_d[b_node])
+                a_c[k] = new_name
+                c_d[new_name] = b_d[b_node]
+
+    # Remove edges
+    for (b_n1, b_n2) in b.edges():
+        for k1 in b_a.get(b_n1, []):
+            for k2 in b_a.get(b_n2, []):
+                if a.has_edge(k1, k2):
+                    continue
+                if c.has_edge(a_c[k1], a_c[k2]):
+                    remove_edge(c, a_c[k1], a_c[k2])
+
+    # Remove node attrs
+    for a_node in a.nodes():
+        attrs_to_remove = dict_sub(
+            b.node[a_b[a_node]],
+            a.node[a_node]
+        )
+        remove_node_attrs(c, a_c[a_node], attrs_to_remove)
+
+    # Remove edge attrs
+    for (n1, n2) in a.edges():
+        attrs_to_remove = dict_sub(
+            get_edge(b, a_b[n1], a_b[n2]),
+            get_edge(a, n1, n2)
+        )
+        remove_edge_attrs(c, a_c[n1], a_c[n2], attrs_to_remove)
+
+    return (c, a_c, c_d)
+
+
+def pushout_delta(a, b, c, a_b, a_c, validation=None):
+    """Find the pushout of the span b <- a -> c in-place.
+
+    Transforms `b` into the pushout `d`, the work done is
+    proportional to the sizes of `a`, `c` and the edges
+    incident to the image of `a` in `b` (nodes of `b`
+    outside of this image are never visited).
+
+    Returns
+    -------
+    d : nx.(Di)Graph
+        Pushout (the transformed object `b`)
+    b_d : dict
+        Sparse homomorphism from `b` to `d`, only the merged
+        nodes are mapped, the rest of the nodes of `b` are mapped
+        identically
+    c_d : dict
+        Homomorphism from `c` to `d`
+    """
+    if _validation_policy(validation) != "off":
+        check_homomorphism(a, b, a_b)
+        check_homomorphism(a, c, a_c)
+
+    d = b
+
+    c_a = dict()
+    for a_n, c_n in a_c.items():
+        c_a.setdefault(c_n, []).append(a_n)
+
+    # Union-find over the image of a in b
+    parents = dict()
+
+    def _find(n):
+        root = n
+        while parents.get(root, root) != root:
+            root = parents[root]
+        while n != root:
+            parents[n], n = root, parents[n]
+        return root
+
+    for a_keys in c_a.values():
+        root = _find(a_b[a_keys[0]])
+        for k in a_keys[1:]:
+            other_root = _find(a_b[k])
+            if other_root != root:
+                parents[root] = root
+                parents[other_root] = root
+
+    classes = dict()
+    for b_n in a_b.values():
+        if b_n in parents:
+            nodes_to_merge = classes.setdefault(_find(b_n), [])
+            if b_n not in nodes_to_merge:
+                nodes_to_merge.append(b_n)
+
+    # Merge nodes
+    b_d = dict()
+    for nodes_to_merge in classes.values():
+        if len(nodes_to_merge) > 1:
+            new_name = merge_nodes(d, nodes_to_merge)
+            for node in nodes_to_merge:
+                b_d[node] = new_name
+
+    # Add nodes and node attrs
+    c_d = dict()
+    for c_n in c.nodes():
+        a_keys = c_a.get(c_n, [])
+        if len(a_keys) == 0:
+            if c_n not in d.nodes():
+                new_name = c_n
+            else:
+                new_name = unique_node_id(d, c_n)
+            add_node(d, new_name, c.node[c_n])
+            c_d[c_n] = new_name
+        else:
+            b_n = a_b[a_keys[0]]
+            c_d[c_n] = b_d.get(b_n, b_n)
+            if len(a_keys) == 1:
+                a_attrs = a.node[a_keys[0]]
+            else:
+                a_attrs = {}
+                for k in a_keys:
+                    a_attrs = merge_attributes(a_attrs, a.node[k])
+            add_node_attrs(d, c_d[c_n], dict_sub(c.node[c_n], a_attrs))
+
+    # Add edges and edge attrs
+    for (n1, n2) in c.edges():
+        d_n1 = c_d[n1]
+        d_n2 = c_d[n2]
+        if not d.has_edge(d_n1, d_n2):
+            add_edge(d, d_n1, d_n2, get_edge(c, n1, n2))
+        else:
+            attrs_to_add = dict_sub(
+                get_edge(c, n1, n2),
+                get_edge(d, d_n1, d_n2)
+            )
+            add_edge_attrs(d, d_n1, d_n2, attrs_to_add)
+    return (d, b_d, c_d)
+
+
+def pullback_pushout(b, c, d, b_d, c_d, pullback_filter=None,
+                     validation=None):
     """Do a pullback and then a pushout."""
-    (a, a_b, a_c) = pullback(b, c, d, b_d, c_d)
+    (a, a_b, a_c) = pullback(b, c, d, b_d, c_d, validation=validation)
     if pullback_filter is not None:
         valid_nodes = [n for n in a.nodes()
                        if pullback_filter(a, b, c, d, a_b, a_c, b_d, c_d, n)]
@@ -670,7 +951,8 @@ def pullback_pushout(b, c, d, b_d, c_d, pullback_filter=None):
         a_b = restrict_mapping(valid_nodes, a_b)
         a_c = restrict_mapping(valid_nodes, a_c)
 
-    (d2, b_d2, c_d2) = pushout(a, b, c, a_b, a_c)
+    (d2, b_d2, c_d2) = pushout(
+        a, b, c, a_b, a_c, validation=_internal_validation(validation))
     d2_d = {}
     for node in b.nodes():
         d2_d[b_d2[node]] = b_d[node]
@@ -812,9 +1094,9 @@ def pushout_from_relation(g1, g2, relation, inplace=False):
     if inplace is True:
         g12 = g1
     else:
-        g12 = copy.deepcopy(g1)
+        g12 = copy_graph(g1)
 
-    g1_g12 = id_of(g12.nodes())
+    g1_g12 = Homomorphism(g12.nodes())
     g2_g12 = dict()
 
     for node in g1.nodes():
@@ -828,6 +1110,7 @@ def pushout_from_relation(g1, g2, relation, inplace=False):
             if node_id in g12.nodes():
                 node_id = unique_node_id(g12, node)
             add_node(g12, node_id, g2.node[node])
+            g1_g12.exclude([node_id])
             g2_g12[node] = node_id
         elif len(right_dict[node]) == 1:
             node_attrs_diff = dict_sub(
@@ -839,6 +1122,7 @@ def pushout_from_relation(g1, g2, relation, inplace=False):
             new_name = merge_nodes(g12, right_dict[node])
             for g1_node in right_dict[node]:
                 g1_g12[g1_node] = new_name
+            g1_g12.exclude([new_name])
             g2_g12[node] = new_name
             node_attrs_diff = dict_sub(
                 g2.node[node],
@@ -871,7 +1155,7 @@ def compose_relation_dicts(left_dict, right_dict):
 
 def image_factorization(a, b, a_b):
     """Compute the image factorization given A, B and A->B."""
-    c = copy.deepcopy(a)
+    c = copy_graph(a)
     a_c = {}
     c_b = {}
 
@@ -25,6 +25,7 @@ from networkx.exception import NetworkXNoPath
 
 from regraph.networkx import rewriting_utils
 from regraph.networkx import type_checking
+from regraph.networkx.matching import iter_backtracking_matchings
 
 from regraph.networkx.category_utils import (compose,
                                              get_unique_map_to_pullback,
@@ -37,12 +38,14 @@ from regraph.networkx.category_utils import (compose,
                                              pullback_complement,
                                              pushout,
                                              image_factorization,
-                                             pullback)
+                                             pullback,
+                                             restore_after_pushout,
+                                             _internal_validation)
+from regraph.networkx.homomorphism import Homomorphism, mapping_to_json
 from regraph.primitives import (attrs_to_json,
                                 attrs_from_json,
                                 update_node_attrs,
                                 set_edge,
-                                get_relabeled_graph,
                                 relabel_node,
                                 relabel_nodes,
                                 merge_attrs,
@@ -52,7 +55,9 @@ from regraph.primitives import (attrs_to_json,
                                 equal,
                                 update_node_attrs,
                                 update_edge_attrs,
-                                assign_attrs)
+                                assign_attrs,
+                                copy_graph,
+                                _encode_nodes)
 from regraph.utils import (is_subdict,
                            keys_by_value,
                            normalize_attrs,
@@ -152,6 +157,13 @@ class NetworkXHierarchy(nx.DiGraph):
         self.attrs = dict()
         self.directed = directed
 
+        # Cache of the nodes of the graphs grouped by their types
+        self._typing_buckets = dict()
+        # Caches of the transitive typings (by pairs of graphs and
+        # by paths in the hierarchy)
+        self._typing_cache = dict()
+        self._path_typing_cache = dict()
+
         return
 
     def __str__(self):
@@ -297,7 +309,7 @@ class NetworkXHierarchy(nx.DiGraph):
                 json_data["typing"].append({
                     "from": s_id,
                     "to": t_id,
-                    "mapping": self.adj[s][t]["mapping"],
+                    "mapping": mapping_to_json(self.adj[s][t]["mapping"]),
                     "attrs": attrs_to_json(self.adj[s][t]["attrs"])
                 })
             elif self.is_rule_typing(s, t):
@@ -335,7 +347,31 @@ class NetworkXHierarchy(nx.DiGraph):
 
     @classmethod
     def copy(cls, hierarchy):
-        return copy.deepcopy(hierarchy)
+        """Copy the hierarchy.
+
+        The graphs are copied with `regraph.primitives.copy_graph`
+        (attribute values are shared), the rest of the hierarchy
+        (typings, relations, rules) is deep-copied.
+        """
+        return hierarchy._copy()
+
+    def _copy(self):
+        """Copy the hierarchy (see `NetworkXHierarchy.copy`)."""
+        memo = dict()
+        for graph_obj in self.graph.values():
+            memo[id(graph_obj)] = graph_obj
+        new_hierarchy = copy.deepcopy(self, memo)
+        for graph_id, graph_obj in self.graph.items():
+            new_graph_obj = copy_graph(graph_obj)
+            new_hierarchy.node[graph_id]["graph"] = new_graph_obj
+            new_hierarchy.graph[graph_id] = new_graph_obj
+        return new_hierarchy
+
+    def _restore(self, hierarchy):
+        """Replace the content of the hierarchy by a copy of another one."""
+        new_hierarchy = hierarchy._copy()
+        self.__dict__.clear()
+        self.__dict__.update(new_hierarchy.__dict__)
 
     @classmethod
     def from_json(cls, json_data, ignore=None, directed=True):
@@ -712,6 +748,9 @@ class NetworkXHierarchy(nx.DiGraph):
             )
         self.remove_edge(source, target)
 
+        if isinstance(mapping, Homomorphism):
+            mapping = dict(mapping)
+
         # check if the homomorphism is valid
         check_homomorphism(
             self.node[source]["graph"],
@@ -735,6 +774,7 @@ class NetworkXHierarchy(nx.DiGraph):
                 "attrs": attrs
             }, normalize=False)
         self.typing[source][target] = self.adj[source][target]["mapping"]
+        self._invalidate_typing_caches(source)
         return
 
     def add_rule_typing(self, rule_id, graph_id, lhs_mapping,
@@ -1053,6 +1093,8 @@ class NetworkXHierarchy(nx.DiGraph):
             raise HierarchyError(
                 "Node `%s` is not defined in the hierarchy!" % node_id)
 
+        self._invalidate_typing_caches(node_id)
+
         if reconnect:
             out_graphs = self.successors(node_id)
             in_graphs = self.predecessors(node_id)
@@ -1131,6 +1173,7 @@ class NetworkXHierarchy(nx.DiGraph):
 
     def remove_edge(self, u, v):
         """Remove an edge from the hierarchy."""
+        self._invalidate_typing_caches(u)
         nx.DiGraph.remove_edge(self, u, v)
         if u in self.typing.keys():
             if v in self.typing[u].keys():
@@ -1279,13 +1322,21 @@ class NetworkXHierarchy(nx.DiGraph):
         if self.is_graph(s):
             t = path[1]
             homomorphism = self.adj[s][t]["mapping"]
-            for i in range(2, len(path)):
-                s = path[i - 1]
-                t = path[i]
-                homomorphism = compose(
-                    homomorphism,
-                    self.adj[s][t]["mapping"]
-                )
+            if len(path) > 2:
+                key = tuple(path)
+                # Copies of the cached compositions are returned, so that
+                # the callers can modify them without corrupting the cache
+                if key in self._path_typing_cache:
+                    return dict(self._path_typing_cache[key])
+                for i in range(2, len(path)):
+                    s = path[i - 1]
+                    t = path[i]
+                    homomorphism = compose(
+                        homomorphism,
+                        self.adj[s][t]["mapping"]
+                    )
+                self._path_typing_cache[key] = homomorphism
+                return dict(homomorphism)
             return homomorphism
         else:
             t = path[1]
@@ -1309,9 +1360,13 @@ class NetworkXHierarchy(nx.DiGraph):
             }
         )
         self.graph[graph_id] = self.node[graph_id]["graph"]
+        self._invalidate_typing_caches(graph_id)
 
     def _update_mapping(self, source, target, mapping):
         """Update the mapping dictionary from source to target."""
+        if isinstance(mapping, Homomorphism):
+            # Stored typings do not follow the changes of the graphs
+            mapping = dict(mapping)
         assign_attrs(
             self.adj[source][target],
             {
@@ -1321,6 +1376,115 @@ class NetworkXHierarchy(nx.DiGraph):
         )
         self.typing[source][target] = self.adj[
             source][target]["mapping"]
+        self._invalidate_typing_caches(source)
+
+    def _invalidate_typing_caches(self, graph_id=None):
+        """Invalidate cached typings affected by a change of a graph.
+
+        Changes of a graph (its nodes or the typings of its nodes)
+        affect the cached typings of this graph and of all the graphs
+        typed (transitively) by it. If `graph_id` is None, all the
+        cached typings are invalidated.
+        """
+        if graph_id is None:
+            self._typing_buckets = dict()
+            self._typing_cache = dict()
+            self._path_typing_cache = dict()
+            return
+
+        affected = {graph_id}
+        if graph_id in self.nodes():
+            affected.update(nx.ancestors(self, graph_id))
+        for cache in [self._typing_buckets, self._typing_cache]:
+            for key in list(cache.keys()):
+                if key[0] in affected or key[1] == graph_id:
+                    del cache[key]
+        for path in list(self._path_typing_cache.keys()):
+            if path[0] in affected or graph_id in path:
+                del self._path_typing_cache[path]
+
+    def _get_transitive_typings(self, graph_id):
+        """Get typings of a graph by all the graphs (transitively) typing it.
+
+        The typing by every graph is given by the union of the
+        compositions of the homomorphisms along all the paths to this
+        graph. Compositions are computed once for all the paths (in the
+        topological order of the hierarchy) and are cached until the
+        graph or one of the typings on the paths changes.
+
+        Returns
+        -------
+        typings : dict
+            Dictionary whose keys are ids of the graphs typing `graph_id`
+            and whose values are the typing dictionaries
+        """
+        descendants = nx.descendants(self, graph_id)
+        missing = [
+            t for t in descendants
+            if (graph_id, t) not in self._typing_cache.keys()]
+        if len(missing) > 0:
+            typings = dict()
+            for t in nx.topological_sort(
+                    self.subgraph(descendants.union({graph_id}))):
+                if t == graph_id:
+                    continue
+                typing = dict()
+                for p in self.predecessors(t):
+                    if p == graph_id:
+                        typing.update(self.adj[p][t]["mapping"])
+                    elif p in typings.keys():
+                        typing.update(
+                            compose(typings[p], self.adj[p][t]["mapping"]))
+                typings[t] = typing
+            for t, typing in typings.items():
+                self._typing_cache[(graph_id, t)] = typing
+        return dict(
+            (t, self._typing_cache[(graph_id, t)]) for t in descendants)
+
+    def _get_typing_bucket(self, graph_id, typing_graph):
+        """Get the nodes of a graph grouped by their types.
+
+        The result is cached in the hierarchy until the graph or
+        one of the typings on the paths to `typing_graph` changes.
+        The cached result is also recomputed if the nodes of the graph
+        were added or removed bypassing the methods of the hierarchy
+        (e.g. with `regraph.primitives`).
+
+        Returns
+        -------
+        bucket : dict
+            Dictionary whose keys are the nodes of `typing_graph` and
+            whose values are lists of the nodes of `graph_id` typed by them
+        untyped : list
+            List of the nodes of `graph_id` not typed by `typing_graph`
+
+        Raises
+        ------
+        ReGraphError
+            If `typing_graph` does not type the graph.
+        """
+        key = (graph_id, typing_graph)
+        nodes = set(self.graph[graph_id].nodes())
+        if key not in self._typing_buckets or\
+                self._typing_buckets[key][2] != nodes:
+            try:
+                typing = self.compose_path_typing(
+                    nx.shortest_path(self, graph_id, typing_graph))
+            except NetworkXNoPath:
+                raise ReGraphError(
+                    "One of the specified pattern typing graphs "
+                    "is not in the set of ancestors of '%s'" % graph_id
+                )
+            bucket = dict()
+            untyped = []
+            for node in self.graph[graph_id].nodes():
+                if node in typing.keys():
+                    bucket.setdefault(typing[node], []).append(node)
+                else:
+                    untyped.append(node)
+            self._typing_buckets[key] = (bucket, untyped, nodes)
+        bucket, untyped, _ = self._typing_buckets[key]
+        return bucket, untyped
 
     def _update_relation(self, left, right, relation):
         """Update the relation dictionaries (left and right)."""
@@ -1386,24 +1550,6 @@ class NetworkXHierarchy(nx.DiGraph):
         s = path[0]
         return self.is_rule(s)
 
-    def _get_descendants_paths(self, graph_id):
-        ancestors = dict()
-        for typing in self.successors(graph_id):
-            typing_ancestors = self._get_descendants_paths(typing)
-            if typing in ancestors.keys():
-                ancestors[typing].append([graph_id, typing])
-            else:
-                ancestors[typing] = [[graph_id, typing]]
-
-            for (anc, paths) in typing_ancestors.items():
-                if anc in ancestors.keys():
-                    for p in paths:
-                        ancestors[anc] += [[graph_id] + p]
-                else:
-                    for p in paths:
-                        ancestors[anc] = [[graph_id] + p]
-        return ancestors
-
     def add_node_type(self, graph_id, node_id, typing_dict):
         """Type a node in a graph according to `typing_dict`."""
         if node_id not in self.node[graph_id]["graph"].nodes():
@@ -1424,7 +1570,7 @@ class NetworkXHierarchy(nx.DiGraph):
         # 1. find pairs of successors that have common ancestors
         ancestors = dict()
         for n in self.successors(graph_id):
-            ancestors[n] = self._get_descendants_paths(n)
+            ancestors[n] = self._get_transitive_typings(n)
         common_ancestors = dict()
         for s1 in self.successors(graph_id):
             for s2 in self.successors(graph_id):
@@ -1447,37 +1593,41 @@ class NetworkXHierarchy(nx.DiGraph):
                 new_mapping_s2[node_id] = typing_dict[s2]
 
             for anc in ancs:
-                for p1 in ancestors[s1][anc]:
-                    for p2 in ancestors[s2][anc]:
-                        h1 = self.compose_path_typing(p1)
-                        h2 = self.compose_path_typing(p2)
-                        if compose(new_mapping_s1, h1) !=\
-                           compose(new_mapping_s2, h2):
-                            if s1 not in typing_dict.keys():
-                                type_1 = None
-                            else:
-                                type_1 = typing_dict[s1]
-                            if s2 not in typing_dict.keys():
-                                type_2 = None
-                            else:
-                                type_2 = typing_dict[s2]
-                            raise HierarchyError(
-                                "Cannot add new typing of the node `%s` in `%s`: "
-                                "typing by `%s` in  `%s` and `%s` in `%s` create "
-                                "paths that do not commute" %
-                                (node_id, graph_id, type_1, s1, type_2, s2)
-                            )
+                h1 = ancestors[s1][anc]
+                h2 = ancestors[s2][anc]
+                if compose(new_mapping_s1, h1) !=\
+                   compose(new_mapping_s2, h2):
+                    if s1 not in typing_dict.keys():
+                        type_1 = None
+                    else:
+                        type_1 = typing_dict[s1]
+                    if s2 not in typing_dict.keys():
+                        type_2 = None
+                    else:
+                        type_2 = typing_dict[s2]
+                    raise HierarchyError(
+                        "Cannot add new typing of the node `%s` in `%s`: "
+                        "typing by `%s` in  `%s` and `%s` in `%s` create "
+                        "paths that do not commute" %
+                        (node_id, graph_id, type_1, s1, type_2, s2)
+                    )
 
         # add new types (specified + inferred)
         for typing_graph, type_id in typing_dict.items():
             self.adj[graph_id][typing_graph]["mapping"].update({
                 node_id: type_id
             })
+        self._invalidate_typing_caches(graph_id)
         return
 
-    def find_matching(self, graph_id, pattern,
-                      pattern_typing=None, nodes=None):
-        """Find an instance of a pattern in a specified graph.
+    def iter_matchings(self, graph_id, pattern,
+                       pattern_typing=None, nodes=None,
+                       engine="backtracking"):
+        """Generate instances of a pattern in a specified graph.
+
+        Lazy version of `find_matching`: returns an iterator generating
+        instances as soon as they are found, so the search can be stopped
+        early. The arguments are checked when the method is called.
 
         `graph_id` -- id of a graph in the hierarchy to search for matches;
         `pattern` -- nx.(Di)Graph object defining a pattern to match;
@@ -1485,7 +1635,13 @@ class NetworkXHierarchy(nx.DiGraph):
         keys of the dictionary -- graph id that types a pattern, this graph
         should be among parents of the `graph_id` graph; values are mappings
         of nodes from pattern to the typing graph;
+        `nodes` -- subset of nodes of the graph to search for matching;
+        `engine` -- matching engine to use, "backtracking" (default)
+        or "combinations" (see `regraph.primitives.find_matching`).
         """
+        if graph_id not in self.nodes():
+            raise HierarchyError(
+                "Node '%s' is not defined in the hierarchy!" % graph_id)
         if self.is_rule(graph_id):
             raise ReGraphError(
                 "Pattern matching in a rule is not implemented!")
@@ -1529,24 +1685,58 @@ class NetworkXHierarchy(nx.DiGraph):
                     )
             pattern_typing = new_pattern_typing
 
+        if engine == "backtracking":
+            return self._iter_backtracking_matchings(
+                graph_id, pattern, pattern_typing, nodes)
+        elif engine == "combinations":
+            return iter(self._find_matching_combinations(
+                graph_id, pattern, pattern_typing, nodes))
+        else:
+            raise ReGraphError(
+                "Unknown matching engine '{}'".format(engine))
+
+    def find_matching(self, graph_id, pattern,
+                      pattern_typing=None, nodes=None,
+                      engine="backtracking", limit=None, first_only=False):
+        """Find an instance of a pattern in a specified graph.
+
+        `graph_id` -- id of a graph in the hierarchy to search for matches;
+        `pattern` -- nx.(Di)Graph object defining a pattern to match;
+        `pattern_typing` -- a dictionary that specifies a typing of a pattern,
+        keys of the dictionary -- graph id that types a pattern, this graph
+        should be among parents of the `graph_id` graph; values are mappings
+        of nodes from pattern to the typing graph;
+        `nodes` -- subset of nodes of the graph to search for matching;
+        `engine` -- matching engine to use, "backtracking" (default)
+        or "combinations" (see `regraph.primitives.find_matching`);
+        `limit` -- maximum number of instances to find;
+        `first_only` -- if True, stop at the first instance found
+        (equivalent to `limit=1`).
+        """
+        if first_only:
+            limit = 1
+        return list(itertools.islice(
+            self.iter_matchings(
+                graph_id, pattern, pattern_typing, nodes, engine),
+            limit))
+
+    def _find_matching_combinations(self, graph_id, pattern,
+                                    pattern_typing=None, nodes=None):
+        """Find matching of a pattern using the combinations engine.
+
+        Combinations of nodes and edges are enumerated in the order
+        of the integer ids of the nodes (see `regraph.networkx.node_ids`).
+        """
         if nodes is not None:
             g = self.node[graph_id]["graph"].subgraph(nodes)
         else:
             g = self.node[graph_id]["graph"]
-        labels_mapping = dict(
-            [(n, i + 1) for i, n in
-             enumerate(g.nodes())]
-        )
-        g = get_relabeled_graph(g, labels_mapping)
 
-        inverse_mapping = dict(
-            [(value, key) for key, value in labels_mapping.items()]
-        )
         if pattern_typing:
             try:
                 g_typing = dict([
                     (typing_graph, dict([
-                        (labels_mapping[k], v) for k, v in
+                        (k, v) for k, v in
                         self.compose_path_typing(
                             nx.shortest_path(self, graph_id, typing_graph)
                         ).items() if nodes is None or k in nodes
@@ -1587,13 +1777,16 @@ class NetworkXHierarchy(nx.DiGraph):
                 else:
                     if is_subdict(pattern.node[pattern_node], g.node[node]):
                         matching_nodes.add(node)
-        reduced_graph = g.subgraph(matching_nodes)
+        table, matching_ids = _encode_nodes(
+            self.node[graph_id]["graph"], matching_nodes)
         instances = []
         isomorphic_subgraphs = []
-        for sub_nodes in itertools.combinations(reduced_graph.nodes(),
-                                                len(pattern.nodes())):
-            subg = reduced_graph.subgraph(sub_nodes)
-            for edgeset in itertools.combinations(subg.edges(),
+        for sub_ids in itertools.combinations(sorted(matching_ids),
+                                              len(pattern.nodes())):
+            subg = g.subgraph(table.decode(sub_ids))
+            sub_edges = sorted(
+                subg.edges(), key=lambda e: tuple(table.encode(e)))
+            for edgeset in itertools.combinations(sub_edges,
                                                   len(pattern.edges())):
                 if g.is_directed():
                     edge_induced_graph = nx.DiGraph(list(edgeset))
@@ -1643,13 +1836,42 @@ class NetworkXHierarchy(nx.DiGraph):
                 else:
                     instances.append(mapping)
 
-        # Bring back the original labeling
-        for instance in instances:
-            for key, value in instance.items():
-                instance[key] = inverse_mapping[value]
-
         return instances
 
+    def _iter_backtracking_matchings(self, graph_id, pattern,
+                                     pattern_typing=None, nodes=None):
+        """Generate matchings of a pattern using the backtracking engine.
+
+        Candidates for typed pattern nodes are taken from the cached
+        buckets of the nodes of the graph having the same type (or not
+        typed by the respective typing graph).
+        """
+        graph = self.node[graph_id]["graph"]
+        candidates = None
+        if pattern_typing:
+            candidates = dict()
+            for pattern_node in pattern.nodes():
+                node_candidates = None
+                for typing_graph, (typing, _) in pattern_typing.items():
+                    if pattern_node not in typing.keys():
+                        continue
+                    bucket, untyped = self._get_typing_bucket(
+                        graph_id, typing_graph)
+                    typed_nodes = bucket.get(typing[pattern_node], []) +\
+                        untyped
+                    if node_candidates is None:
+                        node_candidates = typed_nodes
+                    else:
+                        typed_nodes = set(typed_nodes)
+                        node_candidates = [
+                            n for n in node_candidates if n in typed_nodes]
+                if node_candidates is not None:
+                    candidates[pattern_node] = node_candidates
+
+        return iter_backtracking_matchings(
+            graph, pattern, nodes,
+            attrs_check=is_subdict, candidates=candidates)
+
     def find_rule_matching(self, graph_id, rule_id):
         """Find matching of a rule `rule_id` form the hierarchy."""
         if self.is_rule(graph_id):
@@ -1715,6 +1937,8 @@ class NetworkXHierarchy(nx.DiGraph):
 
     def apply_rule_hierarchy(self, rule_hierarchy, instances, inplace=False):
         """Rewrite and propagate from precomputed rule propagations."""
+        # Rule hierarchies and their instances are produced by regraph
+        validation = _internal_validation()
         updated_graphs = {}
         # Apply rules to the hierarchy
         for graph_id, rule in rule_hierarchy["rules"].items():
@@ -1722,25 +1946,25 @@ class NetworkXHierarchy(nx.DiGraph):
             if rule.is_restrictive():
                 g_m, p_g_m, g_m_g =\
                     pullback_complement(rule.p, rule.lhs, self.graph[graph_id],
-                                        rule.p_lhs, instance, inplace)
+                                        rule.p_lhs, instance, inplace,
+                                        validation=validation)
             else:
                 g_m = self.graph[graph_id]
                 p_g_m = {
                     k: instance[v]
                     for k, v in rule.p_lhs.items()
                 }
-                g_m_g = {
-                    n: n for n in g_m.nodes()
-                }
+                g_m_g = Homomorphism(g_m.nodes())
 
             if rule.is_relaxing():
                 g_prime, g_m_g_prime, r_g_prime = pushout(rule.p, g_m, rule.rhs,
-                                                          p_g_m, rule.p_rhs, inplace)
+                                                          p_g_m, rule.p_rhs, inplace,
+                                                          validation=validation)
+                if inplace:
+                    restore_after_pushout(g_m_g, g_m_g_prime)
             else:
                 g_prime = g_m
-                g_m_g_prime = {
-                    n: n for n in g_m.nodes()
-                }
+                g_m_g_prime = Homomorphism(g_m.nodes())
                 r_g_prime = {
                     v: p_g_m[k]
                     for k, v in rule.p_rhs.items()
@@ -1818,7 +2042,7 @@ class NetworkXHierarchy(nx.DiGraph):
                 relations=relations)
             return (self, {k: v["r_g_prime"] for k, v in updated_graphs.items()})
         else:
-            new_graph = copy.deepcopy(self)
+            new_graph = self._copy()
             new_graph._update(
                 graphs={k: v["g_result"] for k, v in updated_graphs.items()},
                 homomorphisms=homomorphisms,
@@ -1886,7 +2110,7 @@ class NetworkXHierarchy(nx.DiGraph):
 
             return (self, r_g_prime)
         else:
-            new_graph = copy.deepcopy(self)
+            new_graph = self._copy()
             rewriting_utils._apply_changes(
                 new_graph, upstream_changes, downstream_changes)
             return (new_graph, r_g_prime)
@@ -1939,20 +2163,11 @@ class NetworkXHierarchy(nx.DiGraph):
 
     def get_descendants(self, graph_id, maybe=None):
         """Return descendants of a graph with the typing morphisms."""
-        descendants = dict()
-        for _, typing in self.out_edges(graph_id):
-            mapping = self.adj[graph_id][typing]["mapping"]
-            typing_descendants = self.get_descendants(typing, maybe)
-            if typing in descendants.keys():
-                descendants[typing].update(mapping)
-            else:
-                descendants[typing] = mapping
-            for anc, typ in typing_descendants.items():
-                if anc in descendants.keys():
-                    descendants[anc].update(compose(mapping, typ))
-                else:
-                    descendants[anc] = compose(mapping, typ)
-        return descendants
+        # Copies of the cached typings are returned, so that the callers
+        # can modify them without corrupting the cache
+        return dict(
+            (t, dict(typing))
+            for t, typing in self._get_transitive_typings(graph_id).items())
 
     def to_nx_graph(self):
         """Create a simple networkx graph representing the hierarchy."""
@@ -2062,6 +2277,7 @@ class NetworkXHierarchy(nx.DiGraph):
                 (node, graph_id)
             )
         relabel_node(self.node[graph_id]["graph"], node, new_name)
+        self._invalidate_typing_caches(graph_id)
         for (source, _) in self.in_edges(graph_id):
             self.adj[source][graph_id].rename_target(node, new_name)
         for (_, target) in self.out_edges(graph_id):
@@ -2078,14 +2294,15 @@ class NetworkXHierarchy(nx.DiGraph):
         """Get typing dict of `source` by `target`."""
         if (source, target) in self.edges():
             return self.adj[source][target]["mapping"]
+        elif (source, target) in self._typing_cache.keys():
+            return dict(self._typing_cache[(source, target)])
         else:
-            try:
-                path = nx.shortest_path(self, source, target)
-            except:
+            if source not in self.nodes() or\
+               target not in self._get_transitive_typings(source).keys():
                 raise HierarchyError(
                     "No path from '{}' to '{}' in the hierarchy".format(
                         source, target))
-            return self.compose_path_typing(path)
+            return dict(self._typing_cache[(source, target)])
 
     def get_relation(self, left, right):
         """Get relation dictionary."""
@@ -2094,6 +2311,7 @@ class NetworkXHierarchy(nx.DiGraph):
     def set_node_typing(self, source_graph, target_graph, node_id, type_id):
         """Set typing to of a particular node."""
         self.adj[source_graph][target_graph]["mapping"][node_id] = type_id
+        self._invalidate_typing_caches(source_graph)
 
     def get_rule_typing(self, source, target):
         """Get typing dict of `source` by `target` (`source` is rule)."""
@@ -2297,6 +2515,7 @@ class NetworkXHierarchy(nx.DiGraph):
 
         for node in hierarchy.nodes():
             _merge_node(node)
+        self._invalidate_typing_caches()
 
     def merge_by_attr(self, hierarchy, attr):
         """Merge with a hierarchy by nodes with matching attr."""
@@ -2485,6 +2704,7 @@ class NetworkXHierarchy(nx.DiGraph):
 
         for node in hierarchy.nodes():
             _merge_node(node)
+        self._invalidate_typing_caches()
 
         return new_names
 
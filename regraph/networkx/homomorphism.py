@@ -0,0 +1,200 @@
+"""Homomorphisms with an implicit identity part.
+
+Rewriting of a graph changes only a small part of it, the maps
+between the nodes of the graph before and after rewriting (or of the
+intermediate graphs of the rewriting) are, therefore, mostly identical.
+`Homomorphism` is a mapping storing only the entries that differ from
+the identity over a collection of elements (for example, the nodes of
+a graph), instead of materializing `{n: n for n in graph.nodes()}`.
+
+It can be used in place of a dictionary by all the functions
+manipulating homomorphisms (`compose`, `check_homomorphism`, ...).
+"""
+import copy
+
+from regraph.exceptions import ReGraphError
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+
+class Homomorphism(MutableMapping):
+    """Mapping with an implicit identity part.
+
+    Every element of the base collection is mapped to itself,
+    unless it is explicitly mapped to another element or excluded
+    from the domain of the mapping.
+
+    The base collection is not copied (it can be, for example, a
+    view of the nodes of a graph), therefore, a homomorphism follows
+    the changes of its base.
+
+    Attributes
+    ----------
+    _base : collection
+        Collection of elements mapped identically
+    _mapping : dict
+        Dictionary of explicit entries (they override the identity
+        of the elements of the base)
+    _excluded : set
+        Set of elements of the base that are not in the domain
+        of the mapping
+    """
+
+    def __init__(self, base=None, mapping=None):
+        """Initialize a homomorphism.
+
+        Parameters
+        ----------
+        base : collection, optional
+            Collection of elements mapped identically
+        mapping : dict, optional
+            Explicit entries of the homomorphism
+        """
+        if base is None:
+            base = frozenset()
+        self._base = base
+        self._mapping = dict()
+        self._excluded = set()
+        if mapping is not None:
+            self.update(mapping)
+
+    @property
+    def base(self):
+        """Collection of elements mapped identically."""
+        return self._base
+
+    def explicit(self):
+        """Return the dictionary of explicit entries."""
+        return dict(self._mapping)
+
+    def excluded(self):
+        """Return the set of elements excluded from the identity part."""
+        return set(self._excluded)
+
+    def shares_base(self, other):
+        """Test if the homomorphism has the same base as another one.
+
+        Views of the nodes of the same graph are considered the same
+        base (networkx creates a new view at every call of `nodes()`).
+        """
+        if not isinstance(other, Homomorphism):
+            return False
+        if self._base is other._base:
+            return True
+        nodes = getattr(self._base, "_nodes", None)
+        return nodes is not None and\
+            nodes is getattr(other._base, "_nodes", None)
+
+    def is_explicit(self, key):
+        """Test if the element is explicitly mapped."""
+        return key in self._mapping
+
+    def exclude(self, keys):
+        """Exclude elements from the identity part of the homomorphism.
+
+        Explicit entries are not affected.
+        """
+        self._excluded.update(keys)
+
+    def __getitem__(self, key):
+        """Get the image of an element."""
+        if key in self._mapping:
+            return self._mapping[key]
+        if key in self._base and key not in self._excluded:
+            return key
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        """Test if the element is in the domain of the homomorphism."""
+        return key in self._mapping or (
+            key in self._base and key not in self._excluded)
+
+    def __setitem__(self, key, value):
+        """Map an element explicitly."""
+        self._mapping[key] = value
+
+    def __delitem__(self, key):
+        """Remove an element from the domain of the homomorphism."""
+        if key not in self:
+            raise KeyError(key)
+        self._mapping.pop(key, None)
+        if key in self._base:
+            self._excluded.add(key)
+
+    def __iter__(self):
+        """Iterate over the domain of the homomorphism."""
+        for key in self._base:
+            if key not in self._mapping and key not in self._excluded:
+                yield key
+        for key in self._mapping:
+            yield key
+
+    def __len__(self):
+        """Return the size of the domain of the homomorphism."""
+        length = len(self._base) + len(self._mapping)
+        for key in self._excluded:
+            if key in self._base and key not in self._mapping:
+                length -= 1
+        for key in self._mapping:
+            if key in self._base:
+                length -= 1
+        return length
+
+    def __repr__(self):
+        """Return the representation of the homomorphism."""
+        return "{}({!r})".format(type(self).__name__, dict(self))
+
+    def __copy__(self):
+        """Copy the homomorphism (the base is shared)."""
+        result = type(self)(self._base)
+        result._mapping = dict(self._mapping)
+        result._excluded = set(self._excluded)
+        return result
+
+    def __deepcopy__(self, memo):
+        """Deep copy the homomorphism (the base is shared)."""
+        result = type(self)(self._base)
+        result._mapping = copy.deepcopy(self._mapping, memo)
+        result._excluded = copy.deepcopy(self._excluded, memo)
+        return result
+
+    def copy(self):
+        """Copy the homomorphism (the base is shared)."""
+        return self.__copy__()
+
+    def compose(self, other):
+        """Compose with a homomorphism sharing the same base.
+
+        The result is a sparse homomorphism over the same base,
+        for other mappings see `regraph.networkx.category_utils.compose`.
+        """
+        if not self.shares_base(other):
+            raise ReGraphError(
+                "Cannot compose sparsely homomorphisms "
+                "with different bases!")
+        result = type(self)(self._base)
+        result._excluded = self._excluded.union(other._excluded)
+        for key, value in self._mapping.items():
+            if value in other:
+                result._mapping[key] = other[value]
+            elif key in self._base:
+                result._excluded.add(key)
+        for key, value in other._mapping.items():
+            if key in self._base and key not in self._mapping and\
+                    key not in self._excluded:
+                result._mapping[key] = value
+        return result
+
+    def to_json(self):
+        """Convert the homomorphism to a JSON-serializable dictionary."""
+        return dict(self)
+
+
+def mapping_to_json(mapping):
+    """Convert a mapping (dictionary or `Homomorphism`) to JSON repr."""
+    if isinstance(mapping, Homomorphism):
+        return mapping.to_json()
+    return mapping
@@ -0,0 +1,256 @@
+"""A collection of (internal usage) utils for subgraph matching.
+
+This module implements a backtracking subgraph matching procedure
+(in the spirit of VF2++) used by `regraph.primitives.find_matching`
+and `NetworkXHierarchy.find_matching`. The procedure:
+
+* computes for every pattern node a set of candidate nodes of the graph
+  (attribute inclusion, self-loops and degree constraints are checked
+  up front, if the graph has an attached attribute index, see
+  `regraph.networkx.attribute_index`, only the nodes selected by the
+  index are tested, if the graph has a columnar attribute store, see
+  `regraph.networkx.attribute_store`, attribute inclusion is tested
+  once per distinct attribute value);
+* orders pattern nodes so that every next node is connected to
+  the already matched ones whenever possible;
+* extends partial matchings along the pattern edges using adjacency
+  lookups in the graph and checks edge attributes incrementally.
+
+The instances found are injective maps from the nodes of the pattern to
+the nodes of the graph that preserve edges (not necessarily induced),
+such that the attributes of the pattern nodes and edges are included
+in the attributes of their images.
+"""
+from regraph.utils import valid_attributes
+
+
+def _candidate_nodes(graph, pattern, nodes=None, attrs_check=None,
+                     node_filter=None, candidates=None, checked=False):
+    """Find candidate nodes of the graph for every node of the pattern.
+
+    Returns
+    -------
+    candidates : dict
+        Dictionary whose keys are nodes of the pattern and whose values
+        are lists of candidate nodes of the graph.
+    """
+    if attrs_check is None:
+        attrs_check = valid_attributes
+    if nodes is None:
+        nodes = graph.nodes()
+        node_set = nodes
+    else:
+        nodes = [n for n in nodes if n in graph.nodes()]
+        node_set = set(nodes)
+    directed = graph.is_directed()
+
+    # Use the attribute index only if it is in sync with the graph
+    index = getattr(graph, "_attribute_index", None)
+    if index is not None and not index.in_sync(graph):
+        index = None
+    # Columnar attribute store can be scanned for attribute inclusion
+    store = getattr(graph, "_attribute_stores", (None, None))[0]
+    if attrs_check is not valid_attributes:
+        store = None
+
+    result = dict()
+    for pattern_node in pattern.nodes():
+        pattern_attrs = pattern.node[pattern_node]
+        loop = pattern_node in pattern.adj[pattern_node]
+        out_degree = len(pattern.adj[pattern_node])
+        in_degree = len(pattern.pred[pattern_node]) if directed else 0
+
+        node_pool = nodes
+        if candidates is not None and pattern_node in candidates.keys():
+            node_pool = [
+                n for n in candidates[pattern_node] if n in node_set]
+        elif index is not None:
+            indexed_nodes = index.candidates(pattern_attrs)
+            if indexed_nodes is not None:
+                node_pool = [n for n in indexed_nodes if n in node_set]
+        elif store is not None and len(pattern_attrs) > 0:
+            selected = store.including(pattern_attrs)
+            node_pool = [
+                n for n in nodes if selected[graph.node[n].row]]
+
+        if checked and candidates is not None and\
+                pattern_node in candidates.keys():
+            result[pattern_node] = [
+                n for n in node_pool
+                if node_filter is None or node_filter(pattern_node, n)]
+            continue
+
+        node_candidates = []
+        for node in node_pool:
+            if loop and (node not in graph.adj[node] or not attrs_check(
+                    pattern.adj[pattern_node][pattern_node],
+                    graph.adj[node][node])):
+                continue
+            if len(graph.adj[node]) < out_degree:
+                continue
+            if directed and len(graph.pred[node]) < in_degree:
+                continue
+            if node_filter is not None and\
+                    not node_filter(pattern_node, node):
+                continue
+            if attrs_check(pattern_attrs, graph.node[node]):
+                node_candidates.append(node)
+        result[pattern_node] = node_candidates
+    return result
+
+
+def _matching_order(pattern, candidates):
+    """Find the order in which pattern nodes are going to be matched.
+
+    The next node to match is the one with the largest number of
+    connections to the already ordered nodes, the ties are resolved by
+    the smallest number of candidates.
+    """
+    position = dict((n, i) for i, n in enumerate(pattern.nodes()))
+    directed = pattern.is_directed()
+
+    def _neighbors(n):
+        if directed:
+            return set(pattern.adj[n]).union(pattern.pred[n])
+        return set(pattern.adj[n])
+
+    order = []
+    remaining = set(pattern.nodes())
+    connections = dict((n, 0) for n in remaining)
+    while len(remaining) > 0:
+        next_node = min(
+            remaining,
+            key=lambda n: (-connections[n], len(candidates[n]), position[n]))
+        order.append(next_node)
+        remaining.remove(next_node)
+        for neighbor in _neighbors(next_node):
+            if neighbor in remaining:
+                connections[neighbor] += 1
+    return order
+
+
+def _edge_constraints(pattern, order):
+    """Collect edges between every pattern node and the preceding ones.
+
+    Returns a list (aligned with `order`) of lists of triples
+    `(previous_node, outgoing, edge_attrs)`, where `outgoing` is True
+    if the edge goes from the current node to `previous_node`.
+    """
+    directed = pattern.is_directed()
+    constraints = []
+    visited = set()
+    for node in order:
+        node_constraints = []
+        for neighbor, attrs in pattern.adj[node].items():
+            if neighbor in visited:
+                node_constraints.append((neighbor, True, attrs))
+        if directed:
+            for neighbor, attrs in pattern.pred[node].items():
+                if neighbor in visited:
+                    node_constraints.append((neighbor, False, attrs))
+        constraints.append(node_constraints)
+        visited.add(node)
+    return constraints
+
+
+def iter_backtracking_matchings(graph, pattern, nodes=None,
+                                attrs_check=None, node_filter=None,
+                                candidates=None, checked=False):
+    """Generate matchings of a pattern in a graph by backtracking.
+
+    Parameters
+    ----------
+    graph : nx.(Di)Graph
+    pattern : nx.(Di)Graph
+        Pattern graph to search for
+    nodes : iterable, optional
+        Subset of nodes to search for matching
+    attrs_check : callable, optional
+        Function testing inclusion of the attrs of a pattern element
+        (first argument) into the attrs of a graph element (second
+        argument), by default `regraph.utils.valid_attributes`
+    node_filter : callable, optional
+        Additional predicate on pairs (pattern node, graph node)
+        restricting the candidates for pattern nodes
+    candidates : dict, optional
+        Dictionary whose keys are (some of the) pattern nodes and whose
+        values are collections of nodes of the graph, only these nodes
+        are considered as candidates for the respective pattern nodes
+    checked : bool, optional
+        If True, the nodes given in `candidates` are known to satisfy
+        the attribute, degree and self-loop constraints of the respective
+        pattern nodes, these constraints are not tested again (only
+        `nodes` and `node_filter` restrict the candidates)
+
+    Yields
+    ------
+    instance : dict
+        Matching instance, a dictionary whose keys are nodes of the
+        pattern, and whose values are corresponding nodes of the graph.
+    """
+    if attrs_check is None:
+        attrs_check = valid_attributes
+
+    candidates = _candidate_nodes(
+        graph, pattern, nodes, attrs_check, node_filter, candidates,
+        checked)
+    for node_candidates in candidates.values():
+        if len(node_candidates) == 0:
+            return
+
+    order = _matching_order(pattern, candidates)
+    constraints = _edge_constraints(pattern, order)
+    candidate_sets = dict(
+        (n, set(node_candidates)) for n, node_candidates in candidates.items())
+
+    directed = graph.is_directed()
+    successors = graph.adj
+    predecessors = graph.pred if directed else graph.adj
+
+    mapping = dict()
+    used = set()
+
+    def _generate_nodes(depth):
+        pattern_node = order[depth]
+        if len(constraints[depth]) == 0:
+            return candidates[pattern_node]
+        # Extend the matching along an edge to the matched part
+        neighbor, outgoing, _ = constraints[depth][0]
+        if outgoing:
+            adjacent = predecessors[mapping[neighbor]]
+        else:
+            adjacent = successors[mapping[neighbor]]
+        node_candidates = candidate_sets[pattern_node]
+        return [n for n in adjacent if n in node_candidates]
+
+    def _consistent(depth, node):
+        for neighbor, outgoing, pattern_attrs in constraints[depth]:
+            if outgoing:
+                s, t = node, mapping[neighbor]
+            else:
+                s, t = mapping[neighbor], node
+            if t not in successors[s]:
+                return False
+            if not attrs_check(pattern_attrs, successors[s][t]):
+                return False
+        return True
+
+    def _extend(depth):
+        if depth == len(order):
+            yield dict(mapping)
+            return
+        pattern_node = order[depth]
+        for node in _generate_nodes(depth):
+            if node in used:
+                continue
+            if not _consistent(depth, node):
+                continue
+            mapping[pattern_node] = node
+            used.add(node)
+            for instance in _extend(depth + 1):
+                yield instance
+            del mapping[pattern_node]
+            used.remove(node)
+
+    for instance in _extend(0):
+        yield instance
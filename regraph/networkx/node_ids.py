@@ -0,0 +1,170 @@
+"""Interning and allocation of node ids of NetworkX graphs.
+
+A table of integer ids of the nodes can be attached to a
+`networkx.(Di)Graph` object with `regraph.primitives.add_node_id_table`,
+after which it is kept up to date by the node manipulation functions of
+`regraph.primitives` (in the same way as the attribute index, see
+`regraph.networkx.attribute_index`). Modifications of the graph bypassing
+`regraph.primitives` are not reflected in the table (it can be rebuilt
+with `NodeIdTable.rebuild`).
+
+Integer ids are assigned in the order in which the nodes are added to
+the graph and are not reused, therefore, ordering nodes by their
+integer ids reproduces the order of the nodes of the graph. The table
+is used by the computations that need a deterministic order of the
+nodes (e.g. the "combinations" matching engine) instead of relabeling
+the graph to integers on every call.
+
+Fresh node ids (for clones, merged or added nodes whose ids are taken)
+are generated by `NodeIdAllocator`, which remembers the suffix of the
+last id generated for every prefix and, therefore, does not probe all
+the previously generated ids every time a new one is requested.
+"""
+
+
+class NodeIdTable(object):
+    """Bidirectional table of integer ids of nodes.
+
+    Attributes
+    ----------
+    _ids : dict
+        Dictionary whose keys are nodes and whose values are
+        their integer ids
+    _nodes : list
+        Nodes indexed by their integer ids (None for the ids of
+        removed nodes)
+    """
+
+    def __init__(self, graph=None):
+        """Initialize a table (optionally, of the nodes of a graph)."""
+        self._ids = dict()
+        self._nodes = []
+        if graph is not None:
+            self.rebuild(graph)
+
+    def __len__(self):
+        """Return the number of nodes in the table."""
+        return len(self._ids)
+
+    def __contains__(self, node_id):
+        """Test if the node is in the table."""
+        return node_id in self._ids
+
+    def __getitem__(self, node_id):
+        """Get the integer id of a node.
+
+        Raises
+        ------
+        KeyError
+            If the node is not in the table.
+        """
+        return self._ids[node_id]
+
+    def in_sync(self, graph):
+        """Test if the nodes of the table are the nodes of the graph."""
+        return self._ids.keys() == graph._node.keys()
+
+    def copy(self):
+        """Copy the table."""
+        new_table = NodeIdTable()
+        new_table._ids = dict(self._ids)
+        new_table._nodes = list(self._nodes)
+        return new_table
+
+    def rebuild(self, graph):
+        """Rebuild the table from the nodes of the graph."""
+        self._nodes = list(graph.nodes())
+        self._ids = dict((n, i) for i, n in enumerate(self._nodes))
+
+    def add_node(self, node_id):
+        """Add a node to the table (if it is not there)."""
+        if node_id not in self._ids:
+            self._ids[node_id] = len(self._nodes)
+            self._nodes.append(node_id)
+
+    def remove_node(self, node_id):
+        """Remove a node from the table."""
+        i = self._ids.pop(node_id, None)
+        if i is None:
+            return
+        self._nodes[i] = None
+        if len(self._nodes) > 2 * len(self._ids) + 16:
+            # Make the ids dense again (preserving their order)
+            self._nodes = [n for n in self._nodes if n is not None]
+            self._ids = dict((n, i) for i, n in enumerate(self._nodes))
+
+    def node(self, i):
+        """Get the node with the integer id."""
+        node_id = self._nodes[i]
+        if node_id is None:
+            raise KeyError(i)
+        return node_id
+
+    def encode(self, nodes):
+        """Get the list of integer ids of the nodes."""
+        ids = self._ids
+        return [ids[n] for n in nodes]
+
+    def decode(self, ids):
+        """Get the list of nodes with the integer ids."""
+        return [self.node(i) for i in ids]
+
+    def sorted(self, nodes):
+        """Sort the nodes by their integer ids."""
+        return sorted(nodes, key=self._ids.__getitem__)
+
+
+class NodeIdAllocator(object):
+    """Allocator of fresh node ids of the form `prefix + suffix`.
+
+    Suffixes are consecutive integers starting from 1. The allocator
+    stores, for every prefix (and template), the next suffix to try,
+    and the candidate ids are still tested against the collection of
+    existing ids, so the ids created by the user (or by another
+    allocator) are never returned. The generated ids coincide with
+    the ones obtained by probing the suffixes from 1 upwards, unless
+    some of the ids generated earlier were removed (such ids are
+    not reused).
+
+    Attributes
+    ----------
+    _next : dict
+        Dictionary whose keys are pairs (prefix, template) and whose
+        values are the next suffixes to try
+    """
+
+    def __init__(self):
+        """Initialize an allocator."""
+        self._next = dict()
+
+    def copy(self):
+        """Copy the allocator."""
+        new_allocator = NodeIdAllocator()
+        new_allocator._next = dict(self._next)
+        return new_allocator
+
+    def new_id(self, collection, prefix, template="{}_{}"):
+        """Generate an id not contained in the collection.
+
+        Parameters
+        ----------
+        collection : container
+            Collection of existing ids (supporting `in`)
+        prefix : hashable
+            Prefix of the new id
+        template : str, optional
+            Format string producing the id from the prefix and
+            the integer suffix
+
+        Returns
+        -------
+        new_id : str
+        """
+        key = (prefix, template)
+        i = self._next.get(key, 1)
+        new_id = template.format(prefix, i)
+        while new_id in collection:
+            i += 1
+            new_id = template.format(prefix, i)
+        self._next[key] = i + 1
+        return new_id
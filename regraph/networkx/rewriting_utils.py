@@ -16,21 +16,30 @@ from regraph.networkx.category_utils import (compose,
                                              pushout,
                                              pullback,
                                              pushout_from_relation,
-                                             image_factorization)
+                                             image_factorization,
+                                             restore_after_pushout,
+                                             _internal_validation)
 from regraph import primitives
 from regraph.exceptions import TotalityWarning
+from regraph.networkx.homomorphism import Homomorphism
 from regraph.rules import Rule, compose_rules
 from regraph.utils import keys_by_value
 
 
 def _rewrite_base(hierarchy, graph_id, rule, instance,
                   rhs_typing, inplace=False):
+    # The instance is checked by the hierarchy before rewriting
+    validation = _internal_validation()
     g_m, p_g_m, g_m_g =\
         pullback_complement(rule.p, rule.lhs, hierarchy.get_graph(graph_id),
-                            rule.p_lhs, instance, inplace)
+                            rule.p_lhs, instance, inplace,
+                            validation=validation)
 
     g_prime, g_m_g_prime, r_g_prime = pushout(rule.p, g_m, rule.rhs,
-                                              p_g_m, rule.p_rhs, inplace)
+                                              p_g_m, rule.p_rhs, inplace,
+                                              validation=validation)
+    if inplace:
+        restore_after_pushout(g_m_g, g_m_g_prime)
 
     relation_updates = []
     for related_g in hierarchy.adjacent_relations(graph_id):
@@ -108,7 +117,7 @@ def _propagate_rule_up(graph, origin_typing, rule, instance, p_origin,
     if inplace is True:
         graph_prime = graph
     else:
-        graph_prime = copy.deepcopy(graph)
+        graph_prime = primitives.copy_graph(graph)
 
     if p_typing is None:
         p_typing = {}
@@ -119,7 +128,8 @@ def _propagate_rule_up(graph, origin_typing, rule, instance, p_origin,
     p_removed_edge_attrs = rule.removed_edge_attrs()
     lhs_cloned_nodes = rule.cloned_nodes()
 
-    graph_prime_graph = id_of(graph.nodes())
+    # Identity on the nodes of graph_prime, except for the clones
+    graph_prime_graph = Homomorphism(graph_prime.nodes())
     graph_prime_origin = copy.deepcopy(origin_typing)
 
     for lhs_node in rule.lhs.nodes():
@@ -130,7 +140,6 @@ def _propagate_rule_up(graph, origin_typing, rule, instance, p_origin,
             if lhs_node in lhs_removed_nodes:
                 primitives.remove_node(
                     graph_prime, node)
-                del graph_prime_graph[node]
                 del graph_prime_origin[node]
             else:
                 graph_prime_origin[node] = origin_node
@@ -143,7 +152,6 @@ def _propagate_rule_up(graph, origin_typing, rule, instance, p_origin,
             for i, p_node in enumerate(p_nodes):
                 if i == 0:
                     graph_prime_origin[node] = p_origin[p_node]
-                    graph_prime_graph[node] = node
                 else:
                     new_name = primitives.clone_node(
                         graph_prime,
@@ -597,11 +605,13 @@ def _get_rule_liftings(hierarchy, origin_id, rule, instance,
                         l_g, l_g_g, l_g_l = pullback(
                             hierarchy.get_graph(graph), rule.lhs,
                             hierarchy.get_graph(origin_id),
-                            origin_typing, instance)
+                            origin_typing, instance,
+                            validation=_internal_validation())
 
                         # Compute canonical P_G
                         canonical_p_g, p_g_l_g, p_g_p = pullback(
-                            l_g, rule.p, rule.lhs, l_g_l, rule.p_lhs)
+                            l_g, rule.p, rule.lhs, l_g_l, rule.p_lhs,
+                            validation=_internal_validation())
 
                         # Remove controlled things from P_G
                         if graph in p_typing.keys():
@@ -654,7 +664,8 @@ def _get_rule_projections(hierarchy, origin_id, rule, instance,
                     # Compute canonical R_T
                     r_t, l_t_r_t, r_r_t = pushout(
                         rule.p, l_t, rule.rhs,
-                        l_l_t, rule.p_rhs)
+                        l_l_t, rule.p_rhs,
+                        validation=_internal_validation())
 
                     # Modify P_T and R_T according to the controlling
                     # relation rhs_typing
@@ -871,7 +882,8 @@ def _refine_rule_hierarchy(hierarchy, rule_hierarchy, lhs_instances):
                     # Find a typing of ancestor by the graph
                     l_pred, l_pred_pred, l_pred_l_graph = pullback(
                         hierarchy.get_graph(ancestor), rule.lhs,
-                        hierarchy.get_graph(graph), typing, new_lhs_instances[graph])
+                        hierarchy.get_graph(graph), typing, new_lhs_instances[graph],
+                        validation=_internal_validation())
                     new_rules[ancestor] = Rule(p=l_pred, lhs=l_pred)
                     new_lhs_instances[ancestor] = l_pred_pred
                     r_pred_r_graph = {
@@ -23,15 +23,309 @@ from regraph.utils import (merge_attributes,
                            attrs_to_json,
                            attrs_from_json,
                            generate_new_id,
-                           safe_deepcopy_dict)
+                           copy_attrs)
 from regraph.exceptions import (ReGraphError,
                                 GraphError,
                                 GraphAttrsWarning)
 from regraph.attribute_sets import (FiniteSet)
+from regraph.networkx.attribute_index import AttributeIndex
+from regraph.networkx.attribute_store import AttributeStore
+from regraph.networkx.node_ids import NodeIdTable, NodeIdAllocator
+from regraph.networkx.matching import iter_backtracking_matchings
 
 
 def generate_new_node_id(graph, basename):
-    return generate_new_id(graph.nodes(), basename)
+    return generate_new_id(
+        graph.nodes(), basename, _node_id_allocator(graph))
+
+
+def _node_id_allocator(graph):
+    """Get the allocator of fresh node ids of a graph (attached lazily)."""
+    allocator = getattr(graph, "_node_id_allocator", None)
+    if allocator is None:
+        allocator = NodeIdAllocator()
+        graph._node_id_allocator = allocator
+    return allocator
+
+
+def add_attribute_index(graph):
+    """Attach an inverted index of node attributes to a graph.
+
+    The index is kept up to date by the node manipulation functions
+    of this module and is used by `find_matching` to select candidate
+    nodes. Note that modifications of the graph that bypass the
+    primitives are not reflected in the index.
+
+    Parameters
+    ----------
+    graph : networkx.(Di)Graph
+
+    Returns
+    -------
+    index : regraph.networkx.attribute_index.AttributeIndex
+        Index attached to the graph.
+
+    Raises
+    ------
+    ReGraphError
+        If the graph is not a NetworkX graph.
+    """
+    if not (isinstance(graph, nx.DiGraph) or isinstance(graph, nx.Graph)):
+        raise ReGraphError(
+            "Attribute index is not available for graphs '{}'!".format(
+                type(graph)))
+    index = AttributeIndex(graph)
+    graph._attribute_index = index
+    return index
+
+
+def get_attribute_index(graph):
+    """Get an inverted index of node attributes attached to a graph.
+
+    Returns
+    -------
+    index : regraph.networkx.attribute_index.AttributeIndex or None
+        Index attached to the graph, None if the graph is not indexed.
+    """
+    return getattr(graph, "_attribute_index", None)
+
+
+def remove_attribute_index(graph):
+    """Detach an inverted index of node attributes from a graph."""
+    if get_attribute_index(graph) is not None:
+        del graph._attribute_index
+
+
+def add_node_id_table(graph):
+    """Attach a table of integer ids of the nodes to a graph.
+
+    The table is kept up to date by the node manipulation functions
+    of this module. Note that modifications of the graph that bypass
+    the primitives are not reflected in the table.
+
+    Parameters
+    ----------
+    graph : networkx.(Di)Graph
+
+    Returns
+    -------
+    table : regraph.networkx.node_ids.NodeIdTable
+        Table attached to the graph.
+
+    Raises
+    ------
+    ReGraphError
+        If the graph is not a NetworkX graph.
+    """
+    if not (isinstance(graph, nx.DiGraph) or isinstance(graph, nx.Graph)):
+        raise ReGraphError(
+            "Node id table is not available for graphs '{}'!".format(
+                type(graph)))
+    table = NodeIdTable(graph)
+    graph._node_id_table = table
+    return table
+
+
+def get_node_id_table(graph):
+    """Get a table of integer ids of the nodes attached to a graph.
+
+    Returns
+    -------
+    table : regraph.networkx.node_ids.NodeIdTable or None
+        Table attached to the graph, None if the graph has no table.
+    """
+    return getattr(graph, "_node_id_table", None)
+
+
+def remove_node_id_table(graph):
+    """Detach a table of integer ids of the nodes from a graph."""
+    if get_node_id_table(graph) is not None:
+        del graph._node_id_table
+
+
+def _node_id_table(graph):
+    """Get the table of node ids of a graph (attached if necessary)."""
+    table = get_node_id_table(graph)
+    if table is None or not table.in_sync(graph):
+        table = add_node_id_table(graph)
+    return table
+
+
+def _encode_nodes(graph, nodes):
+    """Get the table of node ids of a graph and the ids of the nodes."""
+    table = _node_id_table(graph)
+    try:
+        return table, table.encode(nodes)
+    except KeyError:
+        # The table is not in sync with the graph
+        table = add_node_id_table(graph)
+        return table, table.encode(nodes)
+
+
+def _update_node_indices(graph, node_id):
+    """Update the entries of a node in the index and the id table."""
+    index = get_attribute_index(graph)
+    table = get_node_id_table(graph)
+    if index is None and table is None:
+        return
+    if node_id in graph.nodes():
+        if index is not None:
+            index.add_node(node_id, graph.node[node_id])
+        if table is not None:
+            table.add_node(node_id)
+    else:
+        if index is not None:
+            index.remove_node(node_id)
+        if table is not None:
+            table.remove_node(node_id)
+
+
+def add_attribute_store(graph):
+    """Store the attributes of the nodes and edges of a graph in columns.
+
+    The attribute dictionaries of the nodes and edges of the graph are
+    replaced by rows of columnar stores (see
+    `regraph.networkx.attribute_store`), the nodes and edges added
+    to the graph later on get rows of the stores as well. The rows
+    behave as dictionaries, so the graph is manipulated as usual.
+    The stores are used by `filter_edges_by_attributes` and
+    `find_matching` to filter elements by attributes.
+
+    Parameters
+    ----------
+    graph : networkx.(Di)Graph
+
+    Returns
+    -------
+    (node_store, edge_store) : tuple
+        Stores (`regraph.networkx.attribute_store.AttributeStore`) of
+        the node and edge attributes attached to the graph.
+
+    Raises
+    ------
+    ReGraphError
+        If the graph is not a NetworkX graph.
+    """
+    if not (isinstance(graph, nx.DiGraph) or isinstance(graph, nx.Graph)):
+        raise ReGraphError(
+            "Attribute store is not available for graphs '{}'!".format(
+                type(graph)))
+    if get_attribute_store(graph) is not None:
+        return graph._attribute_stores
+    node_store = AttributeStore()
+    edge_store = AttributeStore()
+    _replace_attr_dicts(graph, node_store.new_row, edge_store.new_row)
+    graph.node_attr_dict_factory = node_store.new_row
+    graph.edge_attr_dict_factory = edge_store.new_row
+    graph._attribute_stores = (node_store, edge_store)
+    return graph._attribute_stores
+
+
+def get_attribute_store(graph, edges=False):
+    """Get a columnar store of attributes attached to a graph.
+
+    Parameters
+    ----------
+    graph : networkx.(Di)Graph
+    edges : bool, optional
+        If True, the store of the edge attributes is returned,
+        otherwise, the store of the node attributes
+
+    Returns
+    -------
+    store : regraph.networkx.attribute_store.AttributeStore or None
+        Store attached to the graph, None if the graph has no store.
+    """
+    stores = getattr(graph, "_attribute_stores", None)
+    if stores is None:
+        return None
+    return stores[1] if edges else stores[0]
+
+
+def remove_attribute_store(graph):
+    """Move the attributes of a graph from columnar stores to dicts."""
+    if get_attribute_store(graph) is not None:
+        _replace_attr_dicts(graph, dict, dict)
+        graph.node_attr_dict_factory = type(graph).node_attr_dict_factory
+        graph.edge_attr_dict_factory = type(graph).edge_attr_dict_factory
+        del graph._attribute_stores
+
+
+def _replace_attr_dicts(graph, node_factory, edge_factory):
+    """Replace attribute dicts of the nodes and edges by new ones."""
+    for node_id, attrs in list(graph._node.items()):
+        new_attrs = node_factory()
+        new_attrs.update(attrs)
+        graph._node[node_id] = new_attrs
+    # The same edge dict is stored for both directions of the edge
+    # (in `_succ` and `_pred`, or in `_adj` of undirected graphs)
+    new_edge_attrs = dict()
+    adjacencies = [graph._adj]
+    if graph.is_directed():
+        adjacencies.append(graph._pred)
+    for adjacency in adjacencies:
+        for nbrs in adjacency.values():
+            for n, attrs in nbrs.items():
+                if id(attrs) not in new_edge_attrs:
+                    new_attrs = edge_factory()
+                    new_attrs.update(attrs)
+                    new_edge_attrs[id(attrs)] = (new_attrs, attrs)
+                nbrs[n] = new_edge_attrs[id(attrs)][0]
+
+
+def copy_graph(graph):
+    """Copy a graph sharing the attribute values with the original.
+
+    The structure of the graph and the attribute dictionaries of
+    its nodes and edges are copied, while the attribute values
+    (`regraph.attribute_sets.AttributeSet` objects, never modified
+    in-place by the primitives) are shared with the original graph.
+    This is considerably cheaper than `copy.deepcopy`. An attribute
+    index and a table of node ids attached to the graph are copied
+    as well.
+
+    Parameters
+    ----------
+    graph : networkx.(Di)Graph
+
+    Returns
+    -------
+    new_graph : networkx.(Di)Graph
+        Copy of the graph
+    """
+    if isinstance(graph, nx.DiGraph) or isinstance(graph, nx.Graph):
+        new_graph = graph.__class__()
+        new_graph.graph.update(graph.graph)
+        new_graph.add_nodes_from(
+            (n, dict(attrs)) for n, attrs in graph.nodes(data=True))
+        # Fill in the adjacency directly (instead of `add_edges_from`)
+        # to preserve the order of both successors and predecessors
+        edge_attrs = dict()
+        for u, nbrs in graph.adj.items():
+            for v, attrs in nbrs.items():
+                if (v, u) in edge_attrs and not graph.is_directed():
+                    new_attrs = edge_attrs[(v, u)]
+                else:
+                    new_attrs = dict(attrs)
+                    edge_attrs[(u, v)] = new_attrs
+                new_graph._adj[u][v] = new_attrs
+        if graph.is_directed():
+            for v, nbrs in graph.pred.items():
+                for u in nbrs:
+                    new_graph._pred[v][u] = edge_attrs[(u, v)]
+        index = get_attribute_index(graph)
+        if index is not None:
+            new_graph._attribute_index = index.copy()
+        table = get_node_id_table(graph)
+        if table is not None:
+            new_graph._node_id_table = table.copy()
+        allocator = getattr(graph, "_node_id_allocator", None)
+        if allocator is not None:
+            new_graph._node_id_allocator = allocator.copy()
+        if get_attribute_store(graph) is not None:
+            add_attribute_store(new_graph)
+        return new_graph
+    return copy.deepcopy(graph)
 
 
 def assign_attrs(element, attrs):
@@ -77,12 +371,13 @@ def add_node(graph, node_id, attrs=dict()):
         if attrs is None:
             new_attrs = dict()
         else:
-            new_attrs = safe_deepcopy_dict(attrs)
+            new_attrs = copy_attrs(attrs)
             normalize_attrs(new_attrs)
         if node_id not in graph.nodes():
             graph.add_node(node_id)
             for k, v in new_attrs.items():
                 graph.node[node_id][k] = v
+            _update_node_indices(graph, node_id)
         else:
             raise GraphError("Node '%s' already exists!" % node_id)
     else:
@@ -142,7 +437,7 @@ def add_node_attrs(graph, node, attrs):
        isinstance(graph, nx.Graph):
         node_attrs = get_node(graph, node)
         if node_attrs is None:
-            graph.node[node] = safe_deepcopy_dict(attrs)
+            graph.node[node] = copy_attrs(attrs)
         else:
             for key in attrs:
                 if key in node_attrs:
@@ -150,6 +445,7 @@ def add_node_attrs(graph, node, attrs):
                     node_attrs[key] = node_attrs[key].union(attrs[key])
                 else:
                     node_attrs[key] = attrs[key]
+        _update_node_indices(graph, node)
     else:
         graph.add_node_attrs(node, attrs)
 
@@ -185,7 +481,7 @@ def add_edge(graph, s, t, attrs=None, **attr):
                 "The attr_dict argument must be a dictionary."
             )
 
-    new_attrs = safe_deepcopy_dict(attrs)
+    new_attrs = copy_attrs(attrs)
     if s not in graph.nodes():
         raise GraphError("Node '%s' does not exist!" % s)
     if t not in graph.nodes():
@@ -323,6 +619,7 @@ def remove_node(graph, node_id):
             neighbors = set(graph.__getitem__(node_id).keys())
             neighbors -= {node_id}
             graph.remove_node(node_id)
+            _update_node_indices(graph, node_id)
         else:
             graph.remove_node(node_id)
     else:
@@ -337,6 +634,7 @@ def set_node_attrs(graph, node_id, attrs, normalize=True, update=True):
         if not update:
             for k, v in attrs.items():
                 graph.node[node_id][k] = v
+            _update_node_indices(graph, node_id)
         else:
             update_node_attrs(graph, node_id, attrs, normalize)
     else:
@@ -359,7 +657,7 @@ def update_node_attrs(graph, node_id, attrs, normalize=True):
         If a node with the specified id does not exist.
 
     """
-    new_attrs = safe_deepcopy_dict(attrs)
+    new_attrs = copy_attrs(attrs)
     if node_id not in graph.nodes():
         raise GraphError("Node '%s' does not exist!" % str(node_id))
     elif new_attrs is None:
@@ -379,6 +677,7 @@ def update_node_attrs(graph, node_id, attrs, normalize=True):
             graph.add_node(node_id, **new_attrs)
             for k in attrs_to_remove:
                 del graph.node[node_id][k]
+            _update_node_indices(graph, node_id)
         else:
             graph.set_node_attrs(node_id, new_attrs, update=True)
 
@@ -419,6 +718,7 @@ def remove_node_attrs(graph, node_id, attrs):
                     del old_attrs[key]
                 else:
                     old_attrs[key] = new_set
+        _update_node_indices(graph, node_id)
     else:
         graph.remove_node_attrs(node_id, attrs)
 
@@ -439,7 +739,7 @@ def add_edge_attrs(graph, s, t, attrs):
     GraphError
         If an edge between `s` and `t` does not exist.
     """
-    new_attrs = safe_deepcopy_dict(attrs)
+    new_attrs = copy_attrs(attrs)
     if not exists_edge(graph, s, t):
         raise(
             GraphError("Edge '%s->%s' does not exist" %
@@ -585,11 +885,22 @@ def filter_edges_by_attributes(graph, attr_key, attr_cond):
         `True` if condition is satisfied, `False` otherwise.
 
     """
-    for (s, t) in graph.edges():
-        edge_attrs = get_edge(graph, s, t)
-        if (attr_key not in edge_attrs.keys() or
-                not attr_cond(edge_attrs[attr_key])):
-            graph.remove_edge(s, t)
+    store = get_attribute_store(graph, edges=True)
+    if store is not None:
+        # Test the condition once per distinct value
+        selected = store.select(attr_key, attr_cond)
+        edges_to_remove = [
+            (s, t) for s, t, edge_attrs in graph.edges(data=True)
+            if not selected[edge_attrs.row]
+        ]
+    else:
+        edges_to_remove = []
+        for (s, t) in graph.edges():
+            edge_attrs = get_edge(graph, s, t)
+            if (attr_key not in edge_attrs.keys() or
+                    not attr_cond(edge_attrs[attr_key])):
+                edges_to_remove.append((s, t))
+    graph.remove_edges_from(edges_to_remove)
 
 
 def set_edge(graph, s, t, attrs, normalize=True):
@@ -608,7 +919,7 @@ def set_edge(graph, s, t, attrs, normalize=True):
     GraphError
         If an edge between `s` and `t` does not exist.
     """
-    new_attrs = safe_deepcopy_dict(attrs)
+    new_attrs = copy_attrs(attrs)
     if not exists_edge(graph, s, t):
         raise GraphError(
             "Edge %s->%s does not exist" % (str(s), str(t)))
@@ -669,18 +980,16 @@ def clone_node(graph, node_id, name=None):
        isinstance(graph, nx.Graph):
         # generate new name for a clone
         if name is None:
-            i = 1
-            new_node = str(node_id) + str(i)
-            while new_node in graph.nodes():
-                i += 1
-                new_node = str(node_id) + str(i)
+            new_node = _node_id_allocator(graph).new_id(
+                graph.nodes(), str(node_id), "{}{}")
         else:
             if name in graph.nodes():
                 raise GraphError("Node '%s' already exists!" % str(name))
             else:
                 new_node = name
 
-        graph.add_node(new_node, **safe_deepcopy_dict(get_node(graph, node_id)))
+        graph.add_node(new_node, **copy_attrs(get_node(graph, node_id)))
+        _update_node_indices(graph, new_node)
 
         # Connect all the edges
         if graph.is_directed():
@@ -697,11 +1006,11 @@ def clone_node(graph, node_id, name=None):
             for s, t in graph.in_edges(node_id):
                 set_edge(
                     graph, s, new_node,
-                    safe_deepcopy_dict(get_edge(graph, s, t)))
+                    copy_attrs(get_edge(graph, s, t)))
             for s, t in graph.out_edges(node_id):
                 set_edge(
                     graph, new_node, t,
-                    safe_deepcopy_dict(get_edge(graph, s, t)))
+                    copy_attrs(get_edge(graph, s, t)))
         else:
             add_edges_from(
                 graph,
@@ -714,7 +1023,7 @@ def clone_node(graph, node_id, name=None):
             for n in graph.neighbors(node_id):
                 set_edge(
                     graph, new_node, n,
-                    safe_deepcopy_dict(get_edge(graph, n, node_id)))
+                    copy_attrs(get_edge(graph, n, node_id)))
                 set_edge(
                     graph, n, new_node,
                     get_edge(graph, new_node, n))
@@ -738,6 +1047,7 @@ def relabel_node(graph, node_id, new_id):
        isinstance(graph, nx.Graph):
         clone_node(graph, node_id, new_id)
         graph.remove_node(node_id)
+        _update_node_indices(graph, node_id)
     else:
         graph.relabel_node(node_id, new_id)
 
@@ -753,7 +1063,8 @@ def relabel_nodes(graph, mapping):
     graph : networkx.(Di)Graph
     mapping: dict
         A dictionary with keys being old node ids and their values
-        being new id's of the respective nodes.
+        being new id's of the respective nodes (the nodes that are
+        not in the mapping keep their ids).
 
     Raises
     ------
@@ -762,7 +1073,9 @@ def relabel_nodes(graph, mapping):
 
     """
     unique_names = set(mapping.values())
-    if len(unique_names) != len(graph.nodes()):
+    if len(unique_names) != len(mapping) or any(
+            n in graph.nodes() and n not in mapping
+            for n in unique_names):
         raise ReGraphError(
             "Attempt to relabel nodes failed: the IDs are not unique!")
 
@@ -778,7 +1091,7 @@ def relabel_nodes(graph, mapping):
                 temp_names[new_name] = value
             relabel_node(graph, key, new_name)
     # Relabeling the nodes with the temp ID to their new IDs
-    for key, value in temp_names:
+    for key, value in temp_names.items():
         if key != value:
             relabel_node(graph, key, value)
     return
@@ -817,9 +1130,7 @@ def get_relabeled_graph(graph, mapping):
     elif isinstance(graph, nx.Graph):
         g = nx.DiGraph()
     else:
-
-        raise ReGraphError("Not available for graphs '{}'!".format(
-            type(g)))
+        g = graph.__class__()
 
     old_nodes = set(mapping.keys())
 
@@ -829,9 +1140,7 @@ def get_relabeled_graph(graph, mapping):
         except KeyError:
             continue
         try:
-            g.add_node(
-                new_node,
-                **get_node(graph, old_node))
+            add_node(g, new_node, get_node(graph, old_node))
         except KeyError:
             raise GraphError("Node '%s' does not exist!" % old_node)
 
@@ -933,7 +1242,7 @@ def merge_nodes(graph, nodes, node_id=None, method="union", edge_method="union")
             if method == "union":
                 attr_accumulator = {}
             elif method == "intersection":
-                attr_accumulator = safe_deepcopy_dict(
+                attr_accumulator = copy_attrs(
                     get_node(graph, nodes[0]))
             else:
                 raise ReGraphError("Merging method '%s' is not defined!" % method)
@@ -1042,6 +1351,7 @@ def merge_nodes(graph, nodes, node_id=None, method="union", edge_method="union")
                                 neighbors_dict.update({n: attrs})
 
                 graph.remove_node(node)
+                _update_node_indices(graph, node)
                 all_neighbors -= {node}
 
             if node_id in graph.nodes():
@@ -1299,7 +1609,127 @@ def export_graph(graph, filename):
     return
 
 
-def find_matching(graph, pattern, nodes=None):
+def _iter_combinations_matchings(graph, pattern, nodes=None):
+    """Generate matchings enumerating combinations of nodes and edges.
+
+    The combinations are enumerated on the integer ids of the nodes
+    (see `regraph.networkx.node_ids`), the ids are translated back
+    to the nodes only in the instances found.
+    """
+    if nodes is not None:
+        g = graph.subgraph(nodes)
+    else:
+        g = graph
+
+    matching_nodes = set()
+    # find all the nodes matching the nodes in pattern
+    for pattern_node in pattern.nodes():
+        for node in g.nodes():
+            if valid_attributes(
+                get_node(pattern, pattern_node),
+                get_node(g, node)):
+                matching_nodes.add(node)
+    table, matching_ids = _encode_nodes(graph, matching_nodes)
+    matching_ids.sort()
+    id_set = set(matching_ids)
+    adjacency = dict(
+        (i, [j for j in table.encode(g.adj[table.node(i)]) if j in id_set])
+        for i in matching_ids)
+
+    for sub_ids in itertools.combinations(matching_ids,
+                                          len(pattern.nodes())):
+        sub_set = set(sub_ids)
+        sub_edges = [
+            (i, j) for i in sub_ids for j in adjacency[i]
+            if j in sub_set and (g.is_directed() or i <= j)
+        ]
+        for edgeset in itertools.combinations(sub_edges,
+                                              len(pattern.edges())):
+            if g.is_directed():
+                edge_induced_graph = nx.DiGraph(list(edgeset))
+                edge_induced_graph.add_nodes_from(
+                    [n for n in sub_ids if n not in edge_induced_graph.nodes()])
+                matching_obj = isomorphism.DiGraphMatcher(
+                    pattern, edge_induced_graph)
+            else:
+                edge_induced_graph = nx.Graph(edgeset)
+                edge_induced_graph.add_nodes_from(
+                    [n for n in sub_ids if n not in edge_induced_graph.nodes()])
+                matching_obj = isomorphism.GraphMatcher(
+                    pattern, edge_induced_graph)
+
+            for mapping in matching_obj.isomorphisms_iter():
+                # check node matches
+                # exclude subgraphs which nodes information does not
+                # correspond to pattern
+                for (pattern_node, node) in mapping.items():
+                    if not valid_attributes(
+                        get_node(pattern, pattern_node),
+                        get_node(g, table.node(node))):
+                        break
+                else:
+                    # check edge attribute matched
+                    for edge in pattern.edges():
+                        pattern_attrs = get_edge(pattern, edge[0], edge[1])
+                        target_attrs = get_edge(
+                            g, table.node(mapping[edge[0]]),
+                            table.node(mapping[edge[1]]))
+                        if not valid_attributes(pattern_attrs, target_attrs):
+                            break
+                    else:
+                        # bring back original labeling
+                        yield dict(
+                            (key, table.node(value))
+                            for key, value in mapping.items())
+
+
+def iter_matchings(graph, pattern, nodes=None, engine="backtracking"):
+    """Generate matchings of a pattern in a graph.
+
+    Lazy version of `find_matching`: instances are generated as soon as
+    they are found, so the search can be stopped after the first
+    instance(s) without exploring the rest of the graph. The arguments
+    are checked when the function is called (not when the first
+    instance is requested).
+
+    Parameters
+    ----------
+    graph : nx.(Di)Graph
+    pattern : nx.(Di)Graph
+        Pattern graph to search for
+    nodes : iterable, optional
+        Subset of nodes to search for matching
+    engine : str, optional
+        Matching engine to use: "backtracking" (default) or
+        "combinations"
+
+    Returns
+    -------
+    instances : iterator
+        Iterator over the instances of matching found in the graph,
+        dictionaries where keys are nodes of the pattern, and values
+        are corresponding nodes of the graph.
+
+    Raises
+    ------
+    ReGraphError
+        If the matching engine is unknown.
+    """
+    if isinstance(graph, nx.DiGraph) or\
+       isinstance(graph, nx.Graph):
+        if engine == "backtracking":
+            return iter_backtracking_matchings(graph, pattern, nodes)
+        elif engine == "combinations":
+            return _iter_combinations_matchings(graph, pattern, nodes)
+        else:
+            raise ReGraphError(
+                "Unknown matching engine '{}'".format(engine))
+    else:
+        return iter(graph.find_matching(pattern, nodes))
+
+
+def find_matching(graph, pattern, nodes=None, engine="backtracking",
+                  limit=None, first_only=False):
     """Find matching of a pattern in a graph.
 
     This function takes as an input a graph and a pattern graph, optionally,
@@ -1318,8 +1748,12 @@ def find_matching(graph, pattern, nodes=None):
     * the attribute dictionary of a pattern node is a subdictionary of
       its image in the graph;
 
-    Uses `networkx.isomorphism.(Di)GraphMatcher` class, which implements
-    subgraph matching algorithm.
+    By default uses the backtracking matching engine from
+    `regraph.networkx.matching` that prunes candidate nodes using their
+    attributes and extends partial matchings along the edges of the
+    pattern. The previous engine (enumerating combinations of nodes and
+    edges and using `networkx.isomorphism.(Di)GraphMatcher`) is available
+    with `engine="combinations"`.
 
     Parameters
     ----------
@@ -1328,6 +1762,15 @@ def find_matching(graph, pattern, nodes=None):
         Pattern graph to search for
     nodes : iterable, optional
         Subset of nodes to search for matching
+    engine : str, optional
+        Matching engine to use: "backtracking" (default) or
+        "combinations"
+    limit : int, optional
+        Maximum number of instances to find, the search stops as soon
+        as `limit` instances are found
+    first_only : bool, optional
+        If True, the search stops at the first instance found
+        (equivalent to `limit=1`)
 
     Returns
     -------
@@ -1336,6 +1779,11 @@ def find_matching(graph, pattern, nodes=None):
         is represented with a dictionary where keys are nodes of the
         pattern, and values are corresponding nodes of the graph.
 
+    Raises
+    ------
+    ReGraphError
+        If the matching engine is unknown.
+
     Examples
     --------
     Suppose you are given the following graph:
@@ -1357,80 +1805,10 @@ def find_matching(graph, pattern, nodes=None):
     [{"x": 3, "y": 2}]
 
     """
-    if isinstance(graph, nx.DiGraph) or\
-       isinstance(graph, nx.Graph):
-        if nodes is not None:
-            g = graph.subgraph(nodes)
-        else:
-            g = graph
-
-        labels_mapping = dict([(n, i + 1) for i, n in enumerate(g.nodes())])
-        g = get_relabeled_graph(g, labels_mapping)
-        matching_nodes = set()
-
-        # find all the nodes matching the nodes in pattern
-        for pattern_node in pattern.nodes():
-            for node in g.nodes():
-                if valid_attributes(
-                    get_node(pattern, pattern_node),
-                    get_node(g, node)):
-                    matching_nodes.add(node)
-        reduced_graph = g.subgraph(matching_nodes)
-        instances = []
-        isomorphic_subgraphs = []
-        for sub_nodes in itertools.combinations(reduced_graph.nodes(),
-                                                len(pattern.nodes())):
-            subg = reduced_graph.subgraph(sub_nodes)
-            for edgeset in itertools.combinations(subg.edges(),
-                                                  len(pattern.edges())):
-                if g.is_directed():
-                    edge_induced_graph = nx.DiGraph(list(edgeset))
-                    edge_induced_graph.add_nodes_from(
-                        [n for n in subg.nodes() if n not in edge_induced_graph.nodes()])
-                    matching_obj = isomorphism.DiGraphMatcher(
-                        pattern, edge_induced_graph)
-                    for isom in matching_obj.isomorphisms_iter():
-                        isomorphic_subgraphs.append((subg, isom))
-                else:
-                    edge_induced_graph = nx.Graph(edgeset)
-                    edge_induced_graph.add_nodes_from(
-                        [n for n in subg.nodes() if n not in edge_induced_graph.nodes()])
-                    matching_obj = isomorphism.GraphMatcher(
-                        pattern, edge_induced_graph)
-                    for isom in matching_obj.isomorphisms_iter():
-                        isomorphic_subgraphs.append((subg, isom))
-
-        for subgraph, mapping in isomorphic_subgraphs:
-            # check node matches
-            # exclude subgraphs which nodes information does not
-            # correspond to pattern
-            for (pattern_node, node) in mapping.items():
-                if not valid_attributes(
-                    get_node(pattern, pattern_node),
-                    get_node(subgraph, node)):
-                    break
-            else:
-                # check edge attribute matched
-                for edge in pattern.edges():
-                    pattern_attrs = get_edge(pattern, edge[0], edge[1])
-                    target_attrs = get_edge(
-                        subgraph, mapping[edge[0]], mapping[edge[1]])
-                    if not valid_attributes(pattern_attrs, target_attrs):
-                        break
-                else:
-                    instances.append(mapping)
-
-        # bring back original labeling
-        inverse_mapping = dict(
-            [(value, key) for key, value in labels_mapping.items()]
-        )
-        for instance in instances:
-            for key, value in instance.items():
-                instance[key] = inverse_mapping[value]
-
-    else:
-        instances = graph.find_matching(pattern, nodes)
-    return instances
+    if first_only:
+        limit = 1
+    return list(itertools.islice(
+        iter_matchings(graph, pattern, nodes, engine), limit))
 
 
 def print_graph(graph):
@@ -1492,6 +1870,12 @@ def find_matching_with_types(graph, pattern, graph_typings,
     we assume that no key is named:
     regraph_tmp_typings_key_that_you_should_not_use
     """
+    if not (isinstance(graph, nx.DiGraph) or isinstance(graph, nx.Graph)):
+        # Isomorphism matchers of NetworkX require a NetworkX graph
+        return find_matching_with_types(
+            graph.to_networkx(), pattern, graph_typings,
+            pattern_typings, typing_graphs, decr_types)
+
     typing_key = "regraph_tmp_typings_key_that_you_should_not_use"
 
     def _allowed_edge(source, target, typings):
@@ -1527,8 +1911,8 @@ def find_matching_with_types(graph, pattern, graph_typings,
         def _compare_dicts(d1, d2):
             types1 = d1[typing_key]
             types2 = d2[typing_key]
-            d1_without_types = safe_deepcopy_dict(d1)
-            d2_without_types = safe_deepcopy_dict(d1)
+            d1_without_types = copy_attrs(d1)
+            d2_without_types = copy_attrs(d1)
             del d1_without_types[typing_key]
             del d2_without_types[typing_key]
             return (valid_attributes(types2, types1) and
@@ -1578,12 +1962,7 @@ def unique_node_id(graph, prefix):
     """
     if prefix not in graph.nodes():
         return prefix
-    idx = 1
-    new_id = "{}_{}".format(prefix, idx)
-    while new_id in graph.nodes():
-        idx += 1
-        new_id = "{}_{}".format(prefix, idx)
-    return new_id
+    return _node_id_allocator(graph).new_id(graph.nodes(), prefix)
 
 
 def new_merge_nodes(graph, nodes, node_id=None, method="union", edge_method="union"):
@@ -1666,7 +2045,7 @@ def new_merge_nodes(graph, nodes, node_id=None, method="union", edge_method="uni
         if method == "union":
             attrs_acc = {}
         elif method == "intersection":
-            attrs_acc = safe_deepcopy_dict(get_node(graph, invariant_node))
+            attrs_acc = copy_attrs(get_node(graph, invariant_node))
         else:
             raise ReGraphError("Merging method '%s' is not defined!" % method)
 
@@ -1705,7 +2084,7 @@ def new_merge_nodes(graph, nodes, node_id=None, method="union", edge_method="uni
                     else:
                         preds_acc[p] = get_edge(graph, p, n)
 
-            graph.node[invariant_node] = attrs_acc
+            set_node_attrs(graph, invariant_node, attrs_acc)
 
             loop_acc = dict()
             for s, attrs in sucs_acc.items():
@@ -1751,7 +2130,7 @@ def new_merge_nodes(graph, nodes, node_id=None, method="union", edge_method="uni
                     else:
                         neighbours_acc[s] = get_edge(graph, n, s)
 
-            graph.node[invariant_node] = attrs_acc
+            set_node_attrs(graph, invariant_node, attrs_acc)
 
             loop_acc = dict()
             for s, attrs in neighbours_acc.items():
@@ -1770,6 +2149,8 @@ def new_merge_nodes(graph, nodes, node_id=None, method="union", edge_method="uni
 
         for n in other_nodes:
             graph.remove_node(n)
+            _update_node_indices(graph, n)
+        _update_node_indices(graph, invariant_node)
 
         relabel_node(graph, invariant_node, node_id)
 
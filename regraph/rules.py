@@ -19,17 +19,21 @@ from regraph.utils import (keys_by_value,
 from regraph.networkx.category_utils import (identity,
                                              check_homomorphism,
                                              pullback_complement,
+                                             pullback_complement_delta,
                                              get_unique_map_from_pushout,
                                              get_unique_map_to_pullback_complement_full,
                                              get_unique_map_to_pullback,
                                              get_unique_map_to_pullback_complement,
                                              pushout,
+                                             pushout_delta,
                                              pullback,
-                                             compose)
+                                             compose,
+                                             _internal_validation)
 from regraph import primitives
+from regraph.networkx.homomorphism import mapping_to_json
 from regraph.networkx.plotting import plot_rule
 from regraph.exceptions import (ReGraphWarning, ParsingError,
-                                RuleError)
+                                RuleError, ReGraphError)
 
 # from regraph.neo4j.cypher_utils.generic import (generate_var_name,
 #                                                 with_vars,
@@ -939,8 +943,8 @@ class Rule(object):
         json_data["lhs"] = primitives.graph_to_json(self.lhs)
         json_data["p"] = primitives.graph_to_json(self.p)
         json_data["rhs"] = primitives.graph_to_json(self.rhs)
-        json_data["p_lhs"] = self.p_lhs
-        json_data["p_rhs"] = self.p_rhs
+        json_data["p_lhs"] = mapping_to_json(self.p_lhs)
+        json_data["p_rhs"] = mapping_to_json(self.p_rhs)
         return json_data
 
     @classmethod
@@ -954,7 +958,8 @@ class Rule(object):
         rule = cls(p, lhs, rhs, p_lhs, p_rhs)
         return rule
 
-    def apply_to(self, graph, instance=None, inplace=False):
+    def apply_to(self, graph, instance=None, inplace=False,
+                 validation=None):
         """Perform graph rewriting with the rule.
 
         Parameters
@@ -970,7 +975,16 @@ class Rule(object):
             in-place by applying primitve transformations
             to the graph object, otherwise the result of
             the rewriting is a new graph object.
-            Default value is `False`.
+            Default value is `False`. Graphs that are not
+            NetworkX graphs (`regraph.neo4j.Neo4jGraph`,
+            `regraph.arrays.ArrayGraph`) are always rewritten
+            in-place by their method `rewrite`.
+        validation : str, optional
+            Homomorphism validation policy ("full", "inputs" or
+            "off", see `regraph.networkx.category_utils`), by
+            default the policy of the context is used. The
+            intermediate homomorphisms are checked only with
+            the policy "full".
 
         Returns
         -------
@@ -991,16 +1005,72 @@ class Rule(object):
         if isinstance(graph, nx.DiGraph):
             g_m, p_g_m, g_m_g = pullback_complement(
                 self.p, self.lhs, graph, self.p_lhs, instance,
-                inplace
+                inplace, validation=validation
             )
             g_prime, g_m_g_prime, rhs_g_prime = pushout(
-                self.p, g_m, self.rhs, p_g_m, self.p_rhs, inplace)
+                self.p, g_m, self.rhs, p_g_m, self.p_rhs, inplace,
+                validation=_internal_validation(validation))
         else:
             g_prime = graph
             rhs_g_prime = graph.rewrite(self, instance)
 
         return (g_prime, rhs_g_prime)
 
+    def apply_delta(self, graph, instance=None, validation=None):
+        """Perform in-place graph rewriting touching only the instance.
+
+        Unlike `apply_to`, the nodes of the graph outside of the
+        instance (and of the neighbourhood of the instance) are never
+        visited, and the homomorphisms returned are sparse: they map
+        only the nodes that were changed by the rewriting, the rest
+        of the nodes of the graph are implicitly mapped identically.
+
+        Parameters
+        ----------
+        graph : nx.(Di)Graph
+            Graph to rewrite with the rule (transformed in-place).
+        instance : dict
+            Instance of the `lhs` pattern in the graph
+            defined by a dictionary where keys are nodes
+            of `lhs` and values are nodes of the graph.
+        validation : str, optional
+            Homomorphism validation policy (see `apply_to`).
+
+        Returns
+        -------
+        p_g_m : dict
+            Matching of the `p` in the intermediate graph
+            `g_m` (the graph after cloning and removal).
+        g_m_g : dict
+            Sparse homomorphism from `g_m` to the input graph,
+            only the clones are mapped.
+        g_m_g_prime : dict
+            Sparse homomorphism from `g_m` to the result,
+            only the merged nodes are mapped.
+        rhs_g_prime : dict
+            Matching of the `rhs` in the result of the rewriting.
+
+        Raises
+        ------
+        ReGraphError
+            If the graph is not a NetworkX graph.
+        """
+        if not isinstance(graph, nx.Graph):
+            raise ReGraphError(
+                "Delta-based rewriting is implemented only "
+                "for NetworkX graphs!")
+        if instance is None:
+            instance = {
+                n: n for n in self.lhs.nodes()
+            }
+        _, p_g_m, g_m_g = pullback_complement_delta(
+            self.p, self.lhs, graph, self.p_lhs, instance,
+            validation=validation)
+        _, g_m_g_prime, rhs_g_prime = pushout_delta(
+            self.p, graph, self.rhs, p_g_m, self.p_rhs,
+            validation=_internal_validation(validation))
+        return (p_g_m, g_m_g, g_m_g_prime, rhs_g_prime)
+
     def added_nodes(self):
         """Get nodes added by the rule.
 
@@ -1296,12 +1366,14 @@ class Rule(object):
             primitives.add_node(self.lhs, node_id, attrs)
             new_p_node_id = node_id
             if new_p_node_id in self.p.nodes():
-                new_p_node_id = primitives.unique_node_id(new_p_node_id)
+                new_p_node_id = primitives.unique_node_id(
+                    self.p, new_p_node_id)
             primitives.add_node(self.p, new_p_node_id, attrs)
             self.p_lhs[new_p_node_id] = node_id
             new_rhs_node_id = node_id
             if new_rhs_node_id in self.rhs.nodes():
-                new_rhs_node_id = primitives.unique_node_id(new_rhs_node_id)
+                new_rhs_node_id = primitives.unique_node_id(
+                    self.rhs, new_rhs_node_id)
             primitives.add_node(self.rhs, new_rhs_node_id, attrs)
             self.p_rhs[new_p_node_id] = new_rhs_node_id
         else:
@@ -1539,12 +1611,13 @@ class Rule(object):
                 if s not in visited:
                     visited.add(s)
                     if s not in instance.values():
-                        new_lhs_node = primitives.unique_node_id(self.lhs, s)
                         if s not in added_nodes:
+                            new_lhs_node = primitives.unique_node_id(
+                                self.lhs, s)
                             self._add_node_lhs(new_lhs_node)
                             added_nodes[s] = new_lhs_node
                         else:
-                            new_lhs_node = keys_by_value(added_nodes, s)[0]
+                            new_lhs_node = added_nodes[s]
                         new_instance[new_lhs_node] = s
                     else:
                         new_lhs_node = keys_by_value(instance, s)[0]
@@ -1561,12 +1634,13 @@ class Rule(object):
                 if p not in visited:
                     visited.add(p)
                     if p not in instance.values():
-                        new_lhs_node = primitives.unique_node_id(self.lhs, p)
                         if p not in added_nodes:
+                            new_lhs_node = primitives.unique_node_id(
+                                self.lhs, p)
                             self._add_node_lhs(new_lhs_node)
                             added_nodes[p] = new_lhs_node
                         else:
-                            new_lhs_node = keys_by_value(added_nodes, p)[0]
+                            new_lhs_node = added_nodes[p]
                         new_instance[new_lhs_node] = p
                     else:
                         new_lhs_node = keys_by_value(instance, p)[0]
@@ -1662,7 +1736,7 @@ def compose_rules(rule1, lhs_instance1, rhs_instance1,
     if rule1.is_identity() and not return_all:
         return rule2, lhs_instance2, rhs_instance2
     if rule2.is_identity() and not return_all:
-        return rule1, lhs_instance1, lhs_instance1
+        return rule1, lhs_instance1, rhs_instance1
 
     p1_instance = _generate_p_instance(
         rule1, lhs_instance1, rhs_instance1)
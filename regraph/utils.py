@@ -1,9 +1,22 @@
 """A collection of utils for ReGraph library."""
 import copy
 
+from collections import OrderedDict
+
 from regraph.command_parser import parser
 from regraph.exceptions import ReGraphError, ParsingError
-from regraph.attribute_sets import AttributeSet, FiniteSet
+from regraph.attribute_sets import (AttributeSet, FiniteSet, RegexSet,
+                                    IntegerSet, EmptySet, UniversalSet)
+
+
+# Maximum number of memoized inclusion tests of attribute values
+INCLUSION_CACHE_SIZE = 100000
+
+# Memoized inclusion tests, keys are pairs of value keys (see
+# `_value_key`) and values are triples (result, source, target),
+# keeping the values alive while their ids are used in the keys
+_inclusion_cache = OrderedDict()
+_inclusion_stats = {"hits": 0, "misses": 0}
 
 
 def safe_deepcopy_dict(d):
@@ -21,13 +34,39 @@ def safe_deepcopy_dict(d):
     return new_d
 
 
-def generate_new_id(collection, basename):
-    """Generate unique id for a node."""
-    node_id = basename
+def copy_attrs(attrs):
+    """Copy a dictionary of attributes.
+
+    Attribute sets are never modified in-place, therefore, they
+    are shared with the copy (other values are deep-copied).
+    """
+    if attrs is None:
+        return None
+    new_attrs = dict()
+    for key, value in attrs.items():
+        if isinstance(value, AttributeSet):
+            new_attrs[key] = value
+        else:
+            new_attrs[key] = copy.deepcopy(value)
+    return new_attrs
+
+
+def generate_new_id(collection, basename, allocator=None):
+    """Generate unique id for a node.
+
+    If `allocator` (`regraph.networkx.node_ids.NodeIdAllocator`)
+    is specified, the suffixes already generated for the basename
+    are not probed again.
+    """
+    if basename not in collection:
+        return basename
+    if allocator is not None:
+        return allocator.new_id(collection, basename)
     i = 1
+    node_id = "{}_{}".format(basename, i)
     while node_id in collection:
-        node_id = "{}_{}".format(basename, i)
         i += 1
+        node_id = "{}_{}".format(basename, i)
     return node_id
 
 
@@ -120,20 +159,90 @@ def json_dict_to_attrs(d):
     return attrs
 
 
+def _value_key(value):
+    """Get the key of an attribute value in the inclusion cache.
+
+    Attribute sets are not modified in-place, so they are identified
+    by their ids (except for the pattern of `RegexSet`, which can be
+    reassigned). None is returned for the values that are not cached.
+    """
+    if isinstance(value, RegexSet):
+        return (id(value), value.pattern)
+    elif isinstance(value, (FiniteSet, IntegerSet, EmptySet, UniversalSet)):
+        return id(value)
+    return None
+
+
+def value_issubset(source, target):
+    """Test inclusion of attribute values (memoized).
+
+    The results are kept in a bounded (LRU) cache, see
+    `INCLUSION_CACHE_SIZE` and `inclusion_cache_info`.
+    """
+    source_key = _value_key(source)
+    target_key = _value_key(target) if source_key is not None else None
+    if target_key is None:
+        return source.issubset(target)
+    key = (source_key, target_key)
+    entry = _inclusion_cache.get(key)
+    if entry is not None:
+        _inclusion_stats["hits"] += 1
+        _inclusion_cache.move_to_end(key)
+        return entry[0]
+    _inclusion_stats["misses"] += 1
+    result = source.issubset(target)
+    _inclusion_cache[key] = (result, source, target)
+    if len(_inclusion_cache) > INCLUSION_CACHE_SIZE:
+        _inclusion_cache.popitem(last=False)
+    return result
+
+
+def inclusion_cache_info():
+    """Get the statistics of the cache of inclusion tests.
+
+    Returns
+    -------
+    info : dict
+        Dictionary with the number of hits and misses of the cache,
+        its current size and its maximum size
+    """
+    info = dict(_inclusion_stats)
+    info["size"] = len(_inclusion_cache)
+    info["maxsize"] = INCLUSION_CACHE_SIZE
+    return info
+
+
+def clear_inclusion_cache():
+    """Clear the cache of inclusion tests and reset its statistics."""
+    _inclusion_cache.clear()
+    _inclusion_stats["hits"] = 0
+    _inclusion_stats["misses"] = 0
+
+
+def _is_normalized(attrs):
+    """Test if all the attribute values are attribute sets."""
+    for value in attrs.values():
+        if not isinstance(value, AttributeSet):
+            return False
+    return True
+
+
 def valid_attributes(source, target):
     """Test the validity of attributes."""
     for key, value in source.items():
         if key not in target:
             return False
-        if not value.issubset(target[key]):
+        if not value_issubset(value, target[key]):
             return False
     return True
 
 
 def is_subdict(small_dict, big_dict):
     """Check if the dictionary is a subset of other."""
-    normalize_attrs(small_dict)
-    normalize_attrs(big_dict)
+    if small_dict is not None and not _is_normalized(small_dict):
+        normalize_attrs(small_dict)
+    if big_dict is not None and not _is_normalized(big_dict):
+        normalize_attrs(big_dict)
     if small_dict is None:
         return True
     if len(small_dict) == 0:
@@ -148,7 +257,7 @@ def is_subdict(small_dict, big_dict):
         if key not in big_dict.keys():
             return False
         else:
-            if not value.issubset(big_dict[key]):
+            if not value_issubset(value, big_dict[key]):
                 return False
     return True
 
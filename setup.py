@@ -10,6 +10,7 @@ setup(
     license='MIT License',
     packages=[
         'regraph',
+        'regraph.arrays',
         'regraph.neo4j',
         'regraph.neo4j.cypher_utils',
         'regraph.networkx'],
@@ -0,0 +1,226 @@
+"""Collection of tests for array-backed graphs."""
+import json
+import os
+import tempfile
+
+import networkx as nx
+
+import regraph.arrays.graphs as array_graphs
+
+from regraph import Rule
+from regraph.arrays import ArrayGraph
+from regraph.exceptions import GraphError, ReGraphError
+from regraph.primitives import *
+
+
+class TestArrayGraph(object):
+    """Class for testing `regraph.arrays` module."""
+
+    def __init__(self):
+        """Initialize test."""
+        self.graph = nx.DiGraph()
+        add_nodes_from(self.graph, [
+            ("1", {"name": "EGFR", "state": "p"}),
+            ("2", {"name": "BND"}),
+            ("3", {"name": "Grb2", "loc": 90}),
+            ("4", {"name": "SH2"}),
+            ("5", {"name": "EGFR"}),
+            ("6", {"name": "BND"}),
+            "7"
+        ])
+        add_edges_from(self.graph, [
+            ("1", "2", {"s": "p"}),
+            ("4", "2", {"s": "u"}),
+            ("4", "3"),
+            ("5", "6", {"s": "p"}),
+            ("6", "6"),
+            ("7", "6", {"s": "u"}),
+            ("5", "2")
+        ])
+
+    def _check_equal(self, array_graph):
+        assert(equal(array_graph, self.graph))
+        assert(array_graph.number_of_edges() ==
+               self.graph.number_of_edges())
+        for n in self.graph.nodes():
+            assert(set(array_graph.successors(n)) ==
+                   set(self.graph.successors(n)))
+            assert(set(array_graph.predecessors(n)) ==
+                   set(self.graph.predecessors(n)))
+
+    def test_primitives(self):
+        g = ArrayGraph.from_networkx(self.graph)
+        self._check_equal(g)
+        assert(equal(g.to_networkx(), self.graph))
+
+        for graph in [g, self.graph]:
+            clone_node(graph, "6", "6_clone")
+            remove_edge(graph, "4", "3")
+            add_edge(graph, "3", "7", {"s": "x"})
+            add_node_attrs(graph, "2", {"name": "BIND"})
+            remove_node_attrs(graph, "1", {"state": "p"})
+            add_edge_attrs(graph, "1", "2", {"s": "u"})
+            remove_edge_attrs(graph, "5", "6", {"s": "p"})
+            merge_nodes(graph, ["2", "3"], "2_3")
+            relabel_node(graph, "1", "one")
+            remove_node(graph, "5")
+        self._check_equal(g)
+        assert(("6_clone", "6_clone") in g.edges())
+
+        for graph in [g, self.graph]:
+            add_node(graph, "8", {"name": "Src"})
+            add_nodes_from(graph, ["9", ("10", {"name": "Abl"})])
+            add_edges_from(graph, [("8", "9"), ("9", "10", {"s": "p"})])
+            add_node_new_id(graph, "8", {"name": "Lck"})
+            copy_node(graph, "10")
+            set_node_attrs(graph, "8", {"name": "Src", "loc": 12})
+            update_node_attrs(graph, "9", {"name": "Fyn"})
+            set_edge(graph, "8", "9", {"s": "u"})
+            update_edge_attrs(graph, "9", "10", {"s": "u"})
+            new_merge_nodes(graph, ["8", "9"], "8_9")
+            relabel_nodes(graph, {"10": "ten", "7": "seven"})
+        self._check_equal(g)
+
+        assert(exists_edge(g, "8_9", "ten"))
+        assert(get_node(g, "8_9") == get_node(self.graph, "8_9"))
+        assert(get_edge(g, "8_9", "ten") == get_edge(self.graph, "8_9", "ten"))
+        assert(generate_new_node_id(g, "8") ==
+               generate_new_node_id(self.graph, "8"))
+        assert(unique_node_id(g, "8") == unique_node_id(self.graph, "8"))
+        assert(get_attribute_index(g) is None)
+        assert(get_node_id_table(g) is None)
+        assert(get_attribute_store(g) is None)
+        for add_index in [add_attribute_index, add_node_id_table,
+                          add_attribute_store]:
+            try:
+                add_index(g)
+                raise ValueError()
+            except ReGraphError:
+                pass
+        remove_attribute_index(g)
+        remove_node_id_table(g)
+        remove_attribute_store(g)
+
+        assert(equal(networkx_from_json(graph_to_json(g)), self.graph))
+        d3_json = graph_to_d3_json(g)
+        nx_d3_json = graph_to_d3_json(self.graph)
+        for key in nx_d3_json.keys():
+            assert(
+                sorted(json.dumps(el, sort_keys=True)
+                       for el in d3_json[key]) ==
+                sorted(json.dumps(el, sort_keys=True)
+                       for el in nx_d3_json[key]))
+        filename = os.path.join(tempfile.mkdtemp(), "graph.json")
+        export_graph(g, filename)
+        assert(equal(load_networkx_graph(filename), self.graph))
+
+        mapping = {n: str(n) + "_new" for n in self.graph.nodes()}
+        assert(equal(get_relabeled_graph(g, mapping),
+                     get_relabeled_graph(self.graph, mapping)))
+        b = nx.DiGraph()
+        add_nodes_from(b, ["x", "y"])
+        add_edge(b, "x", "y")
+        assert(equal(subtract(g, b, {"x": "one", "y": "2_3"}),
+                     subtract(self.graph, b, {"x": "one", "y": "2_3"})))
+
+        pattern = nx.DiGraph()
+        add_nodes_from(pattern, ["x", "y"])
+        add_edge(pattern, "x", "y")
+        t = nx.DiGraph()
+        add_nodes_from(t, ["a", "b"])
+        add_edge(t, "a", "b")
+        typing = {"T": {"8_9": "a", "ten": "b"}}
+        instances = find_matching_with_types(
+            g, pattern, typing, {"T": {}}, {"T": t})
+        assert({"x": "8_9", "y": "ten"} in instances)
+        assert(instances == find_matching_with_types(
+            self.graph, pattern, typing, {"T": {}}, {"T": t}))
+        assert(len(list(iter_matchings(g, pattern))) ==
+               len(find_matching(self.graph, pattern)))
+        self._check_equal(copy_graph(g))
+
+        for graph in [copy_graph(g), copy_graph(self.graph)]:
+            filter_edges_by_attributes(graph, "s", lambda s: "u" in s)
+            append_to_node_names(graph, "x")
+            assert(set(graph.edges()) == {
+                ("one_x", "2_3_x"), ("4_x", "2_3_x"), ("seven_x", "6_x"),
+                ("seven_x", "6_clone_x"), ("8_9_x", "8_9_x"),
+                ("8_9_x", "ten_x")})
+
+        try:
+            add_node(g, "seven")
+            raise ValueError()
+        except GraphError:
+            pass
+        try:
+            remove_edge(g, "4", "3")
+            raise ValueError()
+        except GraphError:
+            pass
+
+        # Modifications are merged into the arrays by the compaction
+        g.compact()
+        assert(len(g._succ_overlay) == 0 and g._alive.all())
+        self._check_equal(g)
+        self._check_equal(copy_graph(g))
+
+    def test_compaction(self):
+        threshold = array_graphs.COMPACTION_THRESHOLD
+        array_graphs.COMPACTION_THRESHOLD = 4
+        try:
+            g = ArrayGraph.from_arrays(
+                range(10), [i for i in range(9)], [i + 1 for i in range(9)])
+            assert(g.number_of_edges() == 9)
+            for i in range(10):
+                for j in range(0, 10, 3):
+                    if not g.has_edge(i, j):
+                        add_edge(g, i, j)
+            assert(len(g._targets) > 9)
+            for i in range(9):
+                remove_edge(g, i, i + 1)
+            assert((0, 1) not in g.edges() and (0, 3) in g.edges())
+            assert(len(g.edges()) == len(list(g.edges())) == 37)
+        finally:
+            array_graphs.COMPACTION_THRESHOLD = threshold
+
+        try:
+            ArrayGraph.from_arrays(["a", "b"], [0, 1], [1, 2])
+            raise ValueError()
+        except GraphError:
+            pass
+
+    def test_find_matching(self):
+        g = ArrayGraph.from_networkx(self.graph)
+        pattern = nx.DiGraph()
+        add_nodes_from(pattern, [("x", {"name": "EGFR"}), "y"])
+        add_edge(pattern, "x", "y")
+        instances = find_matching(g, pattern)
+        assert(
+            sorted(map(sorted, [i.items() for i in instances])) ==
+            sorted(map(sorted, [
+                i.items() for i in find_matching(self.graph, pattern)])))
+        assert(len(find_matching(g, pattern, nodes=["1", "2"])) == 1)
+
+        add_edge(pattern, "y", "y")
+        assert(find_matching(g, pattern) == [{"x": "5", "y": "6"}])
+        add_edge_attrs(pattern, "y", "y", {"s": "p"})
+        assert(find_matching(g, pattern) == [])
+
+    def test_rewrite(self):
+        g = ArrayGraph.from_networkx(self.graph)
+        pattern = nx.DiGraph()
+        add_nodes_from(pattern, ["x", "y", "z"])
+        add_edges_from(pattern, [("x", "y"), ("z", "y")])
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("x", "x1")
+        rule.inject_remove_node("z")
+        merged = rule.inject_merge_nodes(["x1", "y"])
+        rule.inject_add_node("new", {"name": "new"})
+        rule.inject_add_edge("new", merged, {"s": "n"})
+
+        instance = {"x": "1", "y": "2", "z": "4"}
+        _, rhs_nx = rule.apply_to(self.graph, instance, inplace=True)
+        g_prime, rhs_g = rule.apply_to(g, instance)
+        assert(g_prime is g)
+        assert(rhs_g == rhs_nx)
+        self._check_equal(g)
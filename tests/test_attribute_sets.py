@@ -1,10 +1,21 @@
 """Collection of tests for ReGraph attribute sets."""
+import copy
 import math
+import warnings
 from regraph import (RegexSet,
                      IntegerSet,
                      FiniteSet,
                      UniversalSet,
-                     EmptySet)
+                     EmptySet,
+                     AttributeSetError)
+from regraph.attribute_sets import (clear_regex_cache,
+                                    _regex_fsm,
+                                    _regex_issubset)
+from regraph.utils import (valid_attributes,
+                           is_subdict,
+                           inclusion_cache_info,
+                           clear_inclusion_cache,
+                           INCLUSION_CACHE_SIZE)
 
 
 class TestAttributeSets:
@@ -43,6 +54,41 @@ class TestAttributeSets:
         assert(diff.match("foo bar"))
         assert(diff.match("bar foo"))
 
+    def test_regex_cache(self):
+        """Test caching of regex automata and inclusion tests."""
+        clear_regex_cache()
+        words = RegexSet("(\w|\d|\s)*")
+        assert(RegexSet("foo").issubset(words))
+        assert(RegexSet("foo").issubset(words))
+        assert(_regex_issubset.cache_info().hits == 1)
+        assert(_regex_fsm.cache_info().currsize == 2)
+
+        assert(RegexSet("foo|bar").issubset(words))
+        assert(not words.issubset(RegexSet("foo|bar")))
+        assert(_regex_fsm.cache_info().currsize == 3)
+
+        assert(words.intersection("foo|bar|!") == RegexSet("foo|bar"))
+        clear_regex_cache()
+        assert(_regex_fsm.cache_info().currsize == 0)
+
+    def test_regex_match_many(self):
+        """Test batch membership in RegexSet."""
+        ids = RegexSet("P[0-9]+")
+        assert(ids.match_many(["P1", "P23", "P456"]))
+        assert(not ids.match_many(["P1", "P23x"]))
+        assert(ids.match_many([]))
+        assert(not RegexSet.empty().match_many(["P1"]))
+        assert(RegexSet.empty().match_many([]))
+
+        assert(FiniteSet({"P1", "P2", None}).issubset(ids))
+        assert(not FiniteSet({"P1", 2}).issubset(ids))
+        assert(FiniteSet({1, 2}).issubset(RegexSet("[0-9]")))
+
+        # The compiled pattern follows the changes of the pattern
+        ids.pattern = "Q[0-9]+"
+        assert(ids.match("Q1"))
+        assert(not ids.match("P1"))
+
     def test_integerset(self):
         """Test IntegerSet data structure."""
         set1 = IntegerSet(
@@ -106,6 +152,54 @@ class TestAttributeSets:
         b2 = a.union(FiniteSet({1, 2, 3}))
         assert(b1 == b2)
 
+    def test_integerset_arrays(self):
+        """Test batch membership and merging of integer intervals."""
+        ranges = IntegerSet(
+            [(10 * i, 10 * i + 4) for i in range(1000)] + [(-math.inf, -10)])
+        assert(len(ranges.intervals) == 1001)
+        assert(list(ranges.contains_many([-100, -5, 0, 4, 5, 9994, 9995])) ==
+               [True, False, True, True, False, True, False])
+        assert(ranges.contains(-math.inf))
+        assert(not ranges.contains(math.inf))
+        assert(FiniteSet({0, 11, 9992}).issubset(ranges))
+        assert(not FiniteSet({0, 15}).issubset(ranges))
+
+        # Adjacent intervals are merged
+        gaps = IntegerSet([(5 + 10 * i, 9 + 10 * i) for i in range(1000)])
+        assert(ranges.union(gaps).intervals == [
+            (-math.inf, -10), (0, 9999)])
+        assert(ranges.intersection(gaps).is_empty())
+        assert(ranges.difference(gaps) == ranges)
+
+        covered = IntegerSet([(8, math.inf)])
+        assert(IntegerSet([(6, 7)]).difference(covered.union({0})) ==
+               IntegerSet([(6, 7)]))
+        assert(IntegerSet([(6, 7)]).difference(
+            IntegerSet([(-math.inf, math.inf)])).is_empty())
+
+        json_data = ranges.to_json()
+        assert(len(json_data["data"]) == 1001)
+        assert(IntegerSet.from_json(json_data) == ranges)
+
+        # Integers out of the range of int64
+        big = 2 ** 70
+        positive = IntegerSet([(0, math.inf)])
+        assert(positive.contains(big) and not positive.contains(-big))
+        assert(not IntegerSet([(0, 5)]).contains(big))
+        assert(FiniteSet({big}).issubset(positive))
+        assert(not FiniteSet({big}).issubset(IntegerSet([(0, 5)])))
+        bounded = IntegerSet([(0, big)])
+        assert(bounded.intervals == [(0, big)])
+        assert(list(bounded.contains_many([-1, 1, big, big + 1])) ==
+               [False, True, True, False])
+        assert(bounded.issubset(positive) and not positive.issubset(bounded))
+        assert(bounded.union(IntegerSet([(big + 1, math.inf)])) == positive)
+        assert(positive.difference(bounded).intervals == [
+            (big + 1, math.inf)])
+        assert(bounded.intersection(IntegerSet([(-5, 5)])).intervals == [
+            (0, 5)])
+        assert(IntegerSet.from_json(bounded.to_json()) == bounded)
+
     def test_finite_set(self):
         """Test FiniteSet data structure."""
         uniprot =\
@@ -150,3 +244,56 @@ class TestAttributeSets:
         assert(ints4.intersection(strs4).is_empty())
         assert(ints4.issubset(UniversalSet()))
         assert(ints4.issubset(EmptySet()) is False)
+
+    def test_finite_set_interning(self):
+        """Test immutable hash-consed finite sets."""
+        a = FiniteSet({"x", "y"})
+        assert(FiniteSet(["y", "x"]) is a)
+        assert(FiniteSet(a) is a)
+        assert(a.union({"x"}) is a)
+        assert(copy.deepcopy(a) is a)
+        assert({a: 1}[FiniteSet({"y", "x"})] == 1)
+        assert(FiniteSet({1}) is not FiniteSet({True}))
+        mixed = FiniteSet({1.0, 2})
+        assert(FiniteSet({1, 2.0}) is not mixed)
+        assert(
+            [type(el) for el in sorted(FiniteSet({1, 2.0}).fset)] ==
+            [int, float])
+        assert(str(a.difference({"y"})) == "{'x'}")
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            assert(a.add("z") is FiniteSet({"x", "y", "z"}))
+            assert(a.update(["z", "t"]).fset == {"x", "y", "z", "t"})
+        assert(all(
+            issubclass(w.category, DeprecationWarning) for w in caught))
+        assert(len(caught) == 2)
+        assert(a.fset == {"x", "y"})
+
+    def test_inclusion_cache(self):
+        """Test memoized inclusion of attribute values."""
+        clear_inclusion_cache()
+        ids = RegexSet("P[0-9]+")
+        small = {"id": FiniteSet({"P1"}), "n": IntegerSet([1])}
+        big = {"id": ids, "n": IntegerSet([(0, 10)])}
+        assert(valid_attributes(small, big))
+        assert(valid_attributes(small, big))
+        info = inclusion_cache_info()
+        assert(info["misses"] == 2 and info["hits"] == 2)
+        assert(info["size"] == 2)
+
+        # Identical finite sets are the same objects
+        assert(is_subdict({"id": {"P1"}}, big))
+        assert(inclusion_cache_info()["hits"] == 3)
+
+        # Reassigned regex patterns are not confused
+        ids.pattern = "Q[0-9]+"
+        assert(not valid_attributes(small, big))
+
+        # Values that are not attribute sets are not cached
+        assert(valid_attributes({"id": {"P1"}}, {"id": {"P1", "P2"}}))
+        assert(inclusion_cache_info()["size"] == 3)
+        clear_inclusion_cache()
+        assert(inclusion_cache_info() == {
+            "hits": 0, "misses": 0, "size": 0,
+            "maxsize": INCLUSION_CACHE_SIZE})
@@ -10,7 +10,13 @@ from regraph.networkx.category_utils import (pullback,
                                              pushout,
                                              pullback_complement,
                                              nary_pullback,
-                                             get_unique_map_to_pullback_complement)
+                                             get_unique_map_to_pullback_complement,
+                                             check_homomorphism,
+                                             compose,
+                                             homomorphism_validation,
+                                             get_homomorphism_validation)
+from regraph.exceptions import InvalidHomomorphism, ReGraphError
+from regraph.networkx.homomorphism import Homomorphism
 
 
 def assert_edges_undir(edges1, edges2):
@@ -98,6 +104,33 @@ class TestCategoryUtils:
         assert_equals(homAB, self.homAB)
         assert_equals(homAC, self.homAC)
 
+    def test_pullback_clones(self):
+        b = nx.DiGraph()
+        b.add_nodes_from([1, 2, 3])
+        b.add_edges_from([(1, 2), (2, 2), (2, 3)])
+        c = nx.DiGraph()
+        c.add_nodes_from(["a", "b", "c"])
+        c.add_edges_from([("a", "a"), ("a", "b"), ("b", "c")])
+        b_d = {1: "circle", 2: "circle", 3: "dark_circle"}
+        c_d = {"a": "circle", "b": "circle", "c": "dark_circle"}
+
+        a, a_b, a_c = pullback(b, c, self.D, b_d, c_d)
+        assert_equals(len(a.nodes()), 5)
+        assert_equals(
+            set((a_b[n], a_c[n]) for n in a.nodes()),
+            set([(1, "a"), (1, "b"), (2, "a"), (2, "b"), (3, "c")]))
+        assert_equals(
+            set((a_b[s], a_c[s], a_b[t], a_c[t]) for s, t in a.edges()),
+            set([
+                (1, "a", 2, "a"), (1, "a", 2, "b"),
+                (2, "a", 2, "a"), (2, "a", 2, "b"),
+                (2, "b", 3, "c")]))
+
+        b_copy = copy.deepcopy(b)
+        a_inplace, _, _ = pullback(b_copy, c, self.D, b_d, c_d, inplace=True)
+        assert(id(a_inplace) == id(b_copy))
+        assert_nx_graph_eq(a, a_inplace)
+
     def test_pullback_complement(self):
         C, homAC, homCD = pullback_complement(
             self.A, self.B, self.D, self.homAB, self.homBD
@@ -148,6 +181,35 @@ class TestCategoryUtils:
                       len(self.D.edges()))
         assert(id(B_copy) == id(D))
 
+    def test_homomorphism_validation(self):
+        invalid_hom = {2: 2, 3: 1}
+        try:
+            pushout(self.A, self.B, self.C, invalid_hom, self.homAC)
+            raise ValueError()
+        except InvalidHomomorphism:
+            pass
+        pushout(self.A, self.B, self.C, invalid_hom, self.homAC,
+                validation="off")
+
+        invalid_hom = {1: 'square', 2: 'circle', 3: 'square'}
+        with homomorphism_validation("off"):
+            pullback(self.B, self.C, self.D, invalid_hom, self.homCD)
+        assert(get_homomorphism_validation() == "inputs")
+        try:
+            pullback(self.B, self.C, self.D, invalid_hom, self.homCD)
+            raise ValueError()
+        except InvalidHomomorphism:
+            pass
+
+        with homomorphism_validation("full"):
+            pullback(self.B, self.C, self.D, self.homBD, self.homCD)
+        try:
+            pushout(self.A, self.B, self.C, self.homAB, self.homAC,
+                    validation="some")
+            raise ValueError()
+        except ReGraphError:
+            pass
+
     def test_pushout_symmetry_directed(self):
 
         A = nx.DiGraph()
@@ -174,6 +236,74 @@ class TestCategoryUtils:
         assert_equals(len(D.nodes()), len(D_inv.nodes()))
         assert_equals(len(D.edges()), len(D_inv.edges()))
 
+    def test_pushout_chained_merges(self):
+        A = nx.DiGraph()
+        A.add_nodes_from(["a1", "a2", "a3", "a4"])
+
+        B = nx.DiGraph()
+        B.add_nodes_from([1, 2, 3, 4])
+        B.add_edges_from([(1, 4), (3, 4)])
+
+        C = nx.DiGraph()
+        C.add_nodes_from(["x", "y", "z"])
+        C.add_edges_from([("x", "y"), ("z", "x")])
+
+        homAB = {"a1": 1, "a2": 2, "a3": 3, "a4": 2}
+        homAC = {"a1": "x", "a2": "x", "a3": "y", "a4": "y"}
+
+        D, homBD, homCD = pushout(A, B, C, homAB, homAC)
+        assert_equals(len(D.nodes()), 3)
+        assert_equals(homBD[1], homBD[2])
+        assert_equals(homBD[2], homBD[3])
+        assert_equals(homCD["x"], homBD[1])
+        assert_equals(homCD["y"], homBD[1])
+        assert(homBD[4] != homBD[1])
+        assert(D.has_edge(homBD[1], homBD[1]))
+        assert(D.has_edge(homBD[1], homBD[4]))
+        assert(D.has_edge(homCD["z"], homBD[1]))
+        assert_equals(len(D.edges()), 3)
+
+    def test_sparse_homomorphisms(self):
+        g = nx.DiGraph()
+        g.add_nodes_from([1, 2, 3, 4])
+        g.add_edges_from([(1, 2), (2, 3)])
+
+        h = Homomorphism(g.nodes(), {"1_clone": 1})
+        del h[4]
+        assert_equals(len(h), 4)
+        assert_equals(dict(h), {1: 1, 2: 2, 3: 3, "1_clone": 1})
+        assert_equals(h.explicit(), {"1_clone": 1})
+        assert(4 not in h)
+        h_copy = copy.deepcopy(h)
+        assert(h_copy.shares_base(h))
+        assert_equals(h_copy, h)
+        assert_equals(h.to_json(), dict(h))
+
+        # Sparse composition over the same base
+        h2 = Homomorphism(g.nodes(), {2: 3})
+        composed = compose(h, h2)
+        assert(isinstance(composed, Homomorphism))
+        assert_equals(composed.explicit(), {"1_clone": 1, 2: 3})
+        assert_equals(dict(composed), {1: 1, 2: 3, 3: 3, "1_clone": 1})
+        assert_equals(compose(h, {1: "a", 3: "b"}),
+                      {1: "a", 3: "b", "1_clone": "a"})
+
+        identity = Homomorphism(g.nodes())
+        assert(check_homomorphism(g, g, identity))
+
+        # Pullback complement maps only the clones explicitly
+        lhs = nx.DiGraph()
+        lhs.add_nodes_from(["x", "y"])
+        lhs.add_edge("x", "y")
+        p = nx.DiGraph()
+        p.add_nodes_from(["x1", "x2"])
+        c, p_c, c_g = pullback_complement(
+            p, lhs, g, {"x1": "x", "x2": "x"}, {"x": 1, "y": 2})
+        assert(isinstance(c_g, Homomorphism))
+        assert_equals(list(c_g.explicit().values()), [1])
+        assert(2 not in c_g)
+        assert_equals(set(c_g.keys()), set(c.nodes()))
+
     def test_multi_pullback(self):
         B = nx.DiGraph()
         B.add_nodes_from([
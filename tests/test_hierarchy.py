@@ -8,6 +8,7 @@ from nose.tools import raises
 from regraph import Rule
 from regraph import NetworkXHierarchy
 from regraph import (HierarchyError)
+from regraph.exceptions import ReGraphError
 import regraph.primitives as prim
 
 
@@ -221,6 +222,75 @@ class TestHierarchy(object):
         )
         assert(len(instances) == 1)
 
+        old_instances = self.hierarchy.find_matching(
+            graph_id="g1",
+            pattern=pattern,
+            pattern_typing={
+                "g0": pattern_typing,
+                "g00": {1: "white", 2: "white", 3: "black"}
+            },
+            engine="combinations"
+        )
+        assert(instances == old_instances)
+
+        instances = self.hierarchy.find_matching(
+            "g1", pattern, first_only=True)
+        assert(len(instances) == 1)
+        matchings = self.hierarchy.iter_matchings("g1", pattern)
+        assert(next(matchings) == instances[0])
+        # Arguments are checked before the first instance is requested
+        try:
+            self.hierarchy.iter_matchings("unknown", pattern)
+            raise ValueError()
+        except HierarchyError:
+            pass
+        try:
+            self.hierarchy.iter_matchings("g1", pattern, engine="unknown")
+            raise ValueError()
+        except ReGraphError:
+            pass
+
+    def test_find_matching_typing_buckets(self):
+        h = copy.deepcopy(self.hierarchy)
+        pattern = nx.DiGraph()
+        prim.add_nodes_from(pattern, ["x", "y"])
+        prim.add_edges_from(pattern, [("x", "y")])
+        pattern_typing = {"g0": {"x": "circle", "y": "square"}}
+
+        def _sorted(instances):
+            return sorted(
+                sorted((k, str(v)) for k, v in i.items())
+                for i in instances)
+
+        instances = h.find_matching("g2", pattern, pattern_typing)
+        assert(_sorted(instances) == [
+            [("x", "2"), ("y", "3")], [("x", "4"), ("y", "5")]])
+        assert(("g2", "g0") in h._typing_buckets)
+
+        # Changes of the typing invalidate the buckets
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("y")
+        h.rewrite("g2", rule, {"x": 4, "y": 5})
+        assert(("g2", "g0") not in h._typing_buckets)
+        instances = h.find_matching("g2", pattern, pattern_typing)
+        assert(len(instances) == 3)
+        assert(_sorted(instances) == _sorted(h.find_matching(
+            "g2", pattern, pattern_typing, engine="combinations")))
+
+        h.add_node_type("g2", 6, {"g1": "black_square"})
+        assert(("g2", "g0") not in h._typing_buckets)
+
+        # Nodes added or removed bypassing the hierarchy are detected
+        h.find_matching("g2", pattern, pattern_typing)
+        prim.add_node(h.graph["g2"], "new")
+        prim.add_edge(h.graph["g2"], 2, "new")
+        prim.remove_node(h.graph["g2"], 3)
+        instances = h.find_matching("g2", pattern, pattern_typing)
+        assert([("x", "2"), ("y", "new")] in _sorted(instances))
+        assert([("x", "2"), ("y", "3")] not in _sorted(instances))
+        assert(_sorted(instances) == _sorted(h.find_matching(
+            "g2", pattern, pattern_typing, engine="combinations")))
+
     def test_rewrite(self):
         pattern = nx.DiGraph()
         prim.add_nodes_from(pattern, [
@@ -556,6 +626,71 @@ class TestHierarchy(object):
         assert("g0" in anc.keys())
         assert("g00" in anc.keys())
 
+    def test_typing_cache(self):
+        h = copy.deepcopy(self.hierarchy)
+        typing = h.get_typing("g2", "g0")
+        assert(typing[3] == "square")
+        assert(("g2", "g0") in h._typing_cache)
+        assert(h.get_descendants("g2")["g0"] == typing)
+
+        # Modifications of the results do not corrupt the cache
+        typing[3] = "circle"
+        h.get_descendants("g2")["g0"][3] = "circle"
+        assert(h.get_typing("g2", "g0")[3] == "square")
+        assert(h.get_descendants("g2")["g0"][3] == "square")
+        path_typing = h.compose_path_typing(["g2", "g1", "g0"])
+        path_typing[3] = "circle"
+        assert(h.compose_path_typing(["g2", "g1", "g0"])[3] == "square")
+
+        # Paths through 'g1' commute: transitive typing by 'g00'
+        # is the same along all of them
+        assert(h.get_typing("g2", "g00") == h.compose_path_typing(
+            ["g2", "g1", "g00"]))
+
+        pattern = nx.DiGraph()
+        prim.add_nodes_from(pattern, [3])
+        rule = Rule.from_transform(pattern)
+        rule.inject_remove_node(3)
+        h.rewrite("g2", rule, {3: 3})
+        assert(("g2", "g0") not in h._typing_cache)
+        assert(3 not in h.get_typing("g2", "g0").keys())
+
+        h.remove_edge("g1", "g0")
+        assert(("g2", "g0") not in h._typing_cache)
+        try:
+            h.get_typing("g2", "g0")
+            raise ValueError()
+        except HierarchyError:
+            pass
+
+    def test_copy(self):
+        h = NetworkXHierarchy.copy(self.hierarchy)
+        for graph in h.graphs():
+            assert(h.graph[graph] is not self.hierarchy.graph[graph])
+            assert(h.get_graph(graph) is h.graph[graph])
+
+        # Graphs of the copy can be modified directly
+        original_json = self.hierarchy.to_json()
+        prim.add_node(h.graph["g0"], "hexagon")
+        prim.add_node_attrs(h.get_graph("g1"), "white_circle", {"a": 1})
+        h.relabel_nodes("g2", {3: "three"})
+        assert(self.hierarchy.to_json() == original_json)
+        assert("three" in h.graph["g2"].nodes())
+
+        # Non-inplace rewriting does not modify the original graphs
+        pattern = nx.DiGraph()
+        prim.add_nodes_from(pattern, ["square"])
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("square")
+        new_h, _ = self.hierarchy.rewrite(
+            "g0", rule, {"square": "square"}, inplace=False)
+        assert(self.hierarchy.to_json() == original_json)
+        assert(len(new_h.graph["g0"].nodes()) ==
+               len(self.hierarchy.graph["g0"].nodes()) + 1)
+        prim.add_node(new_h.graph["g00"], "hexagon")
+        prim.add_node(new_h.get_graph("g1"), "hexagon")
+        assert(self.hierarchy.to_json() == original_json)
+
     def test_get_ancestors(self):
         anc = self.hierarchy.get_ancestors("g0")
         print(anc)
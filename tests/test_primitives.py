@@ -1,3 +1,4 @@
+import copy
 import networkx as nx
 
 from regraph import Rule
@@ -5,6 +6,7 @@ from regraph.utils import (valid_attributes,
                            normalize_attrs)
 from regraph.networkx.category_utils import identity
 from regraph.primitives import *
+from regraph.exceptions import ReGraphError
 
 
 class TestPrimitives(object):
@@ -166,6 +168,9 @@ class TestPrimitives(object):
             id(self.graph.node[new_name]) !=
             id(self.graph.node[node_to_clone])
         )
+        # Attribute values are immutable and shared by the clones
+        for key, value in self.graph.node[node_to_clone].items():
+            assert(self.graph.node[new_name][key] is value)
         for u, _ in in_edges:
             assert((u, new_name) in self.graph.edges())
             assert(
@@ -290,6 +295,201 @@ class TestPrimitives(object):
         find_matching(self.graph, pattern)
         # assert smth here
 
+    def test_find_matching_engines(self):
+        pattern = nx.DiGraph()
+        add_nodes_from(pattern, [
+            ("x", {"name": "BND"}),
+            "y",
+            "z"
+        ])
+        add_edges_from(pattern, [
+            ("y", "x", {"s": "u"}),
+            ("z", "x")
+        ])
+        instances = find_matching(self.graph, pattern)
+        old_instances = find_matching(
+            self.graph, pattern, engine="combinations")
+        assert(len(instances) == 5)
+        assert(
+            sorted(sorted(i.items()) for i in instances) ==
+            sorted(sorted(i.items()) for i in old_instances))
+
+        instances = find_matching(
+            self.graph, pattern, nodes=["1", "2", "4", "5"])
+        assert(len(instances) == 4)
+        for instance in instances:
+            assert(instance["x"] == "2")
+
+        instances = find_matching(self.graph, pattern, limit=2)
+        assert(len(instances) == 2)
+        instances = find_matching(
+            self.graph, pattern, engine="combinations", first_only=True)
+        assert(len(instances) == 1)
+        assert(instances[0] in old_instances)
+        matchings = iter_matchings(self.graph, pattern)
+        assert(next(matchings) in old_instances)
+        # Arguments are checked before the first instance is requested
+        try:
+            iter_matchings(self.graph, pattern, engine="unknown")
+            raise ValueError()
+        except ReGraphError:
+            pass
+
+        loop_pattern = nx.DiGraph()
+        add_nodes_from(loop_pattern, ["a", "b"])
+        add_edges_from(loop_pattern, [("a", "b"), ("b", "a")])
+        instances = find_matching(self.graph, loop_pattern)
+        assert(len(instances) == 8)
+        assert(
+            sorted(sorted(i.items()) for i in instances) ==
+            sorted(sorted(i.items()) for i in find_matching(
+                self.graph, loop_pattern, engine="combinations")))
+
+    def test_attribute_index(self):
+        g = copy.deepcopy(self.graph)
+        index = add_attribute_index(g)
+        assert(get_attribute_index(g) is index)
+        assert(set(index.candidates({"name": FiniteSet({"BND"})})) ==
+               {"2", "6", "9"})
+        assert(index.candidates({}) is None)
+
+        add_node(g, "bnd", {"name": "BND"})
+        add_node_attrs(g, "11", {"name": {"BND", "SH2"}})
+        remove_node_attrs(g, "9", {"name": "BND"})
+        update_node_attrs(g, "2", {"name": "EGFR"})
+        clone_node(g, "6", "6_clone")
+        remove_node(g, "6")
+        assert(set(index.candidates({"name": FiniteSet({"BND"})})) ==
+               {"bnd", "11", "6_clone"})
+        assert(set(index.candidates({"name": FiniteSet({"BND", "SH2"})})) ==
+               {"11"})
+
+        merge_nodes(g, ["11", "4"], "merged")
+        assert(set(index.candidates({"name": FiniteSet({"SH2"})})) ==
+               {"merged"})
+
+        pattern = nx.DiGraph()
+        add_nodes_from(pattern, [("x", {"name": "BND"}), "y"])
+        add_edges_from(pattern, [("y", "x", {"s": "u"})])
+        instances = find_matching(g, pattern)
+        remove_attribute_index(g)
+        assert(get_attribute_index(g) is None)
+        assert(instances == find_matching(g, pattern))
+
+        # Nodes added or removed bypassing the primitives are detected
+        index = add_attribute_index(g)
+        g.remove_node("bnd")
+        g.add_node("bypass", name=FiniteSet({"BND"}))
+        g.add_edge("merged", "bypass", s=FiniteSet({"u"}))
+        assert(not index.in_sync(g))
+        instances = find_matching(g, pattern)
+        assert({"x": "bypass", "y": "merged"} in instances)
+        assert(
+            sorted(map(sorted, [i.items() for i in instances])) ==
+            sorted(map(sorted, [i.items() for i in find_matching(
+                g, pattern, engine="combinations")])))
+
+    def test_attribute_store(self):
+        g = copy.deepcopy(self.graph)
+        pattern = nx.DiGraph()
+        add_nodes_from(pattern, [("x", {"name": "BND"}), "y"])
+        add_edges_from(pattern, [("y", "x", {"s": "u"})])
+        instances = find_matching(g, pattern)
+
+        node_store, edge_store = add_attribute_store(g)
+        assert(get_attribute_store(g) is node_store)
+        assert(get_attribute_store(g, edges=True) is edge_store)
+        assert(len(node_store) == len(g.nodes()))
+        assert(len(edge_store) == len(g.edges()))
+        # Identical values are stored once
+        assert(g.node["2"]["name"] is g.node["6"]["name"])
+        assert(find_matching(g, pattern) == instances)
+        assert(set(np.flatnonzero(node_store.including(
+            {"name": FiniteSet({"BND"})}))) ==
+            {g.node[n].row for n in ["2", "6", "9"]})
+
+        add_node(g, "bnd", {"name": "BND"})
+        add_node_attrs(g, "bnd", {"state": "p"})
+        remove_node_attrs(g, "2", {"name": "BND"})
+        clone_node(g, "6", "6_clone")
+        remove_node(g, "6")
+        assert(g.node["bnd"] == {
+            "name": FiniteSet({"BND"}), "state": FiniteSet({"p"})})
+        assert("name" not in g.node["2"])
+        assert(len(node_store) == len(g.nodes()))
+
+        h = copy_graph(g)
+        assert(get_attribute_store(h) is not node_store)
+        assert(equal(g, h))
+        remove_node(h, "bnd")
+        assert("bnd" in g.nodes())
+        assert(equal(g, copy.deepcopy(g)))
+
+        filter_edges_by_attributes(
+            g, "s", lambda value: "u" in value)
+        assert(set(g.edges()) == {
+            ("4", "2"), ("5", "2"), ("7", "6_clone")})
+
+        remove_attribute_store(g)
+        assert(get_attribute_store(g) is None)
+        assert(type(g.node["bnd"]) == dict)
+        add_node(g, "new", {"name": "BND"})
+        assert(type(g.node["new"]) == dict)
+
+    def test_node_id_table(self):
+        g = copy.deepcopy(self.graph)
+        table = add_node_id_table(g)
+        assert(table.encode(["1", "13"]) == [0, 12])
+
+        clone_node(g, "6", "6_clone")
+        merge_nodes(g, ["2", "3"], "2_3")
+        relabel_node(g, "1", "one")
+        remove_node(g, "4")
+        assert(len(table) == g.number_of_nodes())
+        assert(table.sorted(g.nodes()) == list(g.nodes()))
+        assert(table.node(table["6_clone"]) == "6_clone")
+        assert("2" not in table and "one" in table)
+        assert(get_node_id_table(copy_graph(g)).sorted(g.nodes()) ==
+               list(g.nodes()))
+
+        pattern = nx.DiGraph()
+        add_nodes_from(pattern, ["x", "y"])
+        add_edges_from(pattern, [("x", "y"), ("y", "x")])
+        instances = find_matching(g, pattern, engine="combinations")
+        assert(get_node_id_table(g) is table)
+        assert(
+            sorted(map(sorted, [i.items() for i in instances])) ==
+            sorted(map(sorted, [i.items() for i in find_matching(
+                g, pattern)])))
+
+        # The table is rebuilt if nodes were replaced bypassing
+        # the primitives
+        g.remove_node("5")
+        g.add_node("five")
+        g.add_edge("five", "7")
+        g.add_edge("7", "five")
+        instances = find_matching(g, pattern, engine="combinations")
+        assert(get_node_id_table(g) is not table)
+        assert({"x": "five", "y": "7"} in instances)
+
+        remove_node_id_table(g)
+        assert(get_node_id_table(g) is None)
+
+    def test_fresh_node_ids(self):
+        g = copy.deepcopy(self.graph)
+        assert([clone_node(g, "7") for _ in range(3)] == ["71", "72", "73"])
+        # Ids created by the user are skipped
+        add_node(g, "75")
+        assert([clone_node(g, "7") for _ in range(2)] == ["74", "76"])
+        assert(unique_node_id(g, "x") == "x")
+        add_node(g, "x")
+        add_node(g, "x_2")
+        assert(unique_node_id(g, "x") == "x_1")
+        add_node(g, "x_1")
+        assert(generate_new_node_id(g, "x") == "x_3")
+        g_copy = copy_graph(g)
+        assert(clone_node(g_copy, "7") == clone_node(g, "7") == "77")
+
     def test_rewrite(self):
         pattern = nx.DiGraph()
         add_nodes_from(pattern,
@@ -459,6 +459,37 @@ class TestRule(object):
 
         assert(prim.equal(graph, new_new_graph))
 
+    def test_apply_delta(self):
+        graph = nx.DiGraph()
+        prim.add_nodes_from(graph, [
+            ("a", {"name": "Jack"}), ("b", {"name": "Bob"}),
+            ("c", {"name": "Alice"}), ("d", {"name": "Joe"}), "e"])
+        prim.add_edges_from(graph, [
+            ("a", "b"), ("b", "c"), ("c", "a"), ("d", "a"), ("e", "d")])
+
+        pattern = nx.DiGraph()
+        prim.add_nodes_from(pattern, ["x", "y", "z"])
+        prim.add_edges_from(pattern, [("x", "y"), ("y", "z")])
+        rule = Rule.from_transform(pattern)
+        p_clone, _ = rule.inject_clone_node("x")
+        rule.inject_remove_edge(p_clone, "y")
+        rhs_merged = rule.inject_merge_nodes(["y", "z"])
+        rule.inject_add_node("w")
+        rule.inject_add_edge("w", rhs_merged)
+        instance = {"x": "a", "y": "b", "z": "c"}
+
+        expected, expected_rhs_g = rule.apply_to(graph, instance)
+
+        p_g_m, g_m_g, g_m_g_prime, rhs_g = rule.apply_delta(
+            graph, instance)
+        assert(prim.equal(graph, expected))
+        assert(rhs_g == expected_rhs_g)
+        # Only the changed nodes are mapped
+        assert(list(g_m_g.values()) == ["a"])
+        assert(set(g_m_g_prime.keys()) == {"b", "c"})
+        assert(p_g_m[p_clone] in g_m_g.keys())
+        assert("d" in graph.nodes() and "e" in graph.nodes())
+
     def test_compose_rules(self):
         lhs1 = nx.DiGraph()
         p1 = nx.DiGraph()
@@ -1,9 +1,15 @@
+import copy
+import os
+import shutil
+import tempfile
+
 import networkx as nx
 from neobolt.exceptions import ServiceUnavailable
 
 from regraph import NetworkXHierarchy, Neo4jHierarchy
 
 from regraph.audit import VersionedGraph, VersionedHierarchy
+from regraph.exceptions import RevisionError
 from regraph.rules import Rule
 from regraph import primitives
 
@@ -17,6 +23,212 @@ class TestVersioning(object):
         graph.add_edge("circle", "square")
         self.initial_graph = graph
 
+    def _clone_commits(self, g, n):
+        pattern = nx.DiGraph()
+        pattern.add_node("circle")
+        rule = Rule.from_transform(pattern)
+        rule.inject_clone_node("circle")
+        rule.inject_add_node("new")
+        rule.inject_add_edge("new", "circle")
+        commits = []
+        for i in range(n):
+            _, commit = g.rewrite(
+                rule, {"circle": "circle"}, "Commit {}".format(i))
+            commits.append(commit)
+        return commits
+
+    def test_graph_snapshots(self):
+        g = VersionedGraph(
+            copy.deepcopy(self.initial_graph), snapshot_interval=3)
+        commits = self._clone_commits(g, 7)
+        assert(set(g._snapshots.keys()) == {commits[2], commits[5]})
+
+        reference = VersionedGraph(copy.deepcopy(self.initial_graph))
+        reference_commits = self._clone_commits(reference, 7)
+
+        g.rollback(commits[3])
+        reference.rollback(reference_commits[3])
+        assert(primitives.equal(g.graph, reference.graph))
+        assert(commits[5] not in g._snapshots)
+
+        g.snapshot()
+        self._clone_commits(g, 1)
+        g.rollback(commits[3])
+        assert(primitives.equal(g.graph, reference.graph))
+
+        g = VersionedGraph(
+            copy.deepcopy(self.initial_graph), snapshot_size=1)
+        commits = self._clone_commits(g, 4)
+        assert(0 < len(g._snapshots) < 4)
+
+    def test_branch_deltas(self):
+        def rewrite_branches(g):
+            g.branch("test")
+            self._clone_commits(g, 1)
+            g.switch_branch("master")
+            g.branch("other")
+            g.switch_branch("master")
+            self._clone_commits(g, 2)
+            # Commits do not update the deltas to the other branches
+            assert(len(g._deltas) == 0)
+            g.switch_branch("test")
+            assert(set(g._deltas.keys()) <= {"master"})
+            test_graph = copy.deepcopy(g.graph)
+            g.switch_branch("other")
+            assert(primitives.equal(g.graph, self.initial_graph))
+            g.switch_branch("master")
+            return test_graph
+
+        g = VersionedGraph(copy.deepcopy(self.initial_graph))
+        test_graph = rewrite_branches(g)
+        assert(set(test_graph.nodes()) ==
+               {"circle", "circle1", "square", "new"})
+
+        g_snapshots = VersionedGraph(
+            copy.deepcopy(self.initial_graph), snapshot_interval=1)
+        assert(primitives.equal(
+            rewrite_branches(g_snapshots), test_graph))
+        assert(primitives.equal(g_snapshots.graph, g.graph))
+
+    def test_commit_log(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "history")
+            g = VersionedGraph(copy.deepcopy(self.initial_graph))
+            self._clone_commits(g, 1)
+            g.save_log(path)
+            g.branch("test")
+            self._clone_commits(g, 2)
+            g.switch_branch("master")
+            rollback_commit = self._clone_commits(g, 2)[0]
+            g.rollback(rollback_commit)
+
+            g_log = VersionedGraph.from_log(copy.deepcopy(g.graph), path)
+            assert(g_log._heads == g._heads)
+            assert(g_log.current_branch() == "master")
+            assert(set(g_log._revision_graph.edges()) ==
+                   set(g._revision_graph.edges()))
+            assert(all(
+                "delta" not in attrs
+                for _, _, attrs in g_log._revision_graph.edges(data=True)))
+
+            for versioned in [g, g_log]:
+                versioned.switch_branch("test")
+            assert(primitives.equal(g_log.graph, g.graph))
+            self._clone_commits(g_log, 1)
+            g_reopened = VersionedGraph.from_log(g_log.graph, path)
+            assert(g_reopened._heads == g_log._heads)
+            assert(g_reopened.current_branch() == "test")
+        finally:
+            shutil.rmtree(directory)
+
+    def test_squash(self):
+        g = VersionedGraph(
+            copy.deepcopy(self.initial_graph), compaction_threshold=3)
+        commits = self._clone_commits(g, 10)
+        # Every fourth commit of the chain is kept
+        assert(g._revision_graph.number_of_nodes() == 5)
+        assert(g._squashed[commits[1]] == commits[3])
+
+        reference = VersionedGraph(copy.deepcopy(self.initial_graph))
+        reference_commits = self._clone_commits(reference, 10)
+        assert(primitives.equal(g.graph, reference.graph))
+        g.rollback(commits[7])
+        reference.rollback(reference_commits[7])
+        assert(primitives.equal(g.graph, reference.graph))
+
+        directory = tempfile.mkdtemp()
+        try:
+            g = VersionedGraph(copy.deepcopy(self.initial_graph))
+            g.save_log(os.path.join(directory, "history"))
+            commits = self._clone_commits(g, 4)
+            g.branch("test")
+            self._clone_commits(g, 2)
+            try:
+                g.squash(commits[0], g._heads["test"])
+                raise ValueError()
+            except RevisionError:
+                pass
+            assert(g.squash(commits[0], commits[3]) == commits[1:3])
+            assert(len(g.compact()) == 3)
+            g.switch_branch("master")
+            reference.rollback(reference_commits[3])
+            assert(primitives.equal(g.graph, reference.graph))
+
+            g_log = VersionedGraph.from_log(
+                g.graph, os.path.join(directory, "history"))
+            assert(g_log._squashed == g._squashed)
+            assert(set(g_log._revision_graph.edges()) ==
+                   set(g._revision_graph.edges()))
+            g_log.switch_branch("test")
+        finally:
+            shutil.rmtree(directory)
+
+    def test_delta_cache(self):
+        g = VersionedGraph(copy.deepcopy(self.initial_graph))
+        commits = self._clone_commits(g, 6)
+        initial_commit = [
+            n for n in g._revision_graph.nodes()
+            if g._revision_graph.in_degree(n) == 0][0]
+        path = list(nx.shortest_path(
+            g._revision_graph, initial_commit, commits[-1]))
+
+        compositions = []
+        compose_deltas = g._compose_deltas
+
+        def count_compositions(delta1, delta2):
+            compositions.append((delta1, delta2))
+            return compose_deltas(delta1, delta2)
+
+        g._compose_deltas = count_compositions
+        prefix_delta = g._compose_delta_path(path[:4])
+        assert(len(compositions) == 2)
+        # The composition along the prefix is reused
+        g._compose_delta_path(path)
+        assert(len(compositions) == 5)
+        assert(compositions[2][0] is prefix_delta)
+        g._compose_delta_path(path)
+        assert(len(compositions) == 5)
+        assert(g.delta_cache_info()["hits"] == 1)
+
+        reference = VersionedGraph(copy.deepcopy(self.initial_graph))
+        reference_commits = self._clone_commits(reference, 6)
+        g.rollback(commits[2])
+        reference.rollback(reference_commits[2])
+        assert(primitives.equal(g.graph, reference.graph))
+        # Compositions of the paths to the removed commits are dropped
+        assert(all(
+            s in g._revision_graph.nodes() and t in g._revision_graph.nodes()
+            for s, t in g._delta_cache.keys()))
+
+    def test_hierarchy_snapshots(self):
+        def rewrite_hierarchy(**kwargs):
+            hierarchy = NetworkXHierarchy()
+            hierarchy.add_graph("g", copy.deepcopy(self.initial_graph))
+            types = nx.DiGraph()
+            types.add_edge("shape", "shape")
+            hierarchy.add_graph("t", types)
+            hierarchy.add_typing(
+                "g", "t", {"circle": "shape", "square": "shape"})
+            h = VersionedHierarchy(hierarchy, **kwargs)
+            pattern = nx.DiGraph()
+            pattern.add_node("circle")
+            rule = Rule.from_transform(pattern)
+            rule.inject_clone_node("circle")
+            commits = [
+                h.rewrite("g", rule, {"circle": "circle"})[1]
+                for _ in range(4)]
+            h.rollback(commits[1])
+            return hierarchy, h
+
+        hierarchy, h = rewrite_hierarchy(snapshot_interval=1)
+        assert(len(h._snapshots) == 2)
+        reference, _ = rewrite_hierarchy()
+        assert(primitives.equal(
+            hierarchy.get_graph("g"), reference.get_graph("g")))
+        assert(hierarchy.get_typing("g", "t") ==
+               reference.get_typing("g", "t"))
+
     # def test_graph_rollback(self):
     #     g = VersionedGraph(self.initial_graph)
 